@@ -7,6 +7,7 @@ from iso15118.evcc.controller.interface import EVControllerInterface
 from iso15118.evcc.evcc_config import EVCCConfig
 from iso15118.evcc.evcc_settings import Config
 from iso15118.shared.iexi_codec import IEXICodec
+from iso15118.shared.itransport import ITransport
 from iso15118.shared.logging import _init_logger
 
 _init_logger()
@@ -20,10 +21,11 @@ class EVCCHandler(CommunicationSessionHandler):
         iface: str,
         exi_codec: IEXICodec,
         ev_controller: EVControllerInterface,
-        secc_sdp_port: int
+        secc_sdp_port: int,
+        transport: Optional[ITransport] = None,
     ):
         CommunicationSessionHandler.__init__(
-            self, evcc_config, iface, exi_codec, ev_controller
+            self, evcc_config, iface, exi_codec, ev_controller, transport
         )
         self.sdp_port = secc_sdp_port
 
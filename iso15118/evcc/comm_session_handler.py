@@ -11,7 +11,7 @@ import asyncio
 import logging
 from asyncio.streams import StreamReader, StreamWriter
 from ipaddress import IPv6Address
-from typing import Coroutine, List, Optional, Tuple, Union
+from typing import Coroutine, List, Optional, Set, Tuple, Union
 
 from pydantic.error_wrappers import ValidationError
 
@@ -29,6 +29,7 @@ from iso15118.shared.exceptions import (
 )
 from iso15118.shared.exi_codec import EXI
 from iso15118.shared.iexi_codec import IEXICodec
+from iso15118.shared.itransport import ITransport
 from iso15118.shared.messages.app_protocol import AppProtocol, SupportedAppProtocolReq
 from iso15118.shared.messages.enums import (
     AuthEnum,
@@ -59,6 +60,7 @@ from iso15118.shared.notifications import (
     StopNotification,
     UDPPacketNotification,
 )
+from iso15118.shared.socket_transport import SocketTransport
 from iso15118.shared.utils import cancel_task, wait_for_tasks
 
 logger = logging.getLogger(__name__)
@@ -226,7 +228,7 @@ class EVCCCommunicationSession(V2GCommunicationSession):
         v2gtp_msg = V2GTPMessage(
             Protocol.UNKNOWN,
             ISOV2PayloadTypes.EXI_ENCODED,
-            EXI().to_exi(sap_req, Namespace.SAP),
+            await EXI().to_exi_async(sap_req, Namespace.SAP),
         )
         self.current_state.message = sap_req
         await self.send(v2gtp_msg)
@@ -272,8 +274,11 @@ class CommunicationSessionHandler:
         iface: str,
         codec: IEXICodec,
         ev_controller: EVControllerInterface,
+        transport: Optional[ITransport] = None,
     ):
         self.list_of_tasks: List[Coroutine] = []
+        # Creates the UDP and TCP clients, by default on the network interface
+        self.transport: ITransport = transport or SocketTransport()
         self.udp_client: UDPClient = None
         self.tcp_client: TCPClient = None
         self.tls_client: bool = None
@@ -282,6 +287,9 @@ class CommunicationSessionHandler:
         self.ev_controller: EVControllerInterface = ev_controller
         self.sdp_retries_number = SDP_MAX_REQUEST_COUNTER
         self._sdp_retry_cycles = self.config.sdp_retry_cycles
+        # The teardowns of stopped communication sessions still waiting to
+        # signal the data link or close the TCP connection
+        self.teardowns: Set[asyncio.Task] = set()
 
         # Set the selected EXI codec implementation
         EXI().set_exi_codec(codec)
@@ -301,7 +309,9 @@ class CommunicationSessionHandler:
         async def __init__. Therefore, we need to create a separate async
         method to be our constructor.
         """
-        self.udp_client = UDPClient(self._rcv_queue, self.iface, secc_custom_sdp_port)
+        self.udp_client = self.transport.create_udp_client(
+            self._rcv_queue, self.iface, secc_custom_sdp_port
+        )
         self.list_of_tasks = [
             self.udp_client.start(),
             self.get_from_rcv_queue(self._rcv_queue),
@@ -408,15 +418,32 @@ class CommunicationSessionHandler:
             raise asyncio.exceptions.TimeoutError(shutdown_msg)
             #raise SDPFailedError(f"SDPRequest was not successful. " f"{shutdown_msg}")
 
+    def track_teardown(self, comm_session: Optional[V2GCommunicationSession]):
+        """Keeps the scheduled teardown of a stopped session until it's done"""
+        teardown = comm_session.teardown if comm_session else None
+        if teardown is not None and not teardown.done():
+            self.teardowns.add(teardown)
+            teardown.add_done_callback(self.teardowns.discard)
+
+    def cancel_teardowns(self):
+        """
+        Skips the remaining delays of the teardowns of the stopped sessions,
+        which close their TCP connections right away
+        """
+        for teardown in self.teardowns:
+            teardown.cancel()
+
     async def start_comm_session(self, host: IPv6Address, port: int, is_tls: bool):
         server_type = "TLS" if is_tls else "TCP"
+        # The new session owns the data link now
+        self.cancel_teardowns()
 
         try:
             logger.info(
                 f"Starting {server_type} client, trying to connect to "
                 f"{host.compressed} at port {port} ..."
             )
-            self.tcp_client = await TCPClient.create(
+            self.tcp_client = await self.transport.create_tcp_client(
                 host, port, self._rcv_queue, is_tls, self.iface
             )
             logger.info("TCP client connected")
@@ -557,6 +584,7 @@ class CommunicationSessionHandler:
                         logger.exception(exc)
                         # TODO not sure what else to do here
                 elif isinstance(notification, StopNotification):
+                    self.track_teardown(self.comm_session[0])
                     await cancel_task(self.comm_session[1])
                     del self.comm_session
                     if notification.successful:
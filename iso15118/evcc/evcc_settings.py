@@ -5,6 +5,7 @@ from typing import Optional
 
 import environs
 
+from iso15118.shared.event_loop import EventLoop
 from iso15118.shared.network import validate_nic
 from iso15118.shared.settings import load_shared_settings, shared_settings
 
@@ -16,6 +17,7 @@ class Config:
     iface: Optional[str] = None
     log_level: Optional[int] = None
     ev_config_file_path: str = None
+    event_loop: str = EventLoop.ASYNCIO
 
     def load_envs(self, env_path: Optional[str] = None) -> None:
         """
@@ -41,6 +43,14 @@ class Config:
             "EVCC_CONFIG_PATH",
             default="iso15118/shared/examples/evcc/iso15118_2/evcc_config_eim_ac.json",
         )
+
+        # The event loop implementation the EVCC runs on: 'asyncio' or 'uvloop'
+        # (if installed, falls back to 'asyncio' otherwise)
+        self.event_loop = env.str(
+            "EVENT_LOOP",
+            default=EventLoop.ASYNCIO,
+            validate=environs.validate.OneOf(EventLoop.options()),
+        )
         env.seal()  # raise all errors at once, if any
         load_shared_settings()
         logger.info("EVCC environment settings:")
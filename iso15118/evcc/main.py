@@ -2,11 +2,13 @@ import asyncio
 import logging
 import sys
 import argparse
+from typing import Optional
 
 from iso15118.evcc import Config, EVCCHandler
 from iso15118.evcc.controller.simulator import SimEVController
 from iso15118.evcc.evcc_config import load_from_file
-from iso15118.shared.exificient_exi_codec import ExificientEXICodec
+from iso15118.shared.event_loop import use_event_loop
+from iso15118.shared.exi_codec import create_exi_codec
 import gc
 
 from ev_arrival_sim import simulate_next_ev_arrival
@@ -15,21 +17,22 @@ logger = logging.getLogger(__name__)
 
 
 
-async def main():
+async def main(config: Optional[Config] = None):
     """
     Entrypoint function that starts the ISO 15118 code running on
     the EVCC (EV Communication Controller)
     """
     try: 
-        config = Config()
-        config.load_envs()
+        if config is None:
+            config = Config()
+            config.load_envs()
         if len(sys.argv) > 1:
             ev_config_file_path = sys.argv[1]
             if ev_config_file_path:
                 config.ev_config_file_path = ev_config_file_path
         
         evcc_config = await load_from_file(config.ev_config_file_path)
-        exi_codec_obj = ExificientEXICodec()
+        exi_codec_obj = create_exi_codec()
         ev_controller_obj =SimEVController(evcc_config)
 
         if len(sys.argv) > 2:
@@ -62,8 +65,11 @@ async def main():
             await asyncio.sleep(2)
 
 def run():
+    config = Config()
+    config.load_envs()
+    use_event_loop(config.event_loop)
     try:
-        asyncio.run(main())
+        asyncio.run(main(config))
     except KeyboardInterrupt:
         logger.debug("EVCC program terminated manually")
 
@@ -94,7 +94,7 @@ from iso15118.shared.security import (
     KeyEncoding,
     KeyPasswordPath,
     KeyPath,
-    create_signature,
+    create_signature_async,
     get_cert_issuer_serial,
     load_cert_chain,
     load_priv_key,
@@ -201,11 +201,11 @@ class AuthorizationSetup(StateEVCC):
             # TODO: Check how a signature in ISO 15118-20 differs from an
             #       ISO 15118-2 signature
             try:
-                signature = create_signature(
+                signature = await create_signature_async(
                     [
                         (
                             "id1",
-                            EXI().to_exi(
+                            await EXI().to_exi_async(
                                 oem_prov_cert_chain, Namespace.ISO_V20_COMMON_MSG
                             ),
                         )
@@ -268,7 +268,7 @@ class AuthorizationSetup(StateEVCC):
             # TODO: Need a signature for ISO 15118-20, not ISO 15118-2
             pnc_params_tuple = (
                 pnc_params.id,
-                EXI().to_exi(pnc_params, Namespace.ISO_V20_COMMON_MSG),
+                await EXI().to_exi_async(pnc_params, Namespace.ISO_V20_COMMON_MSG),
             )
             elements_to_sign = [pnc_params_tuple]
             try:
@@ -278,7 +278,9 @@ class AuthorizationSetup(StateEVCC):
                     KeyEncoding.PEM,
                     KeyPasswordPath.CONTRACT_LEAF_KEY_PASSWORD,
                 )
-                signature = create_signature(elements_to_sign, signature_key)
+                signature = await create_signature_async(
+                    elements_to_sign, signature_key
+                )
             except PrivateKeyReadError as exc:
                 logger.warning(
                     "PrivateKeyReadError occurred while trying to create "
@@ -90,15 +90,16 @@ from iso15118.shared.security import (
     KeyEncoding,
     KeyPasswordPath,
     KeyPath,
-    create_signature,
+    create_signature_async,
     decrypt_priv_key,
     get_cert_cn,
     get_cert_issuer_serial,
+    get_elements_to_sign_async,
     load_cert,
     load_cert_chain,
     load_priv_key,
     to_ec_pub_key,
-    verify_signature,
+    verify_signature_async,
 )
 from iso15118.shared.states import Terminate
 
@@ -430,11 +431,11 @@ class PaymentServiceSelection(StateEVCC):
                 )
 
                 try:
-                    signature = create_signature(
+                    signature = await create_signature_async(
                         [
                             (
                                 cert_install_req.id,
-                                EXI().to_exi(
+                                await EXI().to_exi_async(
                                     cert_install_req, Namespace.ISO_V2_MSG_DEF
                                 ),
                             )
@@ -517,32 +518,17 @@ class CertificateInstallation(StateEVCC):
             msg.body.certificate_installation_res
         )
 
-        if not verify_signature(
+        if not await verify_signature_async(
             signature=msg.header.signature,
-            elements_to_sign=[
-                (
-                    cert_install_res.contract_cert_chain.id,
-                    EXI().to_exi(
-                        cert_install_res.contract_cert_chain, Namespace.ISO_V2_MSG_DEF
-                    ),
-                ),
-                (
-                    cert_install_res.encrypted_private_key.id,
-                    EXI().to_exi(
-                        cert_install_res.encrypted_private_key, Namespace.ISO_V2_MSG_DEF
-                    ),
-                ),
-                (
-                    cert_install_res.dh_public_key.id,
-                    EXI().to_exi(
-                        cert_install_res.dh_public_key, Namespace.ISO_V2_MSG_DEF
-                    ),
-                ),
-                (
-                    cert_install_res.emaid.id,
-                    EXI().to_exi(cert_install_res.emaid, Namespace.ISO_V2_MSG_DEF),
-                ),
-            ],
+            elements_to_sign=await get_elements_to_sign_async(
+                [
+                    cert_install_res.contract_cert_chain,
+                    cert_install_res.encrypted_private_key,
+                    cert_install_res.dh_public_key,
+                    cert_install_res.emaid,
+                ],
+                Namespace.ISO_V2_MSG_DEF,
+            ),
             leaf_cert=cert_install_res.cps_cert_chain.certificate,
             sub_ca_certs=cert_install_res.cps_cert_chain.sub_certificates.certificates,
             root_ca_cert=load_cert(CertPath.V2G_ROOT_DER),
@@ -628,11 +614,13 @@ class PaymentDetails(StateEVCC):
         )
 
         try:
-            signature = create_signature(
+            signature = await create_signature_async(
                 [
                     (
                         authorization_req.id,
-                        EXI().to_exi(authorization_req, Namespace.ISO_V2_MSG_DEF),
+                        await EXI().to_exi_async(
+                            authorization_req, Namespace.ISO_V2_MSG_DEF
+                        ),
                     )
                 ],
                 load_priv_key(
@@ -1126,11 +1114,11 @@ class ChargingStatus(StateEVCC):
             )
 
             try:
-                signature = create_signature(
+                signature = await create_signature_async(
                     [
                         (
                             metering_receipt_req.id,
-                            EXI().to_exi(
+                            await EXI().to_exi_async(
                                 metering_receipt_req, Namespace.ISO_V2_MSG_DEF
                             ),
                         )
@@ -3,7 +3,7 @@ import logging
 import socket
 from ipaddress import IPv6Address
 
-from iso15118.shared.security import get_ssl_context
+from iso15118.shared.security import get_ssl_context, record_tls_handshake
 
 logger = logging.getLogger(__name__)
 
@@ -55,5 +55,6 @@ class TCPClient(asyncio.Protocol):
             raise exc
         except Exception as exc:
             raise exc
+        record_tls_handshake(self.writer.get_extra_info("ssl_object"), False)
 
         return self
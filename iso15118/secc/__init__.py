@@ -1,12 +1,15 @@
+import asyncio
 import logging
-from typing import Optional
+from typing import Dict, Optional
 
 from iso15118 import __version__
 from iso15118.secc.comm_session_handler import CommunicationSessionHandler
-from iso15118.secc.controller.interface import EVSEControllerInterface
-from iso15118.secc.secc_settings import Config
+from iso15118.secc.controller.interface import EVSEControllerInterface, ServiceStatus
+from iso15118.secc.secc_settings import Config, EVSEConfig
 from iso15118.shared.iexi_codec import IEXICodec
+from iso15118.shared.itransport import ITransport
 from iso15118.shared.logging import _init_logger
+from iso15118.shared.utils import wait_for_tasks
 
 _init_logger()
 logger = logging.getLogger(__name__)
@@ -18,12 +21,14 @@ class SECCHandler(CommunicationSessionHandler):
         exi_codec: IEXICodec,
         evse_controller: EVSEControllerInterface,
         config: Config,
+        transport: Optional[ITransport] = None,
     ):
         CommunicationSessionHandler.__init__(
             self,
             config,
             exi_codec,
             evse_controller,
+            transport,
         )
     def get_current_state(self):
         # Ensure the dictionary is not empty
@@ -53,3 +58,71 @@ class SECCHandler(CommunicationSessionHandler):
             # Re-raise so the process ends with a non-zero exit code and the
             # watchdog can restart the service
             raise
+
+
+class MultiEVSESECCHandler:
+    """
+    Serves several EVSEs from one SECC process and event loop.
+
+    Each EVSE gets a SECCHandler of its own, with its own SDP and TCP
+    servers, communication sessions and OCPP client. The handler listens on
+    the EVSE's network interface and SDP port, so each EV ends up with the
+    EVSE controller of the EVSE it's plugged into. The EXI codec, the SSL
+    contexts and the logging are shared by all EVSEs.
+    """
+
+    def __init__(
+        self,
+        exi_codec: IEXICodec,
+        evse_controllers: Dict[EVSEConfig, EVSEControllerInterface],
+        config: Config,
+        transport: Optional[ITransport] = None,
+    ):
+        self.exi_codec = exi_codec
+        self.evse_controllers = evse_controllers
+        self.config = config
+        self.transport = transport
+        # The SECCHandler currently running for each EVSE
+        self.handlers: Dict[EVSEConfig, SECCHandler] = {}
+
+    def get_handler(
+        self, iface: str, sdp_port: Optional[int] = None
+    ) -> Optional[SECCHandler]:
+        """Returns the SECCHandler of the EVSE on the given interface and port"""
+        return self.handlers.get(EVSEConfig(iface, sdp_port))
+
+    async def start(self):
+        logger.info(
+            f"Starting 15118 version: {__version__} for "
+            f"{len(self.evse_controllers)} EVSEs"
+        )
+        tasks = [
+            asyncio.create_task(self._serve(evse, evse_controller))
+            for evse, evse_controller in self.evse_controllers.items()
+        ]
+        try:
+            await wait_for_tasks(tasks)
+        finally:
+            # Also when start() is cancelled
+            for task in tasks:
+                task.cancel()
+
+    async def _serve(self, evse: EVSEConfig, evse_controller: EVSEControllerInterface):
+        """
+        Runs the SECC for one EVSE and starts it over whenever it terminates,
+        without affecting the other EVSEs
+        """
+        while True:
+            handler = SECCHandler(
+                self.exi_codec, evse_controller, self.config, self.transport
+            )
+            self.handlers[evse] = handler
+            try:
+                await evse_controller.set_status(ServiceStatus.STARTING)
+                await handler.start(evse.iface, sdp_custom_port=evse.sdp_port)
+            except Exception as exc:
+                logger.error(
+                    f"SECC for EVSE on {evse.iface} (SDP port {evse.sdp_port}) "
+                    f"terminated: {exc}"
+                )
+            await asyncio.sleep(1)
@@ -12,9 +12,9 @@ at once, i.e. creating, storing, and deleting those sessions as needed.
 
 import asyncio
 import logging
-import socket
 from asyncio.streams import StreamReader, StreamWriter
-from typing import Any, Coroutine, Dict, List, Optional, Tuple, Union
+from ssl import SSLContext
+from typing import Any, Coroutine, Dict, List, Optional, Set, Tuple, Union
 
 from iso15118.secc.controller.ev_data import EVSessionContext15118
 from iso15118.secc.controller.interface import EVSEControllerInterface, ServiceStatus
@@ -30,6 +30,7 @@ from iso15118.shared.comm_session import V2GCommunicationSession
 from iso15118.shared.exceptions import InvalidSDPRequestError, InvalidV2GTPMessageError
 from iso15118.shared.exi_codec import EXI
 from iso15118.shared.iexi_codec import IEXICodec
+from iso15118.shared.itransport import ITransport
 from iso15118.shared.messages.enums import (
     AuthEnum,
     ISOV2PayloadTypes,
@@ -56,11 +57,15 @@ from iso15118.shared.messages.sdp import (
 )
 from iso15118.shared.messages.timeouts import Timeouts
 from iso15118.shared.messages.v2gtp import V2GTPMessage
+from iso15118.shared.notification_dispatcher import NotificationDispatcher
 from iso15118.shared.notifications import (
+    Notification,
     StopNotification,
     TCPClientNotification,
     UDPPacketNotification,
 )
+from iso15118.shared.security import get_ssl_context
+from iso15118.shared.socket_transport import SocketTransport
 from iso15118.shared.utils import cancel_task, wait_for_tasks
 
 #Added by Tulio Soares
@@ -166,9 +171,23 @@ class SECCCommunicationSession(V2GCommunicationSession):
         _, writer = transport
         return True if writer.get_extra_info("sslcontext") else False
 
-    async def stop(self, reason: str):
+    async def stop(self, reason: str) -> asyncio.Task:
         await self.evse_controller.stop_charger()
-        await super().stop(reason)
+        return await super().stop(reason)
+
+
+def peer_host(notification: Notification) -> Optional[str]:
+    """
+    The IPv6 address of the peer the notification is about, which keys the
+    lane it's processed in
+    """
+    if isinstance(notification, UDPPacketNotification):
+        return notification.addr[0]
+    if isinstance(notification, TCPClientNotification):
+        return notification.ip_address[0]
+    if isinstance(notification, StopNotification) and notification.peer_ip_address:
+        return notification.peer_ip_address[0]
+    return None
 
 
 class CommunicationSessionHandler:
@@ -180,15 +199,36 @@ class CommunicationSessionHandler:
     # pylint: disable=too-many-instance-attributes
 
     def __init__(
-        self, config: Config, codec: IEXICodec, evse_controller: EVSEControllerInterface
+        self,
+        config: Config,
+        codec: IEXICodec,
+        evse_controller: EVSEControllerInterface,
+        transport: Optional[ITransport] = None,
     ):
         self.list_of_tasks: List[Coroutine] = []
+        # Creates the UDP and TCP servers, by default on the network interface
+        self.transport: ITransport = transport or SocketTransport()
         self.udp_server: Optional[UDPServer] = None
-        self.tcp_server: Optional[TCPServer] = None
-        self.tcp_server_handler: Optional[asyncio.Task[Any]] = None
+        # The long-lived TCP servers, keyed by whether they use TLS, and the
+        # tasks running them. Both listen before the first SDP request comes
+        # in, so the SDP response only needs to pick the right one
+        self.tcp_servers: Dict[bool, TCPServer] = {}
+        self.tcp_server_handlers: Dict[bool, asyncio.Task[Any]] = {}
+        self._tcp_server_ready: Dict[bool, asyncio.Event] = {}
         self.config: Config = config
         self.evse_controller: EVSEControllerInterface = evse_controller
         self.udp_processor_lock: asyncio.Lock = asyncio.Lock()
+        # The encoded SDP responses, keyed by the payload of the SDP request
+        # they answer, with whether the TLS server was requested and the SSL
+        # context it had. They're valid as long as the TCP servers aren't
+        # restarted
+        self._sdp_responses: Dict[bytes, Tuple[bytes, bool, Optional[SSLContext]]] = {}
+        self.notification_dispatcher = NotificationDispatcher(
+            self.process_notification, peer_host
+        )
+        # The teardowns of stopped communication sessions still waiting to
+        # signal the data link or close the TCP connection
+        self.teardowns: Set[asyncio.Task] = set()
 
         # List of server status events
         self.status_event_list: List[asyncio.Event] = []
@@ -238,14 +278,20 @@ class CommunicationSessionHandler:
             await asyncio.sleep(1)
 
         if start_udp_server:
-            self.udp_server = UDPServer(self._rcv_queue, iface, sdp_custom_port)
+            self.udp_server = self.transport.create_udp_server(
+                self._rcv_queue, iface, sdp_custom_port
+            )
             udp_ready_event: asyncio.Event = asyncio.Event()
             self.status_event_list.append(udp_ready_event)
             self.list_of_tasks.append(self.udp_server.start(udp_ready_event))
         else:
             logger.info(f"UDP server disabled on {iface}")
 
-        self.tcp_server = TCPServer(self._rcv_queue, iface)
+        for with_tls in (False, True):
+            self.tcp_servers[with_tls] = self.transport.create_tcp_server(
+                self._rcv_queue, iface
+            )
+            await self.start_tcp_server(with_tls)
 
         self.list_of_tasks.extend(
             [
@@ -288,80 +334,75 @@ class CommunicationSessionHandler:
         communication session to pause or terminate the session.
         It will then be further processed accordingly.
 
+        The notifications of one peer are processed in the order they came
+        in, those of different peers concurrently (see
+        NotificationDispatcher).
+
         Args:
             queue:  An asyncio.Queue object, holding all the notifications the
                     SECC communication session handler needs to process
         """
-        while True:
-            try:
-                notification = queue.get_nowait()
-            except asyncio.QueueEmpty:
-                notification = await queue.get()
+        await self.notification_dispatcher.run(queue)
+
+    async def process_notification(self, notification: Notification):
+        if isinstance(notification, UDPPacketNotification):
+            await self.process_incoming_udp_packet(notification)
+        elif isinstance(notification, TCPClientNotification):
+            if self.udp_server:
+                self.udp_server.pause_udp_server()
+            # The new session owns the data link now
+            self.cancel_teardowns()
+            logger.info(
+                f"TCP client connected, client address is {notification.ip_address}."
+            )
 
             try:
-                if isinstance(notification, UDPPacketNotification):
-                    await self.process_incoming_udp_packet(notification)
-                elif isinstance(notification, TCPClientNotification):
-                    if self.udp_server:
-                        self.udp_server.pause_udp_server()
-                    logger.info(
-                        "TCP client connected, client address is "
-                        f"{notification.ip_address}."
+                comm_session, _ = self.comm_sessions[notification.ip_address[0]]
+                ev_context = comm_session.ev_session_context
+                comm_session = SECCCommunicationSession(
+                    notification.transport,
+                    self._rcv_queue,
+                    self.config,
+                    self.evse_controller,
+                    await self.evse_controller.get_evse_id(Protocol.UNKNOWN),
+                    ev_context,
+                    ocpp_client=self.ocpp_client,
+                )
+            except (KeyError, ConnectionResetError) as e:
+                if isinstance(e, ConnectionResetError):
+                    logger.info("Can't resume session. End and start new one.")
+                    await self.end_current_session(
+                        notification.ip_address, SessionStopAction.TERMINATE
                     )
+                comm_session = SECCCommunicationSession(
+                    notification.transport,
+                    self._rcv_queue,
+                    self.config,
+                    self.evse_controller,
+                    await self.evse_controller.get_evse_id(Protocol.UNKNOWN),
+                    ocpp_client=self.ocpp_client,
+                )
 
-                    try:
-                        comm_session, _ = self.comm_sessions[notification.ip_address[0]]
-                        ev_context = comm_session.ev_session_context
-                        comm_session = SECCCommunicationSession(
-                            notification.transport,
-                            self._rcv_queue,
-                            self.config,
-                            self.evse_controller,
-                            await self.evse_controller.get_evse_id(Protocol.UNKNOWN),
-                            ev_context,
-                            ocpp_client=self.ocpp_client,
-                        )
-                    except (KeyError, ConnectionResetError) as e:
-                        if isinstance(e, ConnectionResetError):
-                            logger.info("Can't resume session. End and start new one.")
-                            await self.end_current_session(
-                                notification.ip_address, SessionStopAction.TERMINATE
-                            )
-                        comm_session = SECCCommunicationSession(
-                            notification.transport,
-                            self._rcv_queue,
-                            self.config,
-                            self.evse_controller,
-                            await self.evse_controller.get_evse_id(Protocol.UNKNOWN),
-                            ocpp_client=self.ocpp_client,
-                        )
-
-                    task = asyncio.create_task(
-                        comm_session.start(
-                            Timeouts.V2G_EVCC_COMMUNICATION_SETUP_TIMEOUT
-                        )
-                    )
-                    self.comm_sessions[notification.ip_address[0]] = (
-                        comm_session,
-                        task,
-                    )
-                    self._current_peer_ip = notification.ip_address
-                elif isinstance(notification, StopNotification):
-                    try:
-                        await self.end_current_session(
-                            notification.peer_ip_address, notification.stop_action
-                        )
-                    except KeyError:
-                        pass
-                else:
-                    logger.warning(
-                        f"Communication session handler "
-                        f"received an unknown message or "
-                        f"notification: {notification}"
-                    )
-            # TODO: What about an except here?
-            finally:
-                queue.task_done()
+            task = asyncio.create_task(
+                comm_session.start(Timeouts.V2G_EVCC_COMMUNICATION_SETUP_TIMEOUT)
+            )
+            self.comm_sessions[notification.ip_address[0]] = (
+                comm_session,
+                task,
+            )
+            self._current_peer_ip = notification.ip_address
+        elif isinstance(notification, StopNotification):
+            try:
+                await self.end_current_session(
+                    notification.peer_ip_address, notification.stop_action
+                )
+            except KeyError:
+                pass
+        else:
+            logger.warning(
+                "Communication session handler received an unknown message or "
+                f"notification: {notification}"
+            )
 
     def close_session(self):
         """
@@ -378,12 +419,28 @@ class CommunicationSessionHandler:
         except Exception as e:
             logger.warning(f"Error while indicating EOF to transport reader: {e}")
 
+    def track_teardown(self, comm_session: SECCCommunicationSession):
+        """Keeps the scheduled teardown of a stopped session until it's done"""
+        teardown = comm_session.teardown
+        if teardown is not None and not teardown.done():
+            self.teardowns.add(teardown)
+            teardown.add_done_callback(self.teardowns.discard)
+
+    def cancel_teardowns(self):
+        """
+        Skips the remaining delays of the teardowns of the stopped sessions,
+        which close their TCP connections right away
+        """
+        for teardown in self.teardowns:
+            teardown.cancel()
+
     async def end_current_session(
         self, peer_ip_address: Any, session_stop_action: SessionStopAction
     ):
         try:
-            await cancel_task(self.tcp_server_handler)
-            await cancel_task(self.comm_sessions[peer_ip_address[0]][1])
+            comm_session, task = self.comm_sessions[peer_ip_address[0]]
+            self.track_teardown(comm_session)
+            await cancel_task(task)
         except Exception as e:
             logger.warning(f"Unexpected error ending current session: {e}")
         finally:
@@ -394,51 +451,90 @@ class CommunicationSessionHandler:
                     f"Preserved session state: {self.comm_sessions[peer_ip_address[0]][0].ev_session_context}"  # noqa
                 )
 
-        self.tcp_server_handler = None
         self._current_peer_ip = None
         if self.udp_server:
             self.udp_server.resume_udp_server()
 
     async def start_tcp_server(self, with_tls: bool):
-        if self.tcp_server_handler:
+        """
+        Starts the TCP server with or without TLS, restarting it if it's
+        running already. The server keeps accepting connections until it's
+        restarted or the session handler ends.
+        """
+        self._sdp_responses.clear()
+        tcp_server_handler = self.tcp_server_handlers.pop(with_tls, None)
+        if tcp_server_handler:
             logger.info("Reset current tcp handler.")
             try:
-                await cancel_task(self.tcp_server_handler)
+                await cancel_task(tcp_server_handler)
             except Exception as e:
                 logger.warning(f"Error cancelling existing tcp server handler: {e}")
-            self.tcp_server_handler = None
 
         server_ready_event: asyncio.Event = asyncio.Event()
-        self.status_event_list.clear()
+        previous_ready_event = self._tcp_server_ready.get(with_tls)
+        if previous_ready_event in self.status_event_list:
+            self.status_event_list.remove(previous_ready_event)
         self.status_event_list.append(server_ready_event)
+        self._tcp_server_ready[with_tls] = server_ready_event
+        tcp_server = self.tcp_servers[with_tls]
         if with_tls:
-            self.tcp_server_handler = asyncio.create_task(
-                self.tcp_server.start_tls(server_ready_event)
+            self.tcp_server_handlers[with_tls] = asyncio.create_task(
+                tcp_server.start_tls(server_ready_event)
             )
         else:
-            self.tcp_server_handler = asyncio.create_task(
-                self.tcp_server.start_no_tls(server_ready_event)
+            self.tcp_server_handlers[with_tls] = asyncio.create_task(
+                tcp_server.start_no_tls(server_ready_event)
             )
-        await self.check_status_task(False)
+
+    async def get_tcp_server(self, with_tls: bool) -> TCPServer:
+        """
+        Returns the TCP server the EVCC shall connect to, once it's ready
+        """
+        await self._wait_for_tcp_server(with_tls)
+        tcp_server = self.tcp_servers[with_tls]
+        if with_tls and get_ssl_context(True) is not tcp_server.ssl_context:
+            # The SECC certificates changed (or have been installed) since
+            # the TLS server started, so it restarts with the new SSL context
+            await self.start_tcp_server(True)
+            await self._wait_for_tcp_server(True)
+        return tcp_server
+
+    async def _wait_for_tcp_server(self, with_tls: bool):
+        try:
+            await asyncio.wait_for(self._tcp_server_ready[with_tls].wait(), timeout=10)
+        except asyncio.TimeoutError:
+            logger.error("Timeout: Servers failed to startup")
+            await self.evse_controller.set_status(ServiceStatus.ERROR)
 
     async def process_sdp_request(
         self, sdp_request: SDPRequest
     ) -> Union[SDPResponse, SDPResponseWireless]:
-        if self.config.enforce_tls or sdp_request.security == Security.TLS:
-            await self.start_tcp_server(True)
-        else:
-            await self.start_tcp_server(False)
-
-        port = self.tcp_server.port
-        # convert IPv6 address from presentation to numeric format
-        ipv6_bytes = socket.inet_pton(
-            socket.AF_INET6, self.tcp_server.ipv6_address_host
-        )
+        with_tls = self.config.enforce_tls or sdp_request.security == Security.TLS
+        tcp_server = await self.get_tcp_server(with_tls)
 
         return create_sdp_response(
-            sdp_request, ipv6_bytes, port, self.tcp_server.is_tls_enabled
+            sdp_request,
+            tcp_server.ipv6_address_bytes,
+            tcp_server.port,
+            tcp_server.is_tls_enabled,
         )
 
+    def get_cached_sdp_response(self, sdp_request_payload: bytes) -> Optional[bytes]:
+        """
+        Returns the encoded SDP response sent for the same SDP request before
+        (e.g. while the EVCC retries it), unless the TLS server it points to
+        needs to restart with new certificates
+        """
+        cached = self._sdp_responses.get(sdp_request_payload)
+        if cached is None:
+            return None
+        response, with_tls, ssl_context = cached
+        # Also expires a response falling back to no TLS for lack of
+        # certificates, once they're installed
+        if with_tls and get_ssl_context(True) is not ssl_context:
+            return None
+        return response
+
     async def process_incoming_udp_packet(self, message: UDPPacketNotification):
         """
         We expect this to be an SDP request from the UDP client. It could be an
@@ -452,6 +548,13 @@ class CommunicationSessionHandler:
             logger.exception(exc)
             return
 
+        if v2gtp_msg.payload_type == ISOV2PayloadTypes.SDP_REQUEST:
+            cached_response = self.get_cached_sdp_response(bytes(v2gtp_msg.payload))
+            if cached_response:
+                logger.debug(f"Sending cached SDPResponse to {message.addr}")
+                self.udp_server.send_bytes(cached_response, message.addr)
+                return
+
         async with self.udp_processor_lock:
             # Process one incoming datagram at a time.
             # An incoming datagram can only be an SDP request message, all
@@ -488,4 +591,11 @@ class CommunicationSessionHandler:
             )
             logger.info(f"Sending SDPResponse: {sdp_response}")
 
-            self.udp_server.send(v2gtp_msg, message.addr)
+            response = v2gtp_msg.to_bytes()
+            with_tls = self.config.enforce_tls or sdp_request.security == Security.TLS
+            self._sdp_responses[sdp_request.to_payload()] = (
+                response,
+                with_tls,
+                self.tcp_servers[with_tls].ssl_context,
+            )
+            self.udp_server.send_bytes(response, message.addr)
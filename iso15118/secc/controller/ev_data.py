@@ -279,7 +279,7 @@ class EVDataContext:
         dc_ev_charge_parameter: Union[DCEVChargeParameter, DIN_DCEVChargeParameter],
     ) -> None:
         """Update the EV data context with the DCEVChargeParameter parameters"""
-        if type(dc_ev_charge_parameter) is DCEVChargeParameter:
+        if isinstance(dc_ev_charge_parameter, DCEVChargeParameter):
             self.departure_time = dc_ev_charge_parameter.departure_time
         self.present_soc = dc_ev_charge_parameter.dc_ev_status.ev_ress_soc
         self.target_energy_request = (  # noqa: E501
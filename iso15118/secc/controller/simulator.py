@@ -150,9 +150,10 @@ from iso15118.shared.security import (
     KeyEncoding,
     KeyPasswordPath,
     KeyPath,
-    create_signature,
+    create_signature_async,
     encrypt_priv_key,
     get_cert_cn,
+    get_elements_to_sign_async,
     load_cert,
     load_priv_key,
 )
@@ -904,7 +905,7 @@ class SimEVSEController(EVSEControllerInterface):
         is set to False. Except that both the request and response is base64 encoded.
         """
         cert_install_req_exi = base64.b64decode(base64_encoded_cert_installation_req)
-        cert_install_req = EXI().from_exi(cert_install_req_exi, namespace)
+        cert_install_req = await EXI().from_exi_async(cert_install_req_exi, namespace)
         try:
             dh_pub_key, encrypted_priv_key_bytes = encrypt_priv_key(
                 oem_prov_cert=load_cert(CertPath.OEM_LEAF_DER),
@@ -964,33 +965,15 @@ class SimEVSEController(EVSEControllerInterface):
 
         try:
             # Elements to sign, containing its id and the exi encoded stream
-            contract_cert_tuple = (
-                cert_install_res.contract_cert_chain.id,
-                EXI().to_exi(
-                    cert_install_res.contract_cert_chain, Namespace.ISO_V2_MSG_DEF
-                ),
-            )
-            encrypted_priv_key_tuple = (
-                cert_install_res.encrypted_private_key.id,
-                EXI().to_exi(
-                    cert_install_res.encrypted_private_key, Namespace.ISO_V2_MSG_DEF
-                ),
+            elements_to_sign = await get_elements_to_sign_async(
+                [
+                    cert_install_res.contract_cert_chain,
+                    cert_install_res.encrypted_private_key,
+                    cert_install_res.dh_public_key,
+                    cert_install_res.emaid,
+                ],
+                Namespace.ISO_V2_MSG_DEF,
             )
-            dh_public_key_tuple = (
-                cert_install_res.dh_public_key.id,
-                EXI().to_exi(cert_install_res.dh_public_key, Namespace.ISO_V2_MSG_DEF),
-            )
-            emaid_tuple = (
-                cert_install_res.emaid.id,
-                EXI().to_exi(cert_install_res.emaid, Namespace.ISO_V2_MSG_DEF),
-            )
-
-            elements_to_sign = [
-                contract_cert_tuple,
-                encrypted_priv_key_tuple,
-                dh_public_key_tuple,
-                emaid_tuple,
-            ]
             # The private key to be used for the signature
             signature_key = load_priv_key(
                 KeyPath.CPS_LEAF_PEM,
@@ -998,7 +981,7 @@ class SimEVSEController(EVSEControllerInterface):
                 KeyPasswordPath.CPS_LEAF_KEY_PASSWORD,
             )
 
-            signature = create_signature(elements_to_sign, signature_key)
+            signature = await create_signature_async(elements_to_sign, signature_key)
 
         except PrivateKeyReadError as exc:
             raise Exception(
@@ -1017,7 +1000,7 @@ class SimEVSEController(EVSEControllerInterface):
                 {"CertificateInstallationRes": cert_install_res.dict()}
             )
             to_be_exi_encoded = V2GMessageV2(header=header, body=body)
-            exi_encoded_cert_installation_res = EXI().to_exi(
+            exi_encoded_cert_installation_res = await EXI().to_exi_async(
                 to_be_exi_encoded, Namespace.ISO_V2_MSG_DEF
             )
 
@@ -1,40 +1,57 @@
 import asyncio
 import logging
 import sys
+from typing import Optional
 
-from iso15118.secc import SECCHandler
+from iso15118.secc import MultiEVSESECCHandler, SECCHandler
 from iso15118.secc.controller.interface import ServiceStatus
 from iso15118.secc.controller.simulator import SimEVSEController
-from iso15118.secc.secc_settings import Config
+from iso15118.secc.secc_settings import Config, EVSEConfig
+from iso15118.shared.event_loop import use_event_loop
+from iso15118.shared.exi_codec import create_exi_codec
 from iso15118.shared.exificient_exi_codec import ExificientEXICodec
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.WARNING)
 
 #ISO 15118 task
-async def main():
+async def main(config: Optional[Config] = None):
     """
     Entrypoint function that starts the ISO 15118 code running on
     the SECC (Supply Equipment Communication Controller)
     """
     try:
      #To execute on __init__ function of OCPP client
-        config = Config()
-        config.load_envs()
+        if config is None:
+            config = Config()
+            config.load_envs()
         config.print_settings()
 
         if len(sys.argv) > 1:
-            secc_custom_sdp_port = int(sys.argv[1])
-            logging.info(f"SECC_SDP_PORT {secc_custom_sdp_port}")
-        else: 
-            secc_custom_sdp_port = None
+            # One EVSE per SDP port given
+            config.evses = [
+                EVSEConfig(config.iface, int(sdp_port)) for sdp_port in sys.argv[1:]
+            ]
+            logging.info(f"SECC_SDP_PORT {sys.argv[1:]}")
+        secc_custom_sdp_port = config.evses[0].sdp_port
+        config.iface = config.evses[0].iface
 
         sim_evse_controller = SimEVSEController()
-        exi_codec_obj = ExificientEXICodec()
+        exi_codec_obj = create_exi_codec()
 
     except Exception as e:
         logging.error(e)
-        await asyncio.sleep(1)
+        # Without the configuration and the EXI codec, there's nothing to start
+        raise
+    if len(config.evses) > 1:
+        # All EVSEs in this process, sharing the EXI codec
+        multi_evse_handler = MultiEVSESECCHandler(
+            exi_codec=exi_codec_obj,
+            evse_controllers={evse: SimEVSEController() for evse in config.evses},
+            config=config,
+        )
+        await multi_evse_handler.start()
+        return
     while True:
         try:
             secc_handler_obj = SECCHandler(
@@ -46,14 +63,18 @@ async def main():
             await sim_evse_controller.set_status(ServiceStatus.STARTING)
             await secc_handler_obj.start(config.iface, sdp_custom_port=secc_custom_sdp_port)
         except Exception as e:
-            exi_codec_obj.reset_gateway()
+            if isinstance(exi_codec_obj, ExificientEXICodec):
+                exi_codec_obj.reset_gateway()
             logging.error(e)
             await asyncio.sleep(1)
 
 
 def run():
+    config = Config()
+    config.load_envs()
+    use_event_loop(config.event_loop)
     try:
-        asyncio.run(main())
+        asyncio.run(main(config))
     except KeyboardInterrupt:
         logger.debug("SECC program terminated manually")
 
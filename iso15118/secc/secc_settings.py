@@ -6,6 +6,8 @@ from typing import List, Optional, Type
 import environs
 
 from iso15118.secc.controller.interface import EVSEControllerInterface
+from iso15118.shared.event_loop import EventLoop
+from iso15118.shared.exceptions import InvalidSettingsValueError
 from iso15118.shared.messages.enums import AuthEnum, Protocol
 from iso15118.shared.settings import load_shared_settings, shared_settings
 from iso15118.shared.utils import load_requested_auth_modes, load_requested_protocols
@@ -13,6 +15,33 @@ from iso15118.shared.utils import load_requested_auth_modes, load_requested_prot
 logger = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True)
+class EVSEConfig:
+    """
+    The network interface and SDP port on which the SECC serves one EVSE.
+    Without sdp_port, the SDP server port 15118 is used.
+    """
+
+    iface: str
+    sdp_port: Optional[int] = None
+
+
+def load_evse_configs(read_evses: List[str], default_iface: str) -> List[EVSEConfig]:
+    """
+    Parses the EVSEs given as 'iface:port', 'iface' or 'port' (on the
+    default network interface)
+    """
+    evses = []
+    for evse in filter(None, (evse.strip() for evse in read_evses)):
+        iface, _, port = evse.rpartition(":")
+        if not iface and not port.isdigit():
+            iface, port = port, ""
+        if port and not port.isdigit():
+            raise InvalidSettingsValueError("SECC", "SECC_EVSES", evse)
+        evses.append(EVSEConfig(iface or default_iface, int(port) if port else None))
+    return evses
+
+
 @dataclass
 class Config:
     iface: Optional[str] = None
@@ -26,6 +55,9 @@ class Config:
     supported_protocols: Optional[List[Protocol]] = None
     supported_auth_options: Optional[List[AuthEnum]] = None
     standby_allowed: bool = False
+    # The EVSEs served by this SECC process, one by default
+    evses: Optional[List[EVSEConfig]] = None
+    event_loop: str = EventLoop.ASYNCIO
     default_protocols = [
         "DIN_SPEC_70121",
         "ISO_15118_2",
@@ -54,6 +86,11 @@ class Config:
 
         self.iface = env.str("NETWORK_INTERFACE", default="eth0")
 
+        # The EVSEs this SECC process serves, each on its own network interface
+        # and/or SDP port, e.g. 'eth0:15118,eth0:15119' or 'eth1,eth2'
+        evses = env.list("SECC_EVSES", default=[])
+        self.evses = load_evse_configs(evses, self.iface) or [EVSEConfig(self.iface)]
+
         self.log_level = env.str("LOG_LEVEL", default="INFO")
 
         # Indicates whether or not the SECC should always enforce a TLS-secured
@@ -103,6 +140,14 @@ class Config:
         # enum values in PowerDeliveryReq's ChargeProgress field). In Standby, the
         # EV can still use value-added services while not consuming any power.
         self.standby_allowed = env.bool("STANDBY_ALLOWED", default=False)
+
+        # The event loop implementation the SECC runs on: 'asyncio' or 'uvloop'
+        # (if installed, falls back to 'asyncio' otherwise)
+        self.event_loop = env.str(
+            "EVENT_LOOP",
+            default=EventLoop.ASYNCIO,
+            validate=environs.validate.OneOf(EventLoop.options()),
+        )
         load_shared_settings(env_path)
         env.seal()  # raise all errors at once, if any
         self.env_dump = dict(env.dump())
@@ -108,7 +108,7 @@ from iso15118.shared.messages.iso15118_20.dc import (
 )
 from iso15118.shared.messages.iso15118_20.timeouts import Timeouts
 from iso15118.shared.notifications import StopNotification
-from iso15118.shared.security import get_random_bytes, verify_signature
+from iso15118.shared.security import get_random_bytes, verify_signature_async
 from iso15118.shared.states import State, Terminate
 
 logger = logging.getLogger(__name__)
@@ -397,12 +397,14 @@ class Authorization(StateSECC):
             auth_req.selected_auth_service.value
         )
         if auth_req.pnc_params:
-            if not verify_signature(
+            if not await verify_signature_async(
                 auth_req.header.signature,
                 [
                     (
                         auth_req.pnc_params.id,
-                        EXI().to_exi(auth_req.pnc_params, Namespace.ISO_V20_COMMON_MSG),
+                        await EXI().to_exi_async(
+                            auth_req.pnc_params, Namespace.ISO_V20_COMMON_MSG
+                        ),
                     )
                 ],
                 auth_req.pnc_params.contract_cert_chain.certificate,
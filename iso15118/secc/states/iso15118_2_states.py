@@ -121,6 +121,7 @@ from iso15118.shared.messages.iso15118_20.common_types import (
 from iso15118.shared.messages.iso15118_20.common_types import (
     V2GMessage as V2GMessageV20,
 )
+from iso15118.shared.messages.iso15118_2.timeouts import Timeouts as TimeoutsV2
 from iso15118.shared.messages.timeouts import Timeouts
 from iso15118.shared.messages.xmldsig import Signature
 from iso15118.shared.notifications import StopNotification
@@ -130,17 +131,19 @@ from iso15118.shared.security import (
     KeyPasswordPath,
     KeyPath,
     build_pem_certificate_chain,
-    create_signature,
+    create_signature_async,
     encrypt_priv_key,
     get_cert_cn,
     get_certificate_hash_data,
+    get_elements_to_sign_async,
     get_random_bytes,
     load_cert,
     load_priv_key,
     log_certs_details,
     verify_certs,
-    verify_signature,
+    verify_signature_async,
 )
+from iso15118.shared.settings import SettingKey, shared_settings
 from iso15118.shared.states import Base64, Pause, State, Terminate
 
 from iso15118.shared.messages.enums import UnitSymbol
@@ -229,7 +232,7 @@ class SessionSetup(StateSECC):
 
         self.comm_session.ocpp_client.transaction_id = session_id
 
-        await self.comm_session.ocpp_client.send_transaction_event()
+        self.comm_session.ocpp_client.queue_transaction_event()
 
         self.create_next_message(
             ServiceDiscovery,
@@ -689,7 +692,7 @@ class CertificateInstallation(StateSECC):
         if not msg:
             return
 
-        if not self.validate_message_signature(msg):
+        if not await self.validate_message_signature(msg):
             self.stop_state_machine(
                 "Signature verification failed for " "CertificateInstallationReq",
                 message,
@@ -736,7 +739,7 @@ class CertificateInstallation(StateSECC):
                 (
                     certificate_installation_res,
                     signature,
-                ) = self.generate_certificate_installation_res()
+                ) = await self.generate_certificate_installation_res()
 
         except Exception as e:
             error = f"Error building CertificateInstallationRes: {e}"
@@ -756,7 +759,7 @@ class CertificateInstallation(StateSECC):
             signature=signature,
         )
 
-    def validate_message_signature(self, message: V2GMessageV2) -> bool:
+    async def validate_message_signature(self, message: V2GMessageV2) -> bool:
         # For the CertificateInstallation, the min. the SECC can do is
         # to verify the message signature, using the OEM provisioning
         # certificate (public key) - this is available in the cert installation req.
@@ -781,12 +784,14 @@ class CertificateInstallation(StateSECC):
         except (FileNotFoundError, IOError):
             pass
 
-        return verify_signature(
+        return await verify_signature_async(
             signature=message.header.signature,
             elements_to_sign=[
                 (
                     cert_install_req.id,
-                    EXI().to_exi(cert_install_req, Namespace.ISO_V2_MSG_DEF),
+                    await EXI().to_exi_async(
+                        cert_install_req, Namespace.ISO_V2_MSG_DEF
+                    ),
                 )
             ],
             leaf_cert=cert_install_req.oem_provisioning_cert,
@@ -794,7 +799,7 @@ class CertificateInstallation(StateSECC):
             root_ca_cert=root_ca_certificate_oem,
         )
 
-    def generate_certificate_installation_res(
+    async def generate_certificate_installation_res(
         self,
     ) -> Tuple[CertificateInstallationRes, Signature]:
         # Here we create the CertificateInstallationRes message ourselves as we
@@ -861,33 +866,15 @@ class CertificateInstallation(StateSECC):
 
         try:
             # Elements to sign, containing its id and the exi encoded stream
-            contract_cert_tuple = (
-                cert_install_res.contract_cert_chain.id,
-                EXI().to_exi(
-                    cert_install_res.contract_cert_chain, Namespace.ISO_V2_MSG_DEF
-                ),
-            )
-            encrypted_priv_key_tuple = (
-                cert_install_res.encrypted_private_key.id,
-                EXI().to_exi(
-                    cert_install_res.encrypted_private_key, Namespace.ISO_V2_MSG_DEF
-                ),
-            )
-            dh_public_key_tuple = (
-                cert_install_res.dh_public_key.id,
-                EXI().to_exi(cert_install_res.dh_public_key, Namespace.ISO_V2_MSG_DEF),
-            )
-            emaid_tuple = (
-                cert_install_res.emaid.id,
-                EXI().to_exi(cert_install_res.emaid, Namespace.ISO_V2_MSG_DEF),
+            elements_to_sign = await get_elements_to_sign_async(
+                [
+                    cert_install_res.contract_cert_chain,
+                    cert_install_res.encrypted_private_key,
+                    cert_install_res.dh_public_key,
+                    cert_install_res.emaid,
+                ],
+                Namespace.ISO_V2_MSG_DEF,
             )
-
-            elements_to_sign = [
-                contract_cert_tuple,
-                encrypted_priv_key_tuple,
-                dh_public_key_tuple,
-                emaid_tuple,
-            ]
             # The private key to be used for the signature
             signature_key = load_priv_key(
                 KeyPath.CPS_LEAF_PEM,
@@ -895,7 +882,7 @@ class CertificateInstallation(StateSECC):
                 KeyPasswordPath.CPS_LEAF_KEY_PASSWORD,
             )
 
-            signature = create_signature(elements_to_sign, signature_key)
+            signature = await create_signature_async(elements_to_sign, signature_key)
 
         except PrivateKeyReadError as exc:
             raise PrivateKeyReadError(
@@ -1133,6 +1120,32 @@ class Authorization(StateSECC):
         # only do the signature validation once
         self.signature_verified_once = False
         self.authorization_complete = False
+        # The CSMS's decision on the ID token, requested with the first
+        # AuthorizationReq
+        self.ocpp_authorization: Optional[asyncio.Task] = None
+
+    async def is_ocpp_authorized(self) -> bool:
+        """
+        Whether the CSMS accepted the ID token. Waits for the Authorize
+        response at most OCPP_AUTHORIZE_WAIT seconds, so a slow CSMS only
+        makes the SECC answer with EVSEProcessing Ongoing. The decision is
+        then taken into account with a later AuthorizationReq of the EV.
+        """
+        if self.ocpp_authorization is None:
+            self.ocpp_authorization = asyncio.create_task(
+                self.comm_session.ocpp_client.send_authorize()
+            )
+        await asyncio.wait(
+            {self.ocpp_authorization},
+            timeout=shared_settings.get(SettingKey.OCPP_AUTHORIZE_WAIT, 1.0),
+        )
+        if not self.ocpp_authorization.done():
+            return False
+        if self.ocpp_authorization.cancelled() or self.ocpp_authorization.exception():
+            logger.warning("OCPP authorization failed, requesting it again")
+            self.ocpp_authorization = None
+            return False
+        return self.ocpp_authorization.result()
 
     async def process_message(
         self,
@@ -1179,12 +1192,14 @@ class Authorization(StateSECC):
                     )
                     return
 
-                if not verify_signature(
+                if not await verify_signature_async(
                     signature=msg.header.signature,
                     elements_to_sign=[
                         (
                             authorization_req.id,
-                            EXI().to_exi(authorization_req, Namespace.ISO_V2_MSG_DEF),
+                            await EXI().to_exi_async(
+                                authorization_req, Namespace.ISO_V2_MSG_DEF
+                            ),
                         )
                     ],
                     leaf_cert=self.comm_session.contract_cert_chain.certificate,
@@ -1205,7 +1220,7 @@ class Authorization(StateSECC):
             else uuid.uuid4()
         )
         #Added by Tulio: To ask for the authorization from the OCPP server
-        is_ocpp_authorized = await self.comm_session.ocpp_client.send_authorize()
+        is_ocpp_authorized = await self.is_ocpp_authorized()
         
         # note that the certificate_chain and hashed_data are empty here
         # as they were already send previously in the PaymentDetails state
@@ -1321,6 +1336,43 @@ class ChargeParameterDiscovery(StateSECC):
     def __init__(self, comm_session: SECCCommunicationSession):
         super().__init__(comm_session, Timeouts.V2G_SECC_SEQUENCE_TIMEOUT)
         self.expecting_charge_parameter_discovery_req = True
+        self.ocpp_charging_profile: Optional[asyncio.Future] = None
+
+    async def get_ocpp_charging_profile(self, received_at: float) -> Optional[dict]:
+        """
+        The charging profile the CSMS sets in reply to the EV's charging
+        needs. Waits for it while the EV waits for the
+        ChargeParameterDiscoveryRes, keeping OCPP_CHARGING_PROFILE_MARGIN
+        seconds of the EV's timeout to answer, so a slow CSMS only makes the
+        SECC answer with EVSEProcessing Ongoing. The charging profile is then
+        offered with a later ChargeParameterDiscoveryReq of the EV.
+        """
+        if self.ocpp_charging_profile is None:
+            self.ocpp_charging_profile = (
+                self.comm_session.ocpp_client.request_charging_profile()
+            )
+        budget = (
+            TimeoutsV2.CHARGE_PARAMETER_DISCOVERY_REQ
+            - (time.monotonic() - received_at)
+            - shared_settings.get(SettingKey.OCPP_CHARGING_PROFILE_MARGIN, 0.5)
+        )
+        if budget > 0:
+            await asyncio.wait({self.ocpp_charging_profile}, timeout=budget)
+        if not self.ocpp_charging_profile.done():
+            return None
+        if (
+            self.ocpp_charging_profile.cancelled()
+            or self.ocpp_charging_profile.exception()
+        ):
+            logger.warning("OCPP charging profile request failed, requesting it again")
+            self.ocpp_charging_profile = None
+            return None
+        charging_profile = self.ocpp_charging_profile.result()
+        if charging_profile is None:
+            # No charging needs to send, e.g. the EV didn't give its energy
+            # request. Asked again with the EV's next request
+            self.ocpp_charging_profile = None
+        return charging_profile
 
     async def process_message(
         self,
@@ -1409,15 +1461,13 @@ class ChargeParameterDiscovery(StateSECC):
                                                     evMinCurrent=ev_data_context.rated_limits.ac_limits.min_charge_current,
                                                     evMaxCurrent=ev_data_context.rated_limits.ac_limits.max_charge_current,
                                                     evMaxVoltage=ev_data_context.rated_limits.ac_limits.max_voltage)
-        #await self.comm_session.ocpp_client.send_notify_ev_charging_needs()
-        send_needs_to_csms = asyncio.create_task(self.comm_session.ocpp_client.send_notify_ev_charging_needs())
-
-        if self.comm_session.ocpp_client.charging_profile: 
-            schedule_tuple = convert_ocpp_to_iso15118_schedule(self.comm_session.ocpp_client.charging_profile)
+        charging_profile = await self.get_ocpp_charging_profile(
+            self.comm_session.message_received_at
+        )
+        if charging_profile:
+            schedule_tuple = convert_ocpp_to_iso15118_schedule(charging_profile)
             self.comm_session.evse_controller.sa_schedule_list = [schedule_tuple]
             sa_schedule_list = [schedule_tuple]
-            #Reset the charging profile received be able to request a new charging profile
-            self.comm_session.ocpp_client.charging_profile = None 
         else:
             sa_schedule_list = None
         
@@ -1474,7 +1524,7 @@ class ChargeParameterDiscovery(StateSECC):
                     try:
                         element_to_sign = (
                             schedule.sales_tariff.id,
-                            EXI().to_exi(
+                            await EXI().to_exi_async(
                                 schedule.sales_tariff, Namespace.ISO_V2_MSG_DEF
                             ),
                         )
@@ -1483,7 +1533,9 @@ class ChargeParameterDiscovery(StateSECC):
                             KeyEncoding.PEM,
                             KeyPasswordPath.MO_SUB_CA2_PASSWORD,
                         )
-                        signature = create_signature([element_to_sign], signature_key)
+                        signature = await create_signature_async(
+                            [element_to_sign], signature_key
+                        )
                     except PrivateKeyReadError as exc:
                         logger.warning(
                             "Can't read private key to needed to create "
@@ -2043,12 +2095,14 @@ class MeteringReceipt(StateSECC):
                 "No contract certificate chain available to verify "
                 "signature of MeteringReceiptReq"
             )
-        elif not verify_signature(
+        elif not await verify_signature_async(
             msg.header.signature,
             [
                 (
                     metering_receipt_req.id,
-                    EXI().to_exi(metering_receipt_req, Namespace.ISO_V2_MSG_DEF),
+                    await EXI().to_exi_async(
+                        metering_receipt_req, Namespace.ISO_V2_MSG_DEF
+                    ),
                 )
             ],
             self.comm_session.contract_cert_chain.certificate,
@@ -2147,7 +2201,7 @@ class SessionStop(StateSECC):
         )
         
         self.comm_session.ocpp_client.transaction_id = self.comm_session.session_id
-        await self.comm_session.ocpp_client.send_transaction_event()
+        self.comm_session.ocpp_client.queue_transaction_event()
 
 
 # ============================================================================
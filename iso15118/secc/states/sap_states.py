@@ -87,7 +87,7 @@ class SupportedAppProtocol(StateSECC):
                         response_code=res, schema_id=protocol.schema_id
                     )
                     #Added by Tulio: OCPP message to update server
-                    await self.comm_session.ocpp_client.send_status_notification()
+                    self.comm_session.ocpp_client.queue_status_notification()
                     break
 
                 if (
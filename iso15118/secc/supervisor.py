@@ -0,0 +1,344 @@
+"""
+Runs the SECC for many EVSEs on several CPU cores.
+
+The supervisor distributes the EVSEs over a number of worker processes,
+each of which serves its share of EVSEs with a MultiEVSESECCHandler in an
+event loop of its own. As every EVSE is served by exactly one worker, the
+SDP server of an EVSE and the TCP servers its SDP responses point to are
+always in the same process. The supervisor restarts crashed workers and
+gathers the metrics the workers report.
+
+Start it with
+    python -m iso15118.secc.supervisor [--workers N] [--exi-codec-service]
+                                       [SDP_PORT ...]
+The EVSEs are the given SDP ports on NETWORK_INTERFACE or, without any,
+the ones configured with SECC_EVSES.
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+import time
+from multiprocessing.context import BaseContext
+from typing import Callable, Dict, List, Optional
+
+from iso15118.secc import MultiEVSESECCHandler
+from iso15118.secc.controller.simulator import SimEVSEController
+from iso15118.secc.secc_settings import Config, EVSEConfig
+from iso15118.shared.event_loop import use_event_loop
+from iso15118.shared.exi_codec import EXI, create_exi_codec
+from iso15118.shared.exi_codec_service import start_exi_codec_service
+from iso15118.shared.security import get_tls_handshake_stats
+from iso15118.shared.settings import SettingKey, shared_settings
+from iso15118.shared.utils import wait_for_tasks
+
+logger = logging.getLogger(__name__)
+
+# The longest time a crashing worker waits to be restarted
+MAX_RESTART_DELAY = 30.0
+# A worker running at least this long restarts without delay after a crash
+STABLE_WORKER_SECONDS = 60.0
+
+
+def shard_evses(evses: List[EVSEConfig], workers: int) -> List[List[EVSEConfig]]:
+    """
+    Distributes the EVSEs over at most the given number of workers, as
+    evenly as possible
+    """
+    workers = max(1, min(workers, len(evses)))
+    return [evses[worker_id::workers] for worker_id in range(workers)]
+
+
+def collect_worker_metrics(
+    worker_id: int, multi_evse_handler: MultiEVSESECCHandler
+) -> dict:
+    handlers = multi_evse_handler.handlers.values()
+    return {
+        "worker": worker_id,
+        "pid": os.getpid(),
+        "time": time.time(),
+        "evses": len(multi_evse_handler.evse_controllers),
+        "sessions": sum(len(handler.comm_sessions) for handler in handlers),
+        "notifications": {
+            f"{evse.iface}:{evse.sdp_port}": handler.notification_dispatcher.stats()
+            for evse, handler in multi_evse_handler.handlers.items()
+        },
+        "ocpp_outbox": {
+            f"{evse.iface}:{evse.sdp_port}": handler.ocpp_client.outbox.stats()
+            for evse, handler in multi_evse_handler.handlers.items()
+            if hasattr(handler, "ocpp_client")
+        },
+        "csms": {
+            f"{evse.iface}:{evse.sdp_port}": handler.ocpp_client.csms.stats()
+            for evse, handler in multi_evse_handler.handlers.items()
+            if hasattr(handler, "ocpp_client")
+        },
+        "exi_encode_cache": EXI().get_encode_cache().stats(),
+        "exi_decode_cache": EXI().get_decode_cache().stats(),
+        "tls_handshakes": get_tls_handshake_stats(True).stats(),
+    }
+
+
+async def _report_metrics(
+    worker_id: int,
+    multi_evse_handler: MultiEVSESECCHandler,
+    metrics_queue: multiprocessing.Queue,
+    interval: float,
+):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            metrics_queue.put_nowait(
+                collect_worker_metrics(worker_id, multi_evse_handler)
+            )
+        except queue.Full:
+            logger.warning("Metrics queue full, dropped the worker metrics")
+
+
+async def _serve_evses(
+    worker_id: int,
+    config: Config,
+    evses: List[EVSEConfig],
+    metrics_queue: multiprocessing.Queue,
+    metrics_interval: float,
+):
+    config.evses = evses
+    multi_evse_handler = MultiEVSESECCHandler(
+        exi_codec=create_exi_codec(),
+        evse_controllers={evse: SimEVSEController() for evse in evses},
+        config=config,
+    )
+    await wait_for_tasks(
+        [
+            multi_evse_handler.start(),
+            _report_metrics(
+                worker_id, multi_evse_handler, metrics_queue, metrics_interval
+            ),
+        ]
+    )
+
+
+def run_worker(
+    worker_id: int,
+    evses: List[EVSEConfig],
+    metrics_queue: multiprocessing.Queue,
+    metrics_interval: float,
+):
+    """The entry point of a worker process"""
+    config = Config()
+    config.load_envs()
+    use_event_loop(config.event_loop)
+    try:
+        asyncio.run(
+            _serve_evses(worker_id, config, evses, metrics_queue, metrics_interval)
+        )
+    except KeyboardInterrupt:
+        logger.debug(f"SECC worker {worker_id} terminated manually")
+
+
+class SECCSupervisor:
+    """
+    Starts one worker process per shard of EVSEs and keeps them running.
+
+    Workers are started with the 'spawn' method, so none of them inherits
+    the supervisor's state (such as threads of an EXI codec) and a crashed
+    worker is replaced by a clean process. A worker that keeps crashing is
+    restarted with an exponentially increasing delay.
+    """
+
+    def __init__(
+        self,
+        evses: List[EVSEConfig],
+        workers: int,
+        metrics_interval: float = 10.0,
+        restart_delay: float = 1.0,
+        worker_target: Callable = run_worker,
+        context: Optional[BaseContext] = None,
+    ):
+        self.shards = shard_evses(evses, workers)
+        self.metrics_interval = metrics_interval
+        self.restart_delay = restart_delay
+        self.worker_target = worker_target
+        self._context = context or multiprocessing.get_context("spawn")
+        self.metrics_queue = self._context.Queue()
+        self.processes: Dict[int, multiprocessing.process.BaseProcess] = {}
+        self.started_at: Dict[int, float] = {}
+        self.restarts: Dict[int, int] = {worker_id: 0 for worker_id in self.workers}
+        self._crashes: Dict[int, int] = {worker_id: 0 for worker_id in self.workers}
+        self._restart_at: Dict[int, float] = {}
+        # The latest metrics each worker reported
+        self.metrics: Dict[int, dict] = {}
+
+    @property
+    def workers(self) -> range:
+        return range(len(self.shards))
+
+    def start_worker(self, worker_id: int):
+        process = self._context.Process(
+            target=self.worker_target,
+            args=(
+                worker_id,
+                self.shards[worker_id],
+                self.metrics_queue,
+                self.metrics_interval,
+            ),
+            name=f"secc-worker-{worker_id}",
+            daemon=True,
+        )
+        process.start()
+        self.processes[worker_id] = process
+        self.started_at[worker_id] = time.monotonic()
+        logger.info(
+            f"Started SECC worker {worker_id} (pid {process.pid}) for EVSEs "
+            f"{[(evse.iface, evse.sdp_port) for evse in self.shards[worker_id]]}"
+        )
+
+    def check_workers(self):
+        """Schedules the restart of crashed workers and restarts the due ones"""
+        now = time.monotonic()
+        for worker_id, process in self.processes.items():
+            if process.is_alive() or worker_id in self._restart_at:
+                continue
+            if now - self.started_at[worker_id] >= STABLE_WORKER_SECONDS:
+                self._crashes[worker_id] = 0
+            delay = min(
+                self.restart_delay * 2 ** self._crashes[worker_id], MAX_RESTART_DELAY
+            )
+            self._crashes[worker_id] += 1
+            self._restart_at[worker_id] = now + delay
+            logger.error(
+                f"SECC worker {worker_id} (pid {process.pid}) exited with code "
+                f"{process.exitcode}, restarting it in {delay:.1f} s"
+            )
+
+        for worker_id, restart_at in list(self._restart_at.items()):
+            if restart_at <= now:
+                del self._restart_at[worker_id]
+                self.restarts[worker_id] += 1
+                self.start_worker(worker_id)
+
+    def gather_metrics(self, timeout: float) -> int:
+        """
+        Stores the metrics the workers reported, waiting up to timeout for
+        the first, and returns how many were received
+        """
+        received = 0
+        try:
+            while True:
+                if received:
+                    metrics = self.metrics_queue.get_nowait()
+                else:
+                    metrics = self.metrics_queue.get(timeout=timeout)
+                metrics["restarts"] = self.restarts[metrics["worker"]]
+                self.metrics[metrics["worker"]] = metrics
+                received += 1
+        except queue.Empty:
+            return received
+
+    def summary(self) -> dict:
+        """The metrics of all workers, summed up"""
+        return {
+            "workers": len(self.shards),
+            "alive": sum(process.is_alive() for process in self.processes.values()),
+            "restarts": sum(self.restarts.values()),
+            "evses": sum(len(shard) for shard in self.shards),
+            "sessions": sum(metrics["sessions"] for metrics in self.metrics.values()),
+            "queued_notifications": sum(
+                stats["queued"]
+                for metrics in self.metrics.values()
+                for stats in metrics.get("notifications", {}).values()
+            ),
+            "queued_ocpp_requests": sum(
+                stats["queued"]
+                for metrics in self.metrics.values()
+                for stats in metrics.get("ocpp_outbox", {}).values()
+            ),
+            "csms_disconnected": sum(
+                stats["endpoint"] is None
+                for metrics in self.metrics.values()
+                for stats in metrics.get("csms", {}).values()
+            ),
+            "csms_failovers": sum(
+                stats["failovers"]
+                for metrics in self.metrics.values()
+                for stats in metrics.get("csms", {}).values()
+            ),
+        }
+
+    def run(self):
+        for worker_id in self.workers:
+            self.start_worker(worker_id)
+        next_summary = time.monotonic() + self.metrics_interval
+        try:
+            while True:
+                self.gather_metrics(timeout=1.0)
+                self.check_workers()
+                if time.monotonic() >= next_summary:
+                    logger.info(f"SECC workers: {self.summary()}")
+                    next_summary += self.metrics_interval
+        finally:
+            self.stop()
+
+    def stop(self):
+        for process in self.processes.values():
+            if process.is_alive():
+                process.terminate()
+        for process in self.processes.values():
+            process.join(timeout=5)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Runs the SECC for many EVSEs in several worker processes"
+    )
+    parser.add_argument(
+        "sdp_ports", nargs="*", type=int, help="SDP port of each EVSE to serve"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of worker processes (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--metrics-interval",
+        type=float,
+        default=10.0,
+        help="Seconds between two metrics reports of a worker",
+    )
+    parser.add_argument(
+        "--exi-codec-service",
+        action="store_true",
+        help="Start a shared EXI codec service for all workers",
+    )
+    args = parser.parse_args()
+
+    config = Config()
+    config.load_envs()
+    evses = config.evses
+    if args.sdp_ports:
+        evses = [EVSEConfig(config.iface, sdp_port) for sdp_port in args.sdp_ports]
+
+    exi_codec_service = None
+    if args.exi_codec_service:
+        # The workers read their settings from the environment
+        os.environ["EXI_CODEC"] = "service"
+        socket_path = shared_settings[SettingKey.EXI_CODEC_SOCKET]
+        os.environ["EXI_CODEC_SOCKET"] = socket_path
+        exi_codec_service = start_exi_codec_service(socket_path)
+
+    supervisor = SECCSupervisor(evses, args.workers, args.metrics_interval)
+    try:
+        supervisor.run()
+    except KeyboardInterrupt:
+        logger.debug("SECC supervisor terminated manually")
+    finally:
+        if exi_codec_service:
+            exi_codec_service.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,12 @@
 import asyncio
 import logging
 import socket
+from ssl import SSLContext
 from typing import Optional, Tuple
 
 from iso15118.shared.network import get_link_local_full_addr, get_tcp_port
 from iso15118.shared.notifications import TCPClientNotification
-from iso15118.shared.security import get_ssl_context
+from iso15118.shared.security import get_ssl_context, record_tls_handshake
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +21,8 @@ class TCPServer(asyncio.Protocol):
     # The 'host' component of the full IPv6Address tuple
     # (host, port, flowinfo, scope_id)
     ipv6_address_host: str
+    # The host address in numeric format, as sent in the SDP response
+    ipv6_address_bytes: bytes
 
     def __init__(self, session_handler_queue: asyncio.Queue, iface: str) -> None:
         self._session_handler_queue: asyncio.Queue = session_handler_queue
@@ -28,6 +31,8 @@ class TCPServer(asyncio.Protocol):
         self.iface: str = iface
         self.server: Optional[asyncio.Server] = None
         self.is_tls_enabled: bool = False
+        # The SSL context the server was started with, if any
+        self.ssl_context: Optional[SSLContext] = None
 
     async def start_tls(self, ready_event: asyncio.Event):
         """
@@ -71,18 +76,8 @@ class TCPServer(asyncio.Protocol):
         Args:
             tls (bool): flag to decide either to use tls encryption or not
         """
-        ssl_context = None
-        server_type = "TCP"
-        self.is_tls_enabled = False
-        if tls:
-            ssl_context = get_ssl_context(True)
-            if ssl_context is not None:
-                server_type = "TLS"
-                self.is_tls_enabled = True
-            else:
-                logger.warning(
-                    "SSL context not created. Falling back to TCP connection."
-                )
+        server_type = self._load_ssl_context(tls)
+        ssl_context = self.ssl_context
 
         MAX_RETRIES: int = 3
         BACK_OFF_SECONDS: float = 0.5
@@ -103,6 +98,10 @@ class TCPServer(asyncio.Protocol):
                 self.port, self.iface
             )
             self.ipv6_address_host = self.full_ipv6_address[0]
+            # Convert IPv6 address from presentation to numeric format
+            self.ipv6_address_bytes = socket.inet_pton(
+                socket.AF_INET6, self.ipv6_address_host
+            )
 
             # Bind the socket to the IP address and port for receiving
             # TCP packets
@@ -150,6 +149,27 @@ class TCPServer(asyncio.Protocol):
             self.server.close()
             await self.server.wait_closed()
 
+    def _load_ssl_context(self, tls: bool) -> str:
+        """
+        Sets the SSL context the server is started with, falling back to
+        plain TCP if no SSL context can be created, and returns the server
+        type ("TLS" or "TCP")
+        """
+        ssl_context = None
+        server_type = "TCP"
+        self.is_tls_enabled = False
+        if tls:
+            ssl_context = get_ssl_context(True)
+            if ssl_context is not None:
+                server_type = "TLS"
+                self.is_tls_enabled = True
+            else:
+                logger.warning(
+                    "SSL context not created. Falling back to TCP connection."
+                )
+        self.ssl_context = ssl_context
+        return server_type
+
     async def __call__(
         self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
     ) -> None:
@@ -157,6 +177,7 @@ class TCPServer(asyncio.Protocol):
         Callback for a new socket connection with the server.
         It provides a streamReader and a streamWriter
         """
+        record_tls_handshake(writer.get_extra_info("ssl_object"), True)
         new_client = TCPClientNotification(reader, writer)
 
         self._session_handler_queue.put_nowait(new_client)
@@ -2,7 +2,9 @@ import asyncio
 import logging
 import socket
 import struct
+import time
 from asyncio import DatagramTransport
+from collections import OrderedDict
 from sys import platform
 from typing import Optional, Tuple
 from random import randint
@@ -17,10 +19,91 @@ from iso15118.shared.notifications import (
     ReceiveTimeoutNotification,
     UDPPacketNotification,
 )
+from iso15118.shared.settings import SettingKey, shared_settings
 from iso15118.shared.utils import wait_for_tasks
 
 logger = logging.getLogger(__name__)
 
+# The number of EVCCs whose latest datagrams the SDP request filter tracks
+MAX_SDP_SOURCES = 1024
+
+
+class _SDPSource:
+    __slots__ = ("last_data", "last_at", "tokens", "refilled_at")
+
+    def __init__(self, tokens: float, now: float):
+        self.last_data: Optional[bytes] = None
+        self.last_at = 0.0
+        self.tokens = tokens
+        self.refilled_at = now
+
+
+class SDPRequestFilter:
+    """
+    Decides which datagrams the UDP server passes on, so an SDP storm (e.g.
+    the retries of many EVCCs on a shared PLC segment) doesn't flood the
+    session handler.
+
+    Per source address, a datagram identical to the previous one within
+    duplicate_window seconds is dropped. Beyond that, a token bucket lets
+    through up to burst datagrams at once and rate datagrams per second
+    after that (no limit if rate is 0).
+    """
+
+    def __init__(
+        self,
+        duplicate_window: float,
+        rate: float,
+        burst: int,
+        max_sources: int = MAX_SDP_SOURCES,
+    ):
+        self.duplicate_window = duplicate_window
+        self.rate = rate
+        self.burst = burst
+        self.max_sources = max_sources
+        # The least recently seen sources come first
+        self._sources: "OrderedDict[str, _SDPSource]" = OrderedDict()
+        self.admitted = 0
+        self.duplicates = 0
+        self.rate_limited = 0
+
+    def admit(self, data: bytes, host: str, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        source = self._sources.get(host)
+        if source is None:
+            source = self._sources[host] = _SDPSource(self.burst, now)
+            if len(self._sources) > self.max_sources:
+                self._sources.popitem(last=False)
+        else:
+            self._sources.move_to_end(host)
+
+        if data == source.last_data and now - source.last_at < self.duplicate_window:
+            self.duplicates += 1
+            return False
+
+        if self.rate:
+            source.tokens = min(
+                self.burst, source.tokens + (now - source.refilled_at) * self.rate
+            )
+            source.refilled_at = now
+            if source.tokens < 1:
+                self.rate_limited += 1
+                return False
+            source.tokens -= 1
+
+        source.last_data = data
+        source.last_at = now
+        self.admitted += 1
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "sources": len(self._sources),
+            "admitted": self.admitted,
+            "duplicates": self.duplicates,
+            "rate_limited": self.rate_limited,
+        }
+
 
 class UDPServer(asyncio.DatagramProtocol):
     """
@@ -47,6 +130,11 @@ class UDPServer(asyncio.DatagramProtocol):
         self._transport: Optional[DatagramTransport] = None
         self.pause_server: bool = False
         self.secc_sdp_port = SDP_SERVER_PORT if not secc_custom_sdp_port else secc_custom_sdp_port
+        self.request_filter = SDPRequestFilter(
+            shared_settings.get(SettingKey.SDP_DUPLICATE_WINDOW, 0.1),
+            shared_settings.get(SettingKey.SDP_REQUEST_RATE, 10.0),
+            shared_settings.get(SettingKey.SDP_REQUEST_BURST, 5),
+        )
 
     @staticmethod
     async def _create_socket(iface: str, secc_custom_sdp_port:int = None) -> socket.socket:
@@ -158,6 +246,10 @@ class UDPServer(asyncio.DatagramProtocol):
             """
             return
 
+        if not self.request_filter.admit(data, addr[0]):
+            logger.debug(f"Dropped repeated datagram from {addr}")
+            return
+
         logger.debug(f"Message received from {addr}: {data.hex()}")
         try:
             udp_packet = UDPPacketNotification(bytearray(data), addr)
@@ -193,7 +285,11 @@ class UDPServer(asyncio.DatagramProtocol):
         This method will send the payload over the UDP socket and store the
         name of the last message sent for debugging purposes.
         """
-        self._transport.sendto(message.to_bytes(), addr)
+        self.send_bytes(message.to_bytes(), addr)
+
+    def send_bytes(self, data: bytes, addr: Tuple[str, int]):
+        """Sends an already encoded V2GTP message, e.g. a cached SDP response"""
+        self._transport.sendto(data, addr)
 
     def pause_udp_server(self):
         """
@@ -0,0 +1,92 @@
+import asyncio
+import csv
+import logging
+import threading
+from collections import deque
+from typing import Any, Deque, List, Sequence
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+
+class BenchmarkRecorder:
+    """
+    Collects the rows of a benchmark CSV file without blocking the event
+    loop the measured messages are exchanged on.
+
+    record() only appends the row to a ring buffer holding up to
+    buffer_size rows, dropping the oldest ones if the buffer is full. run()
+    writes the buffered rows to the file in batches every flush_interval
+    seconds, in a worker thread, and samples the CPU and memory usage of the
+    host at the same cadence, instead of with every row.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        header: Sequence[str],
+        buffer_size: int = 10000,
+        flush_interval: float = 1.0,
+    ):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._rows: Deque[Sequence[Any]] = deque(maxlen=buffer_size)
+        self._write_lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+        self.cpu_usage = 0.0
+        self.memory_usage = 0.0
+        # Also starts the measurement of the CPU usage until the next sample
+        self.sample_resources()
+        with open(self.path, mode="w", newline="") as file:
+            csv.writer(file).writerow(header)
+
+    def record(self, row: Sequence[Any]):
+        if len(self._rows) == self._rows.maxlen:
+            self.dropped += 1
+        self._rows.append(row)
+
+    def sample_resources(self):
+        self.cpu_usage = psutil.cpu_percent()
+        self.memory_usage = psutil.virtual_memory().percent
+
+    def flush(self):
+        """Writes the buffered rows, blocking until they are written"""
+        self._write(self._take_rows())
+
+    async def run(self):
+        """Samples the resources and flushes the rows until cancelled"""
+        try:
+            while True:
+                await asyncio.sleep(self.flush_interval)
+                self.sample_resources()
+                await asyncio.to_thread(self._write, self._take_rows())
+        finally:
+            self.flush()
+
+    def _take_rows(self) -> List[Sequence[Any]]:
+        rows = list(self._rows)
+        self._rows.clear()
+        return rows
+
+    def _write(self, rows: List[Sequence[Any]]):
+        if not rows:
+            return
+        with self._write_lock:
+            try:
+                with open(self.path, mode="a", newline="") as file:
+                    csv.writer(file).writerows(rows)
+            except OSError as exc:
+                logger.warning(
+                    f"Could not write {len(rows)} rows to {self.path}: {exc}"
+                )
+                return
+            self.written += len(rows)
+
+    def stats(self) -> dict:
+        return {
+            "buffered": len(self._rows),
+            "written": self.written,
+            "dropped": self.dropped,
+        }
@@ -8,6 +8,7 @@ receiving, and processing messages during an ISO 15118 communication session.
 import asyncio
 import gc
 import logging
+import time
 from abc import ABC, abstractmethod
 from asyncio.streams import StreamReader, StreamWriter
 from typing import List, Optional, Tuple, Type, Union
@@ -51,8 +52,10 @@ from iso15118.shared.messages.iso15118_20.common_types import (
 )
 from iso15118.shared.messages.v2gtp import V2GTPMessage
 from iso15118.shared.notifications import StopNotification
+from iso15118.shared.settings import SettingKey, shared_settings
 from iso15118.shared.states import Pause, State, Terminate
 from iso15118.shared.utils import wait_for_tasks
+from iso15118.shared.v2gtp_reader import V2GTPFrame, V2GTPStreamReader
 
 #Added by Tulio Soares
 #from iso15118.shared.ocpp_client import ChargePoint
@@ -115,6 +118,9 @@ class SessionStateMachine(ABC):
         self.start_state = start_state
         self.comm_session = comm_session
         self.current_state = start_state(comm_session)
+        # The time.monotonic() at which the message being processed arrived,
+        # e.g. to tell how much of the peer's timeout is left to answer it
+        self.message_received_at: float = 0.0
         self.v20_payload_type_to_namespace = {
             ISOV20PayloadTypes.AC_MAINSTREAM: Namespace.ISO_V20_AC,
             ISOV20PayloadTypes.DC_MAINSTREAM: Namespace.ISO_V20_DC,
@@ -151,7 +157,7 @@ class SessionStateMachine(ABC):
                 )
         return Namespace.ISO_V20_COMMON_MSG
 
-    async def process_message(self, message: bytes):
+    async def process_message(self, message: Union[bytes, V2GTPFrame]):
         """
         The following steps are conducted in this state machine's general
         process_message() function:
@@ -169,10 +175,16 @@ class SessionStateMachine(ABC):
            will always send a next response, even if the next state is Terminate.
            The next state to transition to is also determined by the state's
            process_message() method.
+        4. EXI encode the next message created in step 3, if any.
+
+        Both the EXI decoding in step 2 and the EXI encoding in step 4 run on
+        the EXI codec executor, so a slow codec call doesn't block the event
+        loop.
 
         Args:
             message:    The incoming message from the EVCC/SECC, given as a
-                        bytearray (the payload of a V2GTPMessage).
+                        bytearray (a complete V2GTPMessage) or as the
+                        V2GTPFrame read by the V2GTPStreamReader.
                         The message can be a
                         - SupportedAppProtocolRequest  (EVCC),
                         - SupportedAppProtocolResponse (SECC),
@@ -182,13 +194,22 @@ class SessionStateMachine(ABC):
 
         Raises:
             InvalidV2GTPMessageError, FaultyStateImplementationError,
-            EXIDecodingError
+            EXIDecodingError, EXIEncodingError
         """
         # Step 1
         try:
             # First extract the V2GMessage payload from the V2GTPMessage ...
             # and then decode the bytearray into the message
-            v2gtp_msg = V2GTPMessage.from_bytes(self.comm_session.protocol, message)
+            if isinstance(message, V2GTPFrame):
+                self.message_received_at = message.received_at
+                v2gtp_msg = V2GTPMessage.from_frame(
+                    self.comm_session.protocol, message.header, message.payload
+                )
+            else:
+                self.message_received_at = time.monotonic()
+                v2gtp_msg = V2GTPMessage.from_bytes(
+                    self.comm_session.protocol, message
+                )
         except InvalidV2GTPMessageError as exc:
             logger.exception("Incoming TCPPacket is not a valid V2GTPMessage")
             raise exc
@@ -203,7 +224,7 @@ class SessionStateMachine(ABC):
             None,
         ] = None
         try:
-            decoded_message = EXI().from_exi(
+            decoded_message = await EXI().from_exi_async(
                 v2gtp_msg.payload, self.get_exi_ns(v2gtp_msg.payload_type)
             )
 
@@ -255,6 +276,9 @@ class SessionStateMachine(ABC):
             logger.exception(f"{exc}")
             raise exc
 
+        # Step 4
+        await self.current_state.encode_next_message()
+
         if (
             self.current_state.next_v2gtp_msg is None
             and self.current_state.next_state is not Terminate
@@ -318,6 +342,10 @@ class V2GCommunicationSession(SessionStateMachine):
         """
         self.protocol: Protocol = Protocol.UNKNOWN
         self.reader, self.writer = transport
+        self.frame_reader = V2GTPStreamReader(
+            self.reader,
+            shared_settings.get(SettingKey.V2GTP_MAX_PAYLOAD_LENGTH, 131072),
+        )
         # For timeout, termination, and pausing notifications
         self.session_handler_queue = session_handler_queue
         self.peer_name = self.writer.get_extra_info("peername")
@@ -346,6 +374,8 @@ class V2GCommunicationSession(SessionStateMachine):
         # or due to a failure (False), plus additional info regarding the reason behind.
         self.stop_reason: Optional[StopNotification] = None
         self.last_message_sent: Optional[V2GTPMessage] = None
+        # The teardown scheduled once the session stopped (see stop())
+        self.teardown: Optional[asyncio.Task] = None
         self._started: bool = True
         
         # Create a ChargePoint instance without a WebSocket connection initially
@@ -381,11 +411,18 @@ class V2GCommunicationSession(SessionStateMachine):
             evse_controller = self.comm_session.evse_controller
             await evse_controller.set_present_protocol_state(state)
 
-    async def stop(self, reason: str):
+    async def stop(self, reason: str) -> asyncio.Task:
         """
-        Closes the TCP connection after 5 seconds and terminates or pauses the
-        data link for this V2GCommunicationSession object after 2 seconds to
-        make sure any message that needs to be sent can still go through.
+        Schedules the teardown of this V2GCommunicationSession and returns the
+        task running it, without waiting for the teardown to finish. This way,
+        the session handler can serve the next SDP request and TCP client
+        straight away.
+
+        The teardown terminates or pauses the data link after
+        SESSION_STOP_DATA_LINK_DELAY seconds (2 s by default) and closes the
+        TCP connection SESSION_STOP_TCP_CLOSE_DELAY seconds later (3 s by
+        default) to make sure any message that needs to be sent can still go
+        through.
         TODO check if that really makes sense of if TCP should be terminated
              after 2 s and the data link after 5 s
 
@@ -396,36 +433,83 @@ class V2GCommunicationSession(SessionStateMachine):
         Not a formal requirement in ISO 15118-2, but a best practice decided
         within the ISO 15118 User Group, and it became a formal requirement in
         ISO 15118-20 (at least for the SECC side, see [V2G20-1633]).
+
+        Cancelling the teardown, e.g. because the next communication session
+        already started, skips the remaining delays and closes the TCP
+        connection right away, without signalling the data link anymore.
         """
+        if self.teardown is not None:
+            return self.teardown
+
         if self.current_state.next_state == Pause:
             self.save_session_info()
             terminate_or_pause = SessionStopAction.PAUSE
         else:
             terminate_or_pause = SessionStopAction.TERMINATE
 
+        data_link_delay = shared_settings.get(
+            SettingKey.SESSION_STOP_DATA_LINK_DELAY, 2.0
+        )
+        tcp_close_delay = shared_settings.get(
+            SettingKey.SESSION_STOP_TCP_CLOSE_DELAY, 3.0
+        )
         logger.info(
-            f"The data link will {terminate_or_pause} in 2 seconds and "
-            "the TCP connection will close in 5 seconds. "
+            f"The data link will {terminate_or_pause} in {data_link_delay} "
+            "seconds and the TCP connection will close in "
+            f"{data_link_delay + tcp_close_delay} seconds. "
         )
         logger.info(f"Reason: {reason}")
 
-        await asyncio.sleep(2)
-        # Signal data link layer to either terminate or pause the data
-        # link connection
-        if hasattr(self.comm_session, "evse_controller"):
-            evse_controller = self.comm_session.evse_controller
-            await evse_controller.update_data_link(terminate_or_pause)
-            await evse_controller.session_ended(str(self.current_state), reason)
-        elif hasattr(self.comm_session, "ev_controller"):
-            await self.comm_session.ev_controller.enable_charging(False)
-        logger.info(f"{terminate_or_pause}d the data link")
-        await asyncio.sleep(3)
+        self.teardown = asyncio.create_task(
+            self._teardown(terminate_or_pause, reason, data_link_delay, tcp_close_delay)
+        )
+        return self.teardown
+
+    async def _teardown(
+        self,
+        terminate_or_pause: SessionStopAction,
+        reason: str,
+        data_link_delay: float,
+        tcp_close_delay: float,
+    ):
+        session_ended_notified = False
         try:
-            self.writer.close()
-            await self.writer.wait_closed()
-        except (asyncio.TimeoutError, ConnectionResetError) as exc:
-            logger.info(str(exc))
-        logger.info("TCP connection closed to peer with address " f"{self.peer_name}")
+            await asyncio.sleep(data_link_delay)
+            # Signal data link layer to either terminate or pause the data
+            # link connection
+            try:
+                if hasattr(self.comm_session, "evse_controller"):
+                    evse_controller = self.comm_session.evse_controller
+                    await evse_controller.update_data_link(terminate_or_pause)
+                    session_ended_notified = True
+                    await evse_controller.session_ended(str(self.current_state), reason)
+                elif hasattr(self.comm_session, "ev_controller"):
+                    await self.comm_session.ev_controller.enable_charging(False)
+                logger.info(f"{terminate_or_pause}d the data link")
+            except Exception as exc:
+                logger.warning(f"Failed to {terminate_or_pause} the data link: {exc}")
+            await asyncio.sleep(tcp_close_delay)
+        finally:
+            if not session_ended_notified and hasattr(
+                self.comm_session, "evse_controller"
+            ):
+                # E.g. the teardown was cancelled as the next EV connected. The
+                # data link is left alone, but the session did end
+                try:
+                    await self.comm_session.evse_controller.session_ended(
+                        str(self.current_state), reason
+                    )
+                except Exception as exc:
+                    logger.warning(f"Failed to notify the end of the session: {exc}")
+            await self.frame_reader.stop()
+            try:
+                self.writer.close()
+                await self.writer.wait_closed()
+            except (asyncio.TimeoutError, ConnectionResetError) as exc:
+                logger.info(str(exc))
+            logger.info(
+                "TCP connection closed to peer with address " f"{self.peer_name}"
+            )
 
     async def send(self, message: V2GTPMessage):
         """
@@ -458,11 +542,12 @@ class V2GCommunicationSession(SessionStateMachine):
         """
         while True:
             try:
-                # The biggest message is the Certificate Installation Response,
-                # which is estimated to be maximum between 5k to 6k
-                # TODO check if that still holds with -20 (e.g. cross certs)
-                message = await asyncio.wait_for(self.reader.read(7000), timeout)
-                if message == b"" and self.reader.at_eof():
+                # Exactly one V2GTP message, however the peer's TCP stack
+                # split or merged the segments carrying it
+                message = await asyncio.wait_for(
+                    self.frame_reader.read_frame(), timeout
+                )
+                if message is None:
                     stop_reason: str = "TCP peer closed connection"
                     await self.stop(reason=stop_reason)
                     self.session_handler_queue.put_nowait(
@@ -473,7 +558,12 @@ class V2GCommunicationSession(SessionStateMachine):
                         )
                     )
                     return
-            except (asyncio.TimeoutError, ConnectionResetError) as exc:
+            except (
+                asyncio.TimeoutError,
+                # E.g. ConnectionResetError or ssl.SSLError
+                OSError,
+                InvalidV2GTPMessageError,
+            ) as exc:
                 if type(exc) is asyncio.TimeoutError:
                     if self.last_message_sent:
                         error_msg = (
@@ -0,0 +1,212 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# The weight of the latest round trip time in an endpoint's mean
+RTT_SMOOTHING = 0.2
+
+
+class CSMSEndpoint:
+    """A CSMS node the charging station can connect to, and its health"""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        # Exponentially weighted mean of the connection setup and call round
+        # trip times, None until connected once
+        self.rtt: Optional[float] = None
+        # Failed connection attempts and lost connections since the last
+        # successful connection
+        self.failures = 0
+        self.next_attempt_at = 0.0
+
+    def __str__(self) -> str:
+        return f"{self.host}:{self.port}"
+
+    @classmethod
+    def parse(cls, endpoint: str) -> "CSMSEndpoint":
+        """Parses "host:port" """
+        host, _, port = endpoint.strip().rpartition(":")
+        return cls(host, int(port))
+
+    def record_round_trip(self, rtt: float):
+        if self.rtt is None:
+            self.rtt = rtt
+        else:
+            self.rtt += RTT_SMOOTHING * (rtt - self.rtt)
+
+    def score(self) -> Tuple[int, bool, float]:
+        """
+        Sorts the endpoints that failed least often first, preferring the
+        ones that answered recently and fast over the ones never tried
+        """
+        return self.failures, self.rtt is None, self.rtt or 0.0
+
+    def stats(self) -> dict:
+        return {
+            "rtt_ms": None if self.rtt is None else self.rtt * 1000,
+            "failures": self.failures,
+        }
+
+
+class CSMSConnectionManager:
+    """
+    Connects the charging station to the healthiest of the configured CSMS
+    endpoints.
+
+    connect() tries up to parallel_connects endpoints at the same time, in
+    the order of their score, and returns the first connection established
+    within connect_timeout seconds. An endpoint failing to connect, or
+    losing its connection, is only tried again after a backoff growing
+    exponentially with its failures from backoff_base up to backoff_max
+    seconds, with full jitter so that the charging stations of a failed
+    CSMS node don't reconnect all at once. Meanwhile the other endpoints are
+    tried right away, making the failover to another CSMS node fast.
+    """
+
+    def __init__(
+        self,
+        endpoints: Sequence[CSMSEndpoint],
+        open_connection: Callable[[CSMSEndpoint], Awaitable[Any]],
+        parallel_connects: int = 3,
+        connect_timeout: float = 5.0,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+    ):
+        if not endpoints:
+            raise ValueError("At least one CSMS endpoint is needed")
+        self.endpoints = list(endpoints)
+        self._open_connection = open_connection
+        self.parallel_connects = parallel_connects
+        self.connect_timeout = connect_timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.current: Optional[CSMSEndpoint] = None
+        self._previous: Optional[CSMSEndpoint] = None
+        self.connects = 0
+        self.failovers = 0
+        self.last_reconnect_seconds: Optional[float] = None
+        self._disconnected_at: Optional[float] = None
+
+    async def connect(self) -> Tuple[CSMSEndpoint, Any]:
+        """Returns the endpoint connected to and its connection"""
+        while True:
+            now = time.monotonic()
+            candidates = sorted(
+                (
+                    endpoint
+                    for endpoint in self.endpoints
+                    if endpoint.next_attempt_at <= now
+                ),
+                key=CSMSEndpoint.score,
+            )
+            if not candidates:
+                next_attempt_at = min(
+                    endpoint.next_attempt_at for endpoint in self.endpoints
+                )
+                await asyncio.sleep(next_attempt_at - now)
+                continue
+            connected = await self._race(candidates[: self.parallel_connects])
+            if connected:
+                self._connected(connected[0])
+                return connected
+
+    def disconnected(self):
+        """To be called once the connection to the current endpoint is lost"""
+        if self.current is None:
+            return
+        logger.warning(f"Lost connection to CSMS {self.current}")
+        self._failed(self.current)
+        self._previous = self.current
+        self.current = None
+        self._disconnected_at = time.monotonic()
+
+    def record_round_trip(self, rtt: float):
+        """Adds the round trip time of a call to the current endpoint's health"""
+        if self.current:
+            self.current.record_round_trip(rtt)
+
+    def _connected(self, endpoint: CSMSEndpoint):
+        if self._disconnected_at is not None:
+            self.last_reconnect_seconds = time.monotonic() - self._disconnected_at
+            self._disconnected_at = None
+        if self._previous and endpoint is not self._previous:
+            self.failovers += 1
+        self.current = endpoint
+        self.connects += 1
+        logger.info(f"Connected to CSMS {endpoint}")
+
+    def _failed(self, endpoint: CSMSEndpoint):
+        endpoint.failures += 1
+        backoff = min(
+            self.backoff_max, self.backoff_base * 2 ** (endpoint.failures - 1)
+        )
+        endpoint.next_attempt_at = time.monotonic() + random.uniform(0, backoff)
+
+    async def _attempt(self, endpoint: CSMSEndpoint) -> Any:
+        started_at = time.perf_counter()
+        try:
+            connection = await asyncio.wait_for(
+                self._open_connection(endpoint), self.connect_timeout
+            )
+        except Exception as exc:
+            logger.info(f"Could not connect to CSMS {endpoint}: {exc!r}")
+            self._failed(endpoint)
+            raise
+        endpoint.failures = 0
+        endpoint.record_round_trip(time.perf_counter() - started_at)
+        return connection
+
+    async def _race(
+        self, endpoints: List[CSMSEndpoint]
+    ) -> Optional[Tuple[CSMSEndpoint, Any]]:
+        attempts = {
+            asyncio.create_task(self._attempt(endpoint)): endpoint
+            for endpoint in endpoints
+        }
+        pending = set(attempts)
+        connected: List[Tuple[CSMSEndpoint, Any]] = []
+        try:
+            while pending and not connected:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                connected = [
+                    (attempts[attempt], attempt.result())
+                    for attempt in done
+                    if not attempt.exception()
+                ]
+        finally:
+            for attempt in pending:
+                attempt.cancel()
+            results = await asyncio.gather(*pending, return_exceptions=True)
+            for result in results:
+                if not isinstance(result, BaseException):
+                    # Connected just before being cancelled
+                    await result.close()
+        if not connected:
+            return None
+        # Of the attempts succeeding at the same time, the best one is kept
+        connected.sort(key=lambda endpoint_connection: endpoint_connection[0].score())
+        for _, connection in connected[1:]:
+            await connection.close()
+        return connected[0]
+
+    def stats(self) -> dict:
+        return {
+            "endpoint": str(self.current) if self.current else None,
+            "connects": self.connects,
+            "failovers": self.failovers,
+            "last_reconnect_ms": (
+                None
+                if self.last_reconnect_seconds is None
+                else self.last_reconnect_seconds * 1000
+            ),
+            "endpoints": {
+                str(endpoint): endpoint.stats() for endpoint in self.endpoints
+            },
+        }
@@ -0,0 +1,45 @@
+import asyncio
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class EventLoop:
+    """The event loop implementations the SECC and EVCC can run on"""
+
+    ASYNCIO = "asyncio"
+    UVLOOP = "uvloop"
+
+    @classmethod
+    def options(cls):
+        return [cls.ASYNCIO, cls.UVLOOP]
+
+
+def get_event_loop_policy(event_loop: str) -> Optional[asyncio.AbstractEventLoopPolicy]:
+    """
+    Returns the policy creating the event loops of the given implementation,
+    or None for the default asyncio policy. uvloop is an optional dependency
+    (pip install uvloop), without it the asyncio event loop is used.
+    """
+    if event_loop == EventLoop.UVLOOP:
+        try:
+            # pylint: disable=import-outside-toplevel
+            import uvloop
+        except ImportError:
+            logger.warning("uvloop is not installed, using the asyncio event loop")
+            return None
+        return uvloop.EventLoopPolicy()
+    return None
+
+
+def use_event_loop(event_loop: str) -> str:
+    """
+    Sets the event loop policy for the event loops created from now on
+    (e.g. by asyncio.run()) and returns the implementation actually used
+    """
+    policy = get_event_loop_policy(event_loop)
+    asyncio.set_event_loop_policy(policy)
+    used = EventLoop.UVLOOP if policy is not None else EventLoop.ASYNCIO
+    logger.info(f"Using the {used} event loop")
+    return used
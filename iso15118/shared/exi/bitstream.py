@@ -0,0 +1,135 @@
+"""
+Bit-packed reader and writer for the EXI primitive datatypes.
+
+Only the bit-packed alignment is implemented, as that is the alignment
+mandated by DIN SPEC 70121, ISO 15118-2 and ISO 15118-20. See section 7 of
+the W3C EXI 1.0 recommendation (https://www.w3.org/TR/exi/) for the
+definition of the primitive representations.
+"""
+
+from typing import Union
+
+from iso15118.shared.exceptions import EXIDecodingError
+
+
+class BitWriter:
+    """
+    Collects bits MSB-first. Pending bits are kept in a small int and
+    flushed into a bytearray whenever at least a full octet is available.
+    """
+
+    __slots__ = ("_buffer", "_acc", "_nbits")
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._acc = 0
+        self._nbits = 0
+
+    def write_bits(self, value: int, nbits: int):
+        if not nbits:
+            return
+        acc = (self._acc << nbits) | value
+        nbits += self._nbits
+        if nbits >= 8:
+            rest = nbits & 7
+            self._buffer += (acc >> rest).to_bytes(nbits >> 3, "big")
+            acc &= (1 << rest) - 1
+            nbits = rest
+        self._acc = acc
+        self._nbits = nbits
+
+    def write_unsigned(self, value: int):
+        """Unsigned Integer: 7 bit groups, least significant group first"""
+        if value < 0:
+            raise ValueError(f"Negative value {value} for unsigned integer")
+        while value > 0x7F:
+            self.write_bits((value & 0x7F) | 0x80, 8)
+            value >>= 7
+        self.write_bits(value, 8)
+
+    def write_integer(self, value: int):
+        """Integer: sign bit followed by the magnitude as Unsigned Integer"""
+        if value < 0:
+            self.write_bits(1, 1)
+            self.write_unsigned(-value - 1)
+        else:
+            self.write_bits(0, 1)
+            self.write_unsigned(value)
+
+    def write_boolean(self, value: bool):
+        self.write_bits(1 if value else 0, 1)
+
+    def write_binary(self, value: bytes):
+        self.write_unsigned(len(value))
+        if not value:
+            return
+        if self._nbits:
+            self.write_bits(int.from_bytes(value, "big"), 8 * len(value))
+        else:
+            self._buffer += value
+
+    def write_characters(self, value: str):
+        """Writes the code points of a string (without length prefix)"""
+        for char in value:
+            self.write_unsigned(ord(char))
+
+    def to_bytes(self) -> bytes:
+        if not self._nbits:
+            return bytes(self._buffer)
+        return bytes(self._buffer) + bytes((self._acc << (8 - self._nbits),))
+
+
+class BitReader:
+    """Reads bits MSB-first from a bytes-like object"""
+
+    __slots__ = ("_data", "_pos", "_size")
+
+    def __init__(self, data: Union[bytes, bytearray, memoryview]):
+        self._data = data
+        self._pos = 0
+        self._size = len(data) * 8
+
+    def read_bits(self, nbits: int) -> int:
+        if not nbits:
+            return 0
+        start = self._pos
+        end = start + nbits
+        if end > self._size:
+            raise EXIDecodingError("Unexpected end of EXI stream")
+        self._pos = end
+        last = (end + 7) >> 3
+        chunk = int.from_bytes(self._data[start >> 3 : last], "big")
+        return (chunk >> ((last << 3) - end)) & ((1 << nbits) - 1)
+
+    def read_unsigned(self) -> int:
+        result = 0
+        shift = 0
+        while True:
+            octet = self.read_bits(8)
+            result |= (octet & 0x7F) << shift
+            if not octet & 0x80:
+                return result
+            shift += 7
+
+    def read_integer(self) -> int:
+        if self.read_bits(1):
+            return -self.read_unsigned() - 1
+        return self.read_unsigned()
+
+    def read_boolean(self) -> bool:
+        return bool(self.read_bits(1))
+
+    def read_binary(self) -> bytes:
+        length = self.read_unsigned()
+        if not length:
+            return b""
+        if not self._pos & 7:
+            start = self._pos >> 3
+            if (self._pos + 8 * length) > self._size:
+                raise EXIDecodingError("Unexpected end of EXI stream")
+            self._pos += 8 * length
+            return bytes(self._data[start : start + length])
+        return self.read_bits(8 * length).to_bytes(length, "big")
+
+    def read_characters(self, length: int) -> str:
+        return "".join([chr(self.read_unsigned()) for _ in range(length)])
@@ -0,0 +1,670 @@
+"""
+Schema-informed EXI grammars (section 8.5 of the EXI 1.0 recommendation)
+for the non-strict, bit-packed profile used by the V2G protocols.
+
+Every complex type is turned into a deterministic state machine whose
+productions are ordered as mandated by section 8.5.4.4.2 (attributes
+sorted by qname, element particles in schema order, then wildcards, EE and
+CH). Since strict mode is off, every element grammar state also carries
+the second level of undeclared productions, which costs one more event
+code on the first level but is never used by the encoder.
+"""
+
+from base64 import b64decode
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple, Union
+
+from iso15118.shared.exceptions import EXIDecodingError, EXIEncodingError
+from iso15118.shared.exi.bitstream import BitReader, BitWriter
+from iso15118.shared.exi.schema import (
+    UNBOUNDED,
+    ComplexType,
+    ElementDecl,
+    ModelGroup,
+    Particle,
+    QName,
+    SchemaError,
+    SimpleType,
+    Wildcard,
+)
+
+
+def code_width(count: int) -> int:
+    """Number of bits needed to represent `count` distinct event codes"""
+    return (count - 1).bit_length() if count > 1 else 0
+
+
+class StringTable:
+    """
+    The value partitions of the EXI string table (section 7.3.3). A new
+    table is used for every EXI stream.
+    """
+
+    __slots__ = ("global_values", "global_index", "local")
+
+    def __init__(self):
+        self.global_values: List[str] = []
+        self.global_index: Dict[str, int] = {}
+        self.local: Dict[QName, Tuple[List[str], Dict[str, int]]] = {}
+
+    def add(self, qname: QName, value: str):
+        if not value:
+            return
+        self.global_index[value] = len(self.global_values)
+        self.global_values.append(value)
+        values, index = self.local.setdefault(qname, ([], {}))
+        index[value] = len(values)
+        values.append(value)
+
+
+# Datatype representations (section 7.1)
+
+
+class Datatype:
+    def encode(self, writer: BitWriter, value, qname: QName, table: StringTable):
+        raise NotImplementedError
+
+    def decode(self, reader: BitReader, qname: QName, table: StringTable):
+        raise NotImplementedError
+
+
+class BooleanDatatype(Datatype):
+    def encode(self, writer, value, qname, table):
+        if not isinstance(value, bool):
+            raise EXIEncodingError(f"Expected boolean for {qname[1]}, got {value!r}")
+        writer.write_boolean(value)
+
+    def decode(self, reader, qname, table):
+        return reader.read_boolean()
+
+
+class NBitIntegerDatatype(Datatype):
+    """Integers with a bounded range of at most 4096 values"""
+
+    def __init__(self, min_value: int, max_value: int):
+        self.min_value = min_value
+        self.max_value = max_value
+        self.nbits = code_width(max_value - min_value + 1)
+
+    def encode(self, writer, value, qname, table):
+        if not isinstance(value, int) or not (
+            self.min_value <= value <= self.max_value
+        ):
+            raise EXIEncodingError(
+                f"Value {value!r} of {qname[1]} out of range "
+                f"[{self.min_value}, {self.max_value}]"
+            )
+        writer.write_bits(value - self.min_value, self.nbits)
+
+    def decode(self, reader, qname, table):
+        return reader.read_bits(self.nbits) + self.min_value
+
+
+class UnsignedIntegerDatatype(Datatype):
+    def encode(self, writer, value, qname, table):
+        if not isinstance(value, int) or value < 0:
+            raise EXIEncodingError(
+                f"Expected unsigned integer for {qname[1]}, got {value!r}"
+            )
+        writer.write_unsigned(value)
+
+    def decode(self, reader, qname, table):
+        return reader.read_unsigned()
+
+
+class IntegerDatatype(Datatype):
+    def encode(self, writer, value, qname, table):
+        if not isinstance(value, int) or isinstance(value, bool):
+            raise EXIEncodingError(f"Expected integer for {qname[1]}, got {value!r}")
+        writer.write_integer(value)
+
+    def decode(self, reader, qname, table):
+        return reader.read_integer()
+
+
+class EnumerationDatatype(Datatype):
+    def __init__(self, values: List[Union[str, int]]):
+        self.values = values
+        self.index = {value: position for position, value in enumerate(values)}
+        self.nbits = code_width(len(values))
+
+    def encode(self, writer, value, qname, table):
+        try:
+            writer.write_bits(self.index[value], self.nbits)
+        except (KeyError, TypeError) as exc:
+            raise EXIEncodingError(
+                f"Value {value!r} is not an enumeration value of {qname[1]}"
+            ) from exc
+
+    def decode(self, reader, qname, table):
+        position = reader.read_bits(self.nbits)
+        if position >= len(self.values):
+            raise EXIDecodingError(f"Invalid enumeration index for {qname[1]}")
+        return self.values[position]
+
+
+class HexBinaryDatatype(Datatype):
+    """hexBinary values are represented as (upper case) hex strings"""
+
+    def encode(self, writer, value, qname, table):
+        if isinstance(value, str):
+            try:
+                value = bytes.fromhex(value)
+            except ValueError as exc:
+                raise EXIEncodingError(f"Invalid hexBinary for {qname[1]}") from exc
+        writer.write_binary(value)
+
+    def decode(self, reader, qname, table):
+        return reader.read_binary().hex().upper()
+
+
+class Base64BinaryDatatype(Datatype):
+    """base64Binary values are represented as raw bytes"""
+
+    def encode(self, writer, value, qname, table):
+        if isinstance(value, str):
+            value = b64decode(value)
+        writer.write_binary(value)
+
+    def decode(self, reader, qname, table):
+        return reader.read_binary()
+
+
+class StringDatatype(Datatype):
+    def encode(self, writer, value, qname, table):
+        if not isinstance(value, str):
+            raise EXIEncodingError(f"Expected string for {qname[1]}, got {value!r}")
+        local = table.local.get(qname)
+        if local is not None and value in local[1]:
+            writer.write_unsigned(0)
+            writer.write_bits(local[1][value], code_width(len(local[0])))
+            return
+        position = table.global_index.get(value)
+        if position is not None:
+            writer.write_unsigned(1)
+            writer.write_bits(position, code_width(len(table.global_values)))
+            return
+        writer.write_unsigned(len(value) + 2)
+        writer.write_characters(value)
+        table.add(qname, value)
+
+    def decode(self, reader, qname, table):
+        length = reader.read_unsigned()
+        if length == 0:
+            values = table.local.get(qname, ([], {}))[0]
+            position = reader.read_bits(code_width(len(values)))
+            if position >= len(values):
+                raise EXIDecodingError(f"Invalid local string hit for {qname[1]}")
+            return values[position]
+        if length == 1:
+            position = reader.read_bits(code_width(len(table.global_values)))
+            if position >= len(table.global_values):
+                raise EXIDecodingError(f"Invalid global string hit for {qname[1]}")
+            return table.global_values[position]
+        value = reader.read_characters(length - 2)
+        table.add(qname, value)
+        return value
+
+
+_BOOLEAN = BooleanDatatype()
+_UNSIGNED = UnsignedIntegerDatatype()
+_INTEGER = IntegerDatatype()
+_HEX_BINARY = HexBinaryDatatype()
+_BASE64_BINARY = Base64BinaryDatatype()
+_STRING = StringDatatype()
+
+
+def datatype_for(simple_type: SimpleType) -> Datatype:
+    """Maps a simple type to its EXI datatype representation (table 7-1)"""
+    primitive = simple_type.primitive
+    if simple_type.enumeration:
+        values = simple_type.enumeration
+        if primitive == "integer":
+            values = [int(value) for value in values]
+        elif primitive == "boolean":
+            values = [value in ("true", "1") for value in values]
+        return EnumerationDatatype(values)
+    if primitive == "boolean":
+        if simple_type.has_pattern:
+            raise SchemaError("Boolean with pattern facet is not supported")
+        return _BOOLEAN
+    if primitive == "integer":
+        low, high = simple_type.min_value, simple_type.max_value
+        if low is not None and high is not None and high - low < 4096:
+            return NBitIntegerDatatype(low, high)
+        if low is not None and low >= 0:
+            return _UNSIGNED
+        return _INTEGER
+    if primitive == "hexBinary":
+        return _HEX_BINARY
+    if primitive == "base64Binary":
+        return _BASE64_BINARY
+    if primitive == "string":
+        if simple_type.has_pattern:
+            # Patterns may result in a restricted character set (7.1.10.1)
+            raise SchemaError(f"String with pattern facet: {simple_type.name}")
+        return _STRING
+    raise SchemaError(f"Unsupported datatype {primitive} ({simple_type.name})")
+
+
+# Grammars
+
+
+class Production:
+    AT = 0
+    SE = 1
+    SE_ANY = 2
+    EE = 3
+    CH = 4
+
+    __slots__ = ("kind", "qname", "target", "element", "datatype", "repeated")
+
+    def __init__(
+        self,
+        kind: int,
+        qname: Optional[QName] = None,
+        element: Optional["ElementGrammar"] = None,
+        datatype: Optional[Datatype] = None,
+        repeated: bool = False,
+    ):
+        self.kind = kind
+        self.qname = qname
+        self.target: Optional["GrammarState"] = None
+        self.element = element
+        self.datatype = datatype
+        self.repeated = repeated
+
+
+class GrammarState:
+    """
+    One non-terminal of a normalised element grammar. `codes` maps the
+    local name of an attribute or child element (or 'value' for typed
+    character content) to the event code of its production.
+    """
+
+    __slots__ = ("productions", "nbits", "codes", "ee_code")
+
+    def __init__(self, productions: List[Production], undeclared: bool = True):
+        self.productions = productions
+        # In non-strict mode every element grammar state has a second level
+        # of undeclared productions, which takes one first-level event code
+        self.nbits = code_width(len(productions) + (1 if undeclared else 0))
+        self.codes: Dict[str, int] = {}
+        self.ee_code: Optional[int] = None
+        for code, production in enumerate(productions):
+            if production.kind == Production.EE:
+                self.ee_code = code
+            elif production.kind == Production.CH:
+                self.codes.setdefault("value", code)
+            elif production.qname is not None:
+                self.codes.setdefault(production.qname[1], code)
+
+
+class ElementGrammar:
+    """
+    The grammar of an element: `start` is the first state of its type's
+    grammar, `simple` tells whether the element has a simple type (in which
+    case its value is a scalar rather than a dict). The states are only
+    built on first use, which also makes recursive types possible.
+    """
+
+    __slots__ = ("qname", "simple", "_start", "_build")
+
+    def __init__(self, qname: QName, start, simple: bool):
+        self.qname = qname
+        self.simple = simple
+        if callable(start):
+            self._start = None
+            self._build = start
+        else:
+            self._start = start
+            self._build = None
+
+    @property
+    def start(self) -> GrammarState:
+        if self._start is None:
+            self._start = self._build()
+            self._build = None
+        return self._start
+
+
+class _NFA:
+    """Non-deterministic proto-grammar of a complex type"""
+
+    def __init__(self):
+        self.epsilon: List[List[int]] = []
+        # (terminal key, target node, production template, schema order)
+        self.terms: List[List[Tuple[tuple, int, Production, tuple]]] = []
+
+    def node(self) -> int:
+        self.epsilon.append([])
+        self.terms.append([])
+        return len(self.epsilon) - 1
+
+    def closure(self, nodes) -> FrozenSet[int]:
+        result: Set[int] = set(nodes)
+        stack = list(nodes)
+        while stack:
+            for target in self.epsilon[stack.pop()]:
+                if target not in result:
+                    result.add(target)
+                    stack.append(target)
+        return frozenset(result)
+
+
+class GrammarBuilder:
+    """
+    Builds (and caches) element grammars for the types of a SchemaSet.
+    """
+
+    def __init__(self):
+        self._complex: Dict[int, GrammarState] = {}
+        self._simple: Dict[int, GrammarState] = {}
+        self._datatypes: Dict[int, Datatype] = {}
+        self._elements: Dict[int, ElementGrammar] = {}
+
+    def datatype(self, simple_type: SimpleType) -> Datatype:
+        key = id(simple_type)
+        if key not in self._datatypes:
+            self._datatypes[key] = datatype_for(simple_type)
+        return self._datatypes[key]
+
+    def element(self, decl: ElementDecl) -> ElementGrammar:
+        key = id(decl)
+        grammar = self._elements.get(key)
+        if grammar is None:
+            decl_type = decl.type
+            if isinstance(decl_type, SimpleType):
+                grammar = ElementGrammar(
+                    decl.qname, lambda: self.simple_type_grammar(decl_type), True
+                )
+            else:
+                grammar = ElementGrammar(
+                    decl.qname, lambda: self.complex_type_grammar(decl_type), False
+                )
+            self._elements[key] = grammar
+        return grammar
+
+    def simple_type_grammar(self, simple_type: SimpleType) -> GrammarState:
+        key = id(simple_type)
+        if key not in self._simple:
+            end = GrammarState([Production(Production.EE)])
+            characters = Production(Production.CH, datatype=self.datatype(simple_type))
+            characters.target = end
+            self._simple[key] = GrammarState([characters])
+        return self._simple[key]
+
+    def complex_type_grammar(self, complex_type: ComplexType) -> GrammarState:
+        key = id(complex_type)
+        if key in self._complex:
+            return self._complex[key]
+
+        nfa = _NFA()
+        start = nfa.node()
+        current = start
+        for attribute in sorted(
+            complex_type.attributes, key=lambda a: (a.qname[1], a.qname[0])
+        ):
+            following = nfa.node()
+            production = Production(
+                Production.AT, attribute.qname, datatype=self.datatype(attribute.type)
+            )
+            nfa.terms[current].append(
+                (
+                    ("AT", attribute.qname),
+                    following,
+                    production,
+                    (0, attribute.qname[1], attribute.qname[0]),
+                )
+            )
+            if not attribute.required:
+                nfa.epsilon[current].append(following)
+            current = following
+
+        content_start = current
+        content = complex_type.content
+        if isinstance(content, SimpleType):
+            accept = nfa.node()
+            production = Production(Production.CH, datatype=self.datatype(content))
+            nfa.terms[current].append((("CH",), accept, production, (7,)))
+        elif isinstance(content, Particle):
+            orders: Dict[int, int] = {}
+            repeated: Set[QName] = set()
+            self._number_particles(content, orders, repeated, False)
+            accept = self._particle(nfa, content, current, orders, repeated)
+        else:
+            accept = current
+
+        if complex_type.mixed:
+            untyped = Production(Production.CH, datatype=_STRING)
+            for node in range(content_start, len(nfa.epsilon)):
+                nfa.terms[node].append((("CH",), node, untyped, (7,)))
+
+        self._complex[key] = self._determinize(nfa, start, accept)
+        return self._complex[key]
+
+    def _number_particles(
+        self,
+        particle: Particle,
+        orders: Dict[int, int],
+        repeated: Set[QName],
+        in_loop: bool,
+    ):
+        """Assigns the schema order to the element and wildcard particles"""
+        in_loop = in_loop or particle.max_occurs != 1
+        term = particle.term
+        if isinstance(term, ModelGroup):
+            for child in term.particles:
+                self._number_particles(child, orders, repeated, in_loop)
+            return
+        orders[id(particle)] = len(orders)
+        if isinstance(term, ElementDecl) and in_loop:
+            repeated.update(decl.qname for decl in self._substitutes(term))
+
+    @staticmethod
+    def _substitutes(decl: ElementDecl) -> List[ElementDecl]:
+        return decl.substitutes if decl.is_global else [decl]
+
+    def _particle(
+        self,
+        nfa: _NFA,
+        particle: Particle,
+        start: int,
+        orders: Dict[int, int],
+        repeated: Set[QName],
+    ) -> int:
+        current = start
+        for _ in range(particle.min_occurs):
+            current = self._term(nfa, particle, current, orders, repeated)
+        if particle.max_occurs == UNBOUNDED:
+            end = self._term(nfa, particle, current, orders, repeated)
+            nfa.epsilon[end].append(current)
+            return current
+        exits = [current]
+        for _ in range(particle.max_occurs - particle.min_occurs):
+            current = self._term(nfa, particle, current, orders, repeated)
+            exits.append(current)
+        if len(exits) == 1:
+            return current
+        end = nfa.node()
+        for node in exits:
+            nfa.epsilon[node].append(end)
+        return end
+
+    def _term(
+        self,
+        nfa: _NFA,
+        particle: Particle,
+        start: int,
+        orders: Dict[int, int],
+        repeated: Set[QName],
+    ) -> int:
+        term = particle.term
+        if isinstance(term, ModelGroup):
+            if term.compositor == "sequence":
+                current = start
+                for child in term.particles:
+                    current = self._particle(nfa, child, current, orders, repeated)
+                return current
+            end = nfa.node()
+            for child in term.particles:
+                branch_end = self._particle(nfa, child, start, orders, repeated)
+                nfa.epsilon[branch_end].append(end)
+            if not term.particles:
+                nfa.epsilon[start].append(end)
+            return end
+
+        end = nfa.node()
+        order = orders[id(particle)]
+        if isinstance(term, Wildcard):
+            if term.namespaces is None:
+                production = Production(Production.SE_ANY)
+                nfa.terms[start].append((("SE*",), end, production, (5, order)))
+            else:
+                for uri in term.namespaces:
+                    production = Production(Production.SE_ANY, (uri, "*"))
+                    nfa.terms[start].append(
+                        (("SE", uri, "*"), end, production, (4, order))
+                    )
+            return end
+
+        for position, decl in enumerate(self._substitutes(term)):
+            production = Production(
+                Production.SE,
+                decl.qname,
+                element=self.element(decl),
+                repeated=decl.qname in repeated,
+            )
+            nfa.terms[start].append(
+                (("SE", decl.qname), end, production, (3, order, position))
+            )
+        return end
+
+    def _determinize(self, nfa: _NFA, start: int, accept: int) -> GrammarState:
+        states: Dict[FrozenSet[int], GrammarState] = {}
+        pending: List[Tuple[FrozenSet[int], GrammarState]] = []
+
+        def state_for(nodes: FrozenSet[int]) -> GrammarState:
+            state = states.get(nodes)
+            if state is not None:
+                return state
+            grouped: Dict[tuple, list] = {}
+            for node in nodes:
+                for key, target, template, order in nfa.terms[node]:
+                    entry = grouped.get(key)
+                    if entry is None:
+                        grouped[key] = [order, template, {target}]
+                    else:
+                        entry[0] = min(entry[0], order)
+                        entry[2].add(target)
+            ordered = sorted(grouped.values(), key=lambda entry: entry[0])
+            if accept in nodes:
+                # EE sorts after the SE and before the CH productions
+                ee_position = sum(1 for entry in ordered if entry[0][0] < 6)
+                ordered.insert(ee_position, [(6,), Production(Production.EE), None])
+            productions = []
+            targets = []
+            for _, template, target_nodes in ordered:
+                production = Production(
+                    template.kind,
+                    template.qname,
+                    template.element,
+                    template.datatype,
+                    template.repeated,
+                )
+                productions.append(production)
+                targets.append(target_nodes)
+            state = GrammarState(productions)
+            states[nodes] = state
+            pending.append((nodes, state))
+            state_targets[id(state)] = targets
+            return state
+
+        state_targets: Dict[int, list] = {}
+        initial = state_for(nfa.closure([start]))
+        while pending:
+            _, state = pending.pop()
+            for production, target_nodes in zip(
+                state.productions, state_targets[id(state)]
+            ):
+                if target_nodes is not None:
+                    production.target = state_for(nfa.closure(target_nodes))
+        return initial
+
+
+def relaxed_fragment_grammar(
+    builder: GrammarBuilder, qname: QName, decls: List[ElementDecl]
+) -> ElementGrammar:
+    """
+    The schema-informed element fragment grammar (section 8.5.3), used for
+    elements of an EXI fragment whose qname is declared several times with
+    different types (e.g. eMAID in ISO 15118-2).
+    """
+    attribute_types: Dict[QName, Set[int]] = {}
+    attribute_uses = {}
+    children: Dict[QName, List[ElementDecl]] = {}
+
+    def collect_children(particle: Particle):
+        term = particle.term
+        if isinstance(term, ModelGroup):
+            for child in term.particles:
+                collect_children(child)
+        elif isinstance(term, ElementDecl):
+            for decl in GrammarBuilder._substitutes(term):
+                children.setdefault(decl.qname, []).append(decl)
+
+    for decl in decls:
+        if isinstance(decl.type, ComplexType):
+            for attribute in decl.type.attributes:
+                attribute_types.setdefault(attribute.qname, set()).add(
+                    id(attribute.type)
+                )
+                attribute_uses[attribute.qname] = attribute
+            if isinstance(decl.type.content, Particle):
+                collect_children(decl.type.content)
+
+    attributes = []
+    for attr_qname in sorted(attribute_types, key=lambda q: (q[1], q[0])):
+        if len(attribute_types[attr_qname]) == 1:
+            datatype = builder.datatype(attribute_uses[attr_qname].type)
+        else:
+            datatype = _STRING
+        attributes.append(Production(Production.AT, attr_qname, datatype=datatype))
+
+    elements = []
+    for child_qname in sorted(children, key=lambda q: (q[1], q[0])):
+        child_decls = children[child_qname]
+        if len({id(decl.type) for decl in child_decls}) == 1:
+            child_grammar = builder.element(child_decls[0])
+        else:
+            child_grammar = relaxed_fragment_grammar(builder, child_qname, child_decls)
+        elements.append(
+            Production(Production.SE, child_qname, element=child_grammar, repeated=True)
+        )
+
+    def content_productions() -> List[Production]:
+        return [
+            Production(p.kind, p.qname, p.element, p.datatype, p.repeated)
+            for p in elements
+        ] + [
+            Production(Production.SE_ANY),
+            Production(Production.EE),
+            Production(Production.CH, datatype=_STRING),
+        ]
+
+    content_state = GrammarState(content_productions(), undeclared=False)
+    for production in content_state.productions:
+        if production.kind != Production.EE:
+            production.target = content_state
+
+    start_productions = (
+        [Production(p.kind, p.qname, datatype=p.datatype) for p in attributes]
+        + [Production(Production.AT)]
+        + content_productions()
+    )
+    start = GrammarState(start_productions, undeclared=False)
+    for production in start.productions:
+        if production.kind == Production.AT:
+            production.target = start
+        elif production.kind != Production.EE:
+            production.target = content_state
+    return ElementGrammar(qname, start, simple=False)
@@ -0,0 +1,250 @@
+"""
+Encoding and decoding of EXI streams for one XSD (and its imports).
+
+Messages are handled as the nested dict structure that the EXI codec layer
+exchanges with the pydantic models, e.g.
+{"V2G_Message": {"Header": {...}, "Body": {...}}}. Attributes and child
+elements are keyed by their local name, typed character content of complex
+types by "value", and repeatable elements map to lists.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+from iso15118.shared.exceptions import EXIDecodingError, EXIEncodingError
+from iso15118.shared.exi.bitstream import BitReader, BitWriter
+from iso15118.shared.exi.grammar import (
+    ElementGrammar,
+    GrammarBuilder,
+    GrammarState,
+    Production,
+    StringTable,
+    code_width,
+    relaxed_fragment_grammar,
+)
+from iso15118.shared.exi.schema import ElementDecl, QName, SchemaSet
+
+# Distinguishing bits '10', no EXI options, EXI format version 1
+EXI_HEADER = 0x80
+EXI_COOKIE = b"$EXI"
+
+
+class _RootContent:
+    """
+    DocContent or FragmentContent: the element qnames that may appear as
+    root, sorted lexicographically by local name and then URI, followed by
+    SE(*) (and ED for fragments)
+    """
+
+    def __init__(
+        self,
+        elements: List[Tuple[QName, ElementGrammar]],
+        preferred_ns: str,
+        fragment: bool,
+    ):
+        self.elements = elements
+        self.fragment = fragment
+        self.nbits = code_width(len(elements) + (2 if fragment else 1))
+        self.codes: Dict[str, int] = {}
+        # A local name can be declared in several namespaces; prefer the
+        # schema's target namespace and otherwise the first declaration
+        for code, (qname, _) in enumerate(elements):
+            current = self.codes.get(qname[1])
+            if current is None or (
+                qname[0] == preferred_ns and elements[current][0][0] != preferred_ns
+            ):
+                self.codes[qname[1]] = code
+
+
+class EXIProcessor:
+    """
+    Schema-informed EXI processor for one schema set, using the EXI options
+    of the V2G protocols: bit-packed, non-strict, no preserved fidelity
+    options, default string table settings.
+
+    Elements declared globally in the schema's target namespace are encoded
+    as EXI documents; any other element (e.g. the body elements referenced
+    by an XML signature) is encoded as EXI fragment. With
+    fragments_only=True (used for the SignedInfo element of the XML
+    signature schema) every element is encoded as fragment.
+    """
+
+    def __init__(self, schema_path: str, fallback_dir: str, fragments_only=False):
+        self.schema = SchemaSet(schema_path, fallback_dir)
+        self.builder = GrammarBuilder()
+        self.fragments_only = fragments_only
+        target_ns = self.schema.target_ns
+
+        documents = sorted(
+            self.schema.global_elements.values(),
+            key=lambda decl: (decl.qname[1], decl.qname[0]),
+        )
+        self.document = _RootContent(
+            [(decl.qname, self.builder.element(decl)) for decl in documents],
+            target_ns,
+            fragment=False,
+        )
+        self.document_roots = {
+            decl.qname[1]
+            for decl in documents
+            if decl.qname[0] == target_ns and not fragments_only
+        }
+
+        declarations: Dict[QName, List[ElementDecl]] = {}
+        for decl in self.schema.all_elements:
+            declarations.setdefault(decl.qname, []).append(decl)
+        fragment_elements = []
+        for qname in sorted(declarations, key=lambda q: (q[1], q[0])):
+            decls = declarations[qname]
+            if len({id(decl.type) for decl in decls}) == 1:
+                grammar = self.builder.element(decls[0])
+            else:
+                grammar = relaxed_fragment_grammar(self.builder, qname, decls)
+            fragment_elements.append((qname, grammar))
+        self.fragment = _RootContent(fragment_elements, target_ns, fragment=True)
+
+    # Encoding
+
+    def encode(self, message: dict) -> bytes:
+        if len(message) != 1 and not self.fragments_only:
+            raise EXIEncodingError("An EXI document has exactly one root element")
+        writer = BitWriter()
+        writer.write_bits(EXI_HEADER, 8)
+        table = StringTable()
+        root_name = next(iter(message))
+        if root_name in self.document_roots:
+            content = self.document
+        else:
+            content = self.fragment
+        for name, value in message.items():
+            code = content.codes.get(name)
+            if code is None:
+                raise EXIEncodingError(f"{name} is not an element of the schema")
+            writer.write_bits(code, content.nbits)
+            self._encode_element(writer, content.elements[code][1], value, table)
+        if content.fragment:
+            writer.write_bits(len(content.elements) + 1, content.nbits)
+        return writer.to_bytes()
+
+    def _encode_element(
+        self,
+        writer: BitWriter,
+        grammar: ElementGrammar,
+        value,
+        table: StringTable,
+    ):
+        state: GrammarState = grammar.start
+        qname = grammar.qname
+        if grammar.simple:
+            production = state.productions[0]
+            writer.write_bits(0, state.nbits)
+            production.datatype.encode(writer, value, qname, table)
+            state = production.target
+            writer.write_bits(state.ee_code, state.nbits)
+            return
+
+        if not isinstance(value, dict):
+            value = {"value": value}
+        pending = {key: item for key, item in value.items() if item is not None}
+        positions: Dict[str, int] = {}
+        while True:
+            code = None
+            for key in pending:
+                candidate = state.codes.get(key)
+                if candidate is not None and (code is None or candidate < code):
+                    code = candidate
+            if code is None:
+                if pending:
+                    raise EXIEncodingError(
+                        f"Unexpected {', '.join(pending)} in {qname[1]}"
+                    )
+                if state.ee_code is None:
+                    raise EXIEncodingError(f"Incomplete content of {qname[1]}")
+                writer.write_bits(state.ee_code, state.nbits)
+                return
+
+            writer.write_bits(code, state.nbits)
+            production = state.productions[code]
+            key = "value" if production.kind == Production.CH else production.qname[1]
+            item = pending[key]
+            if isinstance(item, list):
+                position = positions.get(key, 0)
+                positions[key] = position + 1
+                if position + 1 >= len(item):
+                    del pending[key]
+                item = item[position]
+            else:
+                del pending[key]
+
+            if production.kind == Production.SE:
+                self._encode_element(writer, production.element, item, table)
+            elif production.kind == Production.CH:
+                production.datatype.encode(writer, item, qname, table)
+            else:
+                production.datatype.encode(writer, item, production.qname, table)
+            state = production.target
+
+    # Decoding
+
+    def decode(self, stream: bytes) -> dict:
+        reader = BitReader(stream)
+        if bytes(stream[:4]) == EXI_COOKIE:
+            reader.read_bits(32)
+        header = reader.read_bits(8)
+        if header >> 6 != 0b10:
+            raise EXIDecodingError("Missing EXI distinguishing bits")
+        if header & 0x20:
+            raise EXIDecodingError("EXI options in header are not supported")
+        if header & 0x1F:
+            raise EXIDecodingError("Unsupported EXI format version")
+
+        table = StringTable()
+        content = self.fragment if self.fragments_only else self.document
+        result: dict = {}
+        while True:
+            code = reader.read_bits(content.nbits)
+            if code >= len(content.elements):
+                if content.fragment and code == len(content.elements) + 1:
+                    return result
+                raise EXIDecodingError("Schema-less root elements are not supported")
+            qname, grammar = content.elements[code]
+            result[qname[1]] = self._decode_element(reader, grammar, table)
+            if not content.fragment:
+                return result
+
+    def _decode_element(
+        self, reader: BitReader, grammar: ElementGrammar, table: StringTable
+    ):
+        state: GrammarState = grammar.start
+        qname = grammar.qname
+        result: Optional[dict] = None if grammar.simple else {}
+        value = None
+        while True:
+            code = reader.read_bits(state.nbits)
+            try:
+                production = state.productions[code]
+            except IndexError:
+                raise EXIDecodingError(
+                    f"Deviation from the schema in {qname[1]} is not supported"
+                )
+            kind = production.kind
+            if kind == Production.EE:
+                return value if result is None else result
+            if kind == Production.SE:
+                child = self._decode_element(reader, production.element, table)
+                if production.repeated:
+                    result.setdefault(production.qname[1], []).append(child)
+                else:
+                    result[production.qname[1]] = child
+            elif kind == Production.CH:
+                value = production.datatype.decode(reader, qname, table)
+                if result is not None:
+                    result["value"] = value
+            elif kind == Production.AT and production.qname is not None:
+                result[production.qname[1]] = production.datatype.decode(
+                    reader, production.qname, table
+                )
+            else:
+                raise EXIDecodingError(
+                    f"Wildcard content in {qname[1]} is not supported"
+                )
+            state = production.target
@@ -0,0 +1,512 @@
+"""
+A minimal XML Schema loader that builds the schema components needed to
+derive EXI grammars: element declarations (with their substitution groups),
+simple types with their facets and complex types with their attribute uses
+and content models.
+
+Only the XSD features used by the schemas in iso15118/shared/schemas are
+supported (sequence, choice, element wildcards, complex and simple content
+extension, simple type restriction). Anything else raises a SchemaError.
+"""
+
+import os
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple, Union
+
+XS_NS = "http://www.w3.org/2001/XMLSchema"
+UNBOUNDED = -1
+
+QName = Tuple[str, str]
+
+
+class SchemaError(Exception):
+    """Is thrown if an XSD cannot be loaded into EXI schema components"""
+
+
+def xs(tag: str) -> str:
+    return f"{{{XS_NS}}}{tag}"
+
+
+@dataclass
+class SimpleType:
+    name: Optional[QName]
+    # The XSD built-in primitive (or integer) type this type is derived from,
+    # e.g. 'string', 'boolean', 'integer', 'hexBinary', 'base64Binary'
+    primitive: str
+    min_value: Optional[int] = None
+    max_value: Optional[int] = None
+    enumeration: Optional[List[str]] = None
+    has_pattern: bool = False
+
+
+@dataclass
+class AttributeUse:
+    qname: QName
+    type: SimpleType
+    required: bool
+
+
+@dataclass
+class ElementDecl:
+    qname: QName
+    type: Union["ComplexType", SimpleType, None] = None
+    is_global: bool = False
+    abstract: bool = False
+    nillable: bool = False
+    substitution_head: Optional[QName] = None
+    # Non-abstract members of the substitution group, including self
+    substitutes: List["ElementDecl"] = field(default_factory=list)
+
+
+@dataclass
+class Wildcard:
+    # None for '##any' and '##other', otherwise the list of namespace URIs
+    namespaces: Optional[List[str]]
+
+
+@dataclass
+class ModelGroup:
+    compositor: str  # 'sequence' or 'choice'
+    particles: List["Particle"]
+
+
+@dataclass
+class Particle:
+    term: Union[ElementDecl, ModelGroup, Wildcard]
+    min_occurs: int = 1
+    max_occurs: int = 1
+
+
+@dataclass
+class ComplexType:
+    name: Optional[QName]
+    attributes: List[AttributeUse] = field(default_factory=list)
+    # Either a Particle (element only or mixed content), a SimpleType
+    # (simple content) or None (empty content)
+    content: Union[Particle, SimpleType, None] = None
+    mixed: bool = False
+    abstract: bool = False
+
+
+# Built-in XSD types mapped to their primitive and the value space bounds
+# EXI uses for choosing an integer representation
+_BUILT_IN_TYPES: Dict[str, Tuple[str, Optional[int], Optional[int]]] = {
+    "anySimpleType": ("string", None, None),
+    "string": ("string", None, None),
+    "normalizedString": ("string", None, None),
+    "token": ("string", None, None),
+    "language": ("string", None, None),
+    "Name": ("string", None, None),
+    "NCName": ("string", None, None),
+    "NMTOKEN": ("string", None, None),
+    "ID": ("string", None, None),
+    "IDREF": ("string", None, None),
+    "ENTITY": ("string", None, None),
+    "anyURI": ("string", None, None),
+    "boolean": ("boolean", None, None),
+    "hexBinary": ("hexBinary", None, None),
+    "base64Binary": ("base64Binary", None, None),
+    "decimal": ("decimal", None, None),
+    "float": ("float", None, None),
+    "double": ("float", None, None),
+    "integer": ("integer", None, None),
+    "nonNegativeInteger": ("integer", 0, None),
+    "positiveInteger": ("integer", 1, None),
+    "nonPositiveInteger": ("integer", None, 0),
+    "negativeInteger": ("integer", None, -1),
+    "long": ("integer", -(2**63), 2**63 - 1),
+    "int": ("integer", -(2**31), 2**31 - 1),
+    "short": ("integer", -(2**15), 2**15 - 1),
+    "byte": ("integer", -(2**7), 2**7 - 1),
+    "unsignedLong": ("integer", 0, 2**64 - 1),
+    "unsignedInt": ("integer", 0, 2**32 - 1),
+    "unsignedShort": ("integer", 0, 2**16 - 1),
+    "unsignedByte": ("integer", 0, 2**8 - 1),
+}
+
+
+def built_in_type(local_name: str) -> SimpleType:
+    try:
+        primitive, min_value, max_value = _BUILT_IN_TYPES[local_name]
+    except KeyError as exc:
+        raise SchemaError(f"Unsupported built-in type xs:{local_name}") from exc
+    return SimpleType((XS_NS, local_name), primitive, min_value, max_value)
+
+
+class _SchemaDocument:
+    def __init__(self, path: str, root: ET.Element, prefixes: Dict[str, str]):
+        self.path = path
+        self.root = root
+        self.prefixes = prefixes
+        self.target_ns = root.get("targetNamespace", "")
+        self.element_qualified = root.get("elementFormDefault") == "qualified"
+        self.attribute_qualified = root.get("attributeFormDefault") == "qualified"
+
+    def resolve(self, prefixed_name: str) -> QName:
+        prefix, _, local = prefixed_name.rpartition(":")
+        try:
+            return self.prefixes[prefix], local
+        except KeyError as exc:
+            raise SchemaError(
+                f"Unknown namespace prefix '{prefix}' in {self.path}"
+            ) from exc
+
+
+class SchemaSet:
+    """
+    Loads an XSD and everything it imports. The schema root directory is
+    used as fallback for imports that cannot be resolved relative to the
+    importing file (some V2G schemas reference xmldsig-core-schema.xsd next
+    to themselves whereas there is just one copy in the schemas root).
+    """
+
+    def __init__(self, path: str, fallback_dir: Optional[str] = None):
+        self.fallback_dir = fallback_dir or os.path.dirname(path)
+        self.documents: List[_SchemaDocument] = []
+        self._raw_elements: Dict[QName, Tuple[_SchemaDocument, ET.Element]] = {}
+        self._raw_types: Dict[QName, Tuple[_SchemaDocument, ET.Element]] = {}
+        self._raw_attributes: Dict[QName, Tuple[_SchemaDocument, ET.Element]] = {}
+        self.global_elements: Dict[QName, ElementDecl] = {}
+        self.all_elements: List[ElementDecl] = []
+        self._types: Dict[QName, Union[ComplexType, SimpleType]] = {}
+
+        self._load(os.path.abspath(path))
+        self.target_ns = self.documents[0].target_ns
+
+        for qname in self._raw_elements:
+            self._global_element(qname)
+        self._build_substitution_groups()
+
+    def _load(self, path: str):
+        if any(doc.path == path for doc in self.documents):
+            return
+        if not os.path.isfile(path):
+            fallback = os.path.join(self.fallback_dir, os.path.basename(path))
+            if not os.path.isfile(fallback):
+                raise SchemaError(f"Schema file {path} not found")
+            path = fallback
+            if any(doc.path == path for doc in self.documents):
+                return
+
+        # ElementTree drops the xmlns attributes, so the prefixes (which the
+        # V2G schemas all declare on the schema element) are collected here
+        prefixes: Dict[str, str] = {}
+        parser = ET.iterparse(path, events=("start-ns",))
+        for _, (prefix, uri) in parser:
+            prefixes.setdefault(prefix, uri)
+        document = _SchemaDocument(path, parser.root, prefixes)
+        self.documents.append(document)
+
+        for child in document.root:
+            if child.tag == xs("element"):
+                qname = (document.target_ns, child.get("name"))
+                self._raw_elements[qname] = (document, child)
+            elif child.tag in (xs("complexType"), xs("simpleType")):
+                qname = (document.target_ns, child.get("name"))
+                self._raw_types[qname] = (document, child)
+            elif child.tag == xs("attribute"):
+                qname = (document.target_ns, child.get("name"))
+                self._raw_attributes[qname] = (document, child)
+
+        for child in document.root:
+            if child.tag in (xs("import"), xs("include")):
+                location = child.get("schemaLocation")
+                if location:
+                    self._load(
+                        os.path.normpath(os.path.join(os.path.dirname(path), location))
+                    )
+            elif child.tag in (xs("group"), xs("attributeGroup"), xs("redefine")):
+                raise SchemaError(f"Unsupported schema component {child.tag}")
+
+    # Types
+
+    def get_type(self, qname: QName) -> Union[ComplexType, SimpleType]:
+        if qname[0] == XS_NS:
+            if qname[1] == "anyType":
+                return ComplexType(qname, content=Particle(Wildcard(None)), mixed=True)
+            return built_in_type(qname[1])
+        if qname in self._types:
+            return self._types[qname]
+        try:
+            document, node = self._raw_types[qname]
+        except KeyError as exc:
+            raise SchemaError(f"Unknown type {qname}") from exc
+        if node.tag == xs("simpleType"):
+            built_type = self._simple_type(document, node, qname)
+        else:
+            built_type = self._complex_type(document, node, qname)
+        return built_type
+
+    def _simple_type(
+        self, document: _SchemaDocument, node: ET.Element, name: Optional[QName]
+    ) -> SimpleType:
+        restriction = node.find(xs("restriction"))
+        if restriction is None:
+            raise SchemaError(
+                f"Only restrictions are supported as simple types: {name}"
+            )
+        base_name = restriction.get("base")
+        if base_name:
+            base = self.get_type(document.resolve(base_name))
+        else:
+            base = self._simple_type(document, restriction.find(xs("simpleType")), None)
+        if not isinstance(base, SimpleType):
+            raise SchemaError(f"Simple type {name} restricts complex type {base_name}")
+
+        simple_type = SimpleType(
+            name,
+            base.primitive,
+            base.min_value,
+            base.max_value,
+            base.enumeration,
+            base.has_pattern,
+        )
+        if name:
+            self._types[name] = simple_type
+
+        enumeration = [
+            facet.get("value") for facet in restriction.findall(xs("enumeration"))
+        ]
+        if enumeration:
+            simple_type.enumeration = enumeration
+        if restriction.find(xs("pattern")) is not None:
+            simple_type.has_pattern = True
+        for facet in restriction:
+            tag = facet.tag.replace(f"{{{XS_NS}}}", "")
+            if tag in ("minInclusive", "minExclusive", "maxInclusive", "maxExclusive"):
+                if simple_type.primitive != "integer":
+                    continue
+                value = int(facet.get("value"))
+                if tag == "minExclusive":
+                    value += 1
+                elif tag == "maxExclusive":
+                    value -= 1
+                if tag.startswith("min"):
+                    simple_type.min_value = (
+                        value
+                        if simple_type.min_value is None
+                        else max(value, simple_type.min_value)
+                    )
+                else:
+                    simple_type.max_value = (
+                        value
+                        if simple_type.max_value is None
+                        else min(value, simple_type.max_value)
+                    )
+        return simple_type
+
+    def _complex_type(
+        self, document: _SchemaDocument, node: ET.Element, name: Optional[QName]
+    ) -> ComplexType:
+        complex_type = ComplexType(
+            name,
+            mixed=node.get("mixed") == "true",
+            abstract=node.get("abstract") == "true",
+        )
+        if name:
+            # Register before resolving the content to allow for recursion
+            self._types[name] = complex_type
+
+        simple_content = node.find(xs("simpleContent"))
+        complex_content = node.find(xs("complexContent"))
+        if simple_content is not None:
+            derivation = self._derivation(simple_content, name)
+            base = self.get_type(document.resolve(derivation.get("base")))
+            if isinstance(base, ComplexType):
+                if not isinstance(base.content, SimpleType):
+                    raise SchemaError(f"{name} has simple content of complex type")
+                complex_type.content = base.content
+                complex_type.attributes = list(base.attributes)
+            else:
+                complex_type.content = base
+            if derivation.tag == xs("restriction"):
+                raise SchemaError(f"Simple content restriction unsupported: {name}")
+            complex_type.attributes += self._attributes(document, derivation)
+        elif complex_content is not None:
+            derivation = self._derivation(complex_content, name)
+            if derivation.tag == xs("restriction"):
+                raise SchemaError(f"Complex content restriction unsupported: {name}")
+            if complex_content.get("mixed") == "true":
+                complex_type.mixed = True
+            base = self.get_type(document.resolve(derivation.get("base")))
+            if not isinstance(base, ComplexType):
+                raise SchemaError(f"{name} extends simple type with complex content")
+            complex_type.attributes = list(base.attributes) + self._attributes(
+                document, derivation
+            )
+            extension = self._content_particle(document, derivation)
+            if base.content is None:
+                complex_type.content = extension
+            elif extension is None:
+                complex_type.content = base.content
+            else:
+                complex_type.content = Particle(
+                    ModelGroup("sequence", [base.content, extension])
+                )
+        else:
+            complex_type.attributes = self._attributes(document, node)
+            complex_type.content = self._content_particle(document, node)
+        return complex_type
+
+    @staticmethod
+    def _derivation(content: ET.Element, name: Optional[QName]) -> ET.Element:
+        for child in content:
+            if child.tag in (xs("extension"), xs("restriction")):
+                return child
+        raise SchemaError(f"Missing derivation in {name}")
+
+    def _attributes(
+        self, document: _SchemaDocument, node: ET.Element
+    ) -> List[AttributeUse]:
+        attributes = []
+        for child in node:
+            if child.tag == xs("anyAttribute"):
+                raise SchemaError("Attribute wildcards are not supported")
+            if child.tag != xs("attribute"):
+                continue
+            if child.get("use") == "prohibited":
+                continue
+            required = child.get("use") == "required"
+            if child.get("ref"):
+                qname = document.resolve(child.get("ref"))
+                ref_document, ref_node = self._raw_attributes[qname]
+                attr_type = self._attribute_type(ref_document, ref_node)
+            else:
+                form = child.get("form")
+                qualified = (
+                    form == "qualified" if form else document.attribute_qualified
+                )
+                uri = document.target_ns if qualified else ""
+                qname = (uri, child.get("name"))
+                attr_type = self._attribute_type(document, child)
+            attributes.append(AttributeUse(qname, attr_type, required))
+        return attributes
+
+    def _attribute_type(self, document: _SchemaDocument, node: ET.Element):
+        if node.get("type"):
+            attr_type = self.get_type(document.resolve(node.get("type")))
+        elif node.find(xs("simpleType")) is not None:
+            attr_type = self._simple_type(document, node.find(xs("simpleType")), None)
+        else:
+            attr_type = built_in_type("anySimpleType")
+        if not isinstance(attr_type, SimpleType):
+            raise SchemaError(f"Attribute {node.get('name')} has a complex type")
+        return attr_type
+
+    def _content_particle(
+        self, document: _SchemaDocument, node: ET.Element
+    ) -> Optional[Particle]:
+        for child in node:
+            if child.tag in (xs("sequence"), xs("choice")):
+                return self._particle(document, child)
+            if child.tag in (xs("all"), xs("group")):
+                raise SchemaError(f"Unsupported content model {child.tag}")
+        return None
+
+    @staticmethod
+    def _occurs(node: ET.Element) -> Tuple[int, int]:
+        min_occurs = int(node.get("minOccurs", "1"))
+        max_value = node.get("maxOccurs", "1")
+        max_occurs = UNBOUNDED if max_value == "unbounded" else int(max_value)
+        return min_occurs, max_occurs
+
+    def _particle(self, document: _SchemaDocument, node: ET.Element) -> Particle:
+        min_occurs, max_occurs = self._occurs(node)
+        if node.tag in (xs("sequence"), xs("choice")):
+            particles = [
+                self._particle(document, child)
+                for child in node
+                if child.tag in (xs("element"), xs("sequence"), xs("choice"), xs("any"))
+            ]
+            compositor = "sequence" if node.tag == xs("sequence") else "choice"
+            return Particle(ModelGroup(compositor, particles), min_occurs, max_occurs)
+        if node.tag == xs("any"):
+            namespace = node.get("namespace", "##any")
+            if namespace in ("##any", "##other"):
+                namespaces = None
+            else:
+                namespaces = [
+                    (
+                        document.target_ns
+                        if uri == "##targetNamespace"
+                        else ("" if uri == "##local" else uri)
+                    )
+                    for uri in namespace.split()
+                ]
+            return Particle(Wildcard(namespaces), min_occurs, max_occurs)
+        if node.get("ref"):
+            decl = self._global_element(document.resolve(node.get("ref")))
+        else:
+            decl = self._local_element(document, node)
+        return Particle(decl, min_occurs, max_occurs)
+
+    # Elements
+
+    def _element_type(self, document: _SchemaDocument, node: ET.Element):
+        if node.get("type"):
+            return self.get_type(document.resolve(node.get("type")))
+        complex_node = node.find(xs("complexType"))
+        if complex_node is not None:
+            return self._complex_type(document, complex_node, None)
+        simple_node = node.find(xs("simpleType"))
+        if simple_node is not None:
+            return self._simple_type(document, simple_node, None)
+        return None
+
+    def _global_element(self, qname: QName) -> ElementDecl:
+        if qname in self.global_elements:
+            return self.global_elements[qname]
+        try:
+            document, node = self._raw_elements[qname]
+        except KeyError as exc:
+            raise SchemaError(f"Unknown global element {qname}") from exc
+        decl = ElementDecl(
+            qname,
+            is_global=True,
+            abstract=node.get("abstract") == "true",
+            nillable=node.get("nillable") == "true",
+        )
+        if node.get("substitutionGroup"):
+            decl.substitution_head = document.resolve(node.get("substitutionGroup"))
+        self.global_elements[qname] = decl
+        self.all_elements.append(decl)
+        decl.type = self._element_type(document, node)
+        if decl.type is None and decl.substitution_head:
+            # An element without type in a substitution group takes the
+            # type of the substitution group head
+            decl.type = self._global_element(decl.substitution_head).type
+        if decl.type is None:
+            decl.type = self.get_type((XS_NS, "anyType"))
+        return decl
+
+    def _local_element(self, document: _SchemaDocument, node: ET.Element):
+        form = node.get("form")
+        qualified = form == "qualified" if form else document.element_qualified
+        uri = document.target_ns if qualified else ""
+        decl = ElementDecl(
+            (uri, node.get("name")), nillable=node.get("nillable") == "true"
+        )
+        self.all_elements.append(decl)
+        decl.type = self._element_type(document, node)
+        if decl.type is None:
+            decl.type = self.get_type((XS_NS, "anyType"))
+        return decl
+
+    def _build_substitution_groups(self):
+        members: Dict[QName, List[ElementDecl]] = {}
+        for decl in self.global_elements.values():
+            if decl.substitution_head:
+                members.setdefault(decl.substitution_head, []).append(decl)
+
+        def collect(decl: ElementDecl, result: List[ElementDecl]):
+            if not decl.abstract:
+                result.append(decl)
+            for member in members.get(decl.qname, []):
+                collect(member, result)
+
+        for decl in self.global_elements.values():
+            substitutes: List[ElementDecl] = []
+            collect(decl, substitutes)
+            substitutes.sort(key=lambda d: (d.qname[1], d.qname[0]))
+            decl.substitutes = substitutes
@@ -0,0 +1,161 @@
+"""
+Bounded LRU cache used by the EXI facade to reuse the results of the EXI
+codec for messages it has seen before, and the freezing of decoded
+messages that are shared through such a cache.
+"""
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Hashable, Optional, Tuple, Type
+
+from pydantic import BaseModel
+
+
+class EXICache:
+    """
+    Thread-safe LRU cache, bounded by the number of entries and by the total
+    size (in bytes, as given to put()) of the cached values.
+
+    The least recently used entries are evicted once either limit is
+    exceeded. A value bigger than max_bytes is not cached at all, and a
+    max_entries of 0 disables the cache.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._lock = Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, size: int):
+        if self.max_entries <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous[1]
+            self._entries[key] = (value, size)
+            self.size += size
+            while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+# Fields whose content must never be served from a cache, as it is unique
+# for every message (signatures and the challenges they sign)
+UNCACHEABLE_FIELDS = frozenset({"Signature", "GenChallenge"})
+
+_frozen_classes: Dict[Type[BaseModel], Type[BaseModel]] = {}
+_frozen_classes_lock = Lock()
+
+
+def _frozen_class(model: Type[BaseModel]) -> Type[BaseModel]:
+    """
+    Returns the immutable variant of the model class, a subclass with the
+    same name, so isinstance() checks and str() keep working
+    """
+    frozen = _frozen_classes.get(model)
+    if frozen is None:
+        with _frozen_classes_lock:
+            frozen = _frozen_classes.get(model)
+            if frozen is None:
+                frozen = type(
+                    model.__name__,
+                    (model,),
+                    {
+                        "__module__": model.__module__,
+                        "__qualname__": model.__qualname__,
+                        "Config": type("Config", (), {"allow_mutation": False}),
+                    },
+                )
+                _frozen_classes[model] = frozen
+    return frozen
+
+
+class FrozenList(list):
+    """
+    A list that rejects any modification. Being a list still, it compares
+    equal to and serialises like the lists of a regular message.
+    """
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError("The list of a cached message can't be modified")
+
+    append = extend = insert = remove = pop = clear = sort = reverse = _immutable
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _immutable
+
+    def __reduce__(self):
+        return FrozenList, (list(self),)
+
+
+class _Uncacheable(Exception):
+    pass
+
+
+def _freeze_value(value):
+    if isinstance(value, BaseModel):
+        return _freeze_model(value)
+    if isinstance(value, list):
+        return FrozenList(_freeze_value(item) for item in value)
+    return value
+
+
+def _freeze_model(instance: BaseModel) -> BaseModel:
+    fields = instance.__fields__
+    values = {}
+    for name, value in instance.__dict__.items():
+        if value is not None and fields[name].alias in UNCACHEABLE_FIELDS:
+            raise _Uncacheable(name)
+        values[name] = _freeze_value(value)
+    frozen_class = _frozen_class(type(instance))
+    frozen = frozen_class.__new__(frozen_class)
+    object.__setattr__(frozen, "__dict__", values)
+    object.__setattr__(frozen, "__fields_set__", set(instance.__fields_set__))
+    frozen._init_private_attributes()
+    return frozen
+
+
+def freeze(instance: BaseModel) -> Optional[BaseModel]:
+    """
+    Returns an immutable deep copy of the message, in which every nested
+    model rejects assignments and every list modifications, so it can be
+    shared safely. Returns None for messages that carry a signature or a
+    challenge (see UNCACHEABLE_FIELDS).
+    """
+    try:
+        return _freeze_model(instance)
+    except _Uncacheable:
+        return None
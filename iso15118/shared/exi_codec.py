@@ -1,7 +1,10 @@
+import asyncio
 import json
 import logging
 from base64 import b64decode, b64encode
-from typing import Optional, Type, Union
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import blake2b
+from typing import List, Optional, Type, Union
 
 from pydantic import ValidationError
 
@@ -10,8 +13,12 @@ from iso15118.shared.exceptions import (
     EXIEncodingError,
     V2GMessageValidationError,
 )
+from iso15118.shared.exi_cache import EXICache, freeze
+from iso15118.shared.exi_decoding_plan import get_decoding_plan
+from iso15118.shared.exi_model_builder import build_trusted
 from iso15118.shared.exificient_exi_codec import ExificientEXICodec
 from iso15118.shared.iexi_codec import IEXICodec
+from iso15118.shared.inprocess_exi_codec import InProcessEXICodec
 from iso15118.shared.messages import BaseModel
 from iso15118.shared.messages.app_protocol import (
     SupportedAppProtocolReq,
@@ -71,11 +78,36 @@ from iso15118.shared.messages.iso15118_20.dc import (
     DCWeldingDetectionReq,
     DCWeldingDetectionRes,
 )
-from iso15118.shared.settings import SettingKey, shared_settings
+from iso15118.shared.service_exi_codec import ServiceEXICodec
+from iso15118.shared.settings import EXICodecBackend, SettingKey, shared_settings
 
 logger = logging.getLogger(__name__)
 
 
+def create_exi_codec() -> IEXICodec:
+    """
+    Creates the EXI codec backend selected with the EXI_CODEC setting.
+    Defaults to the Exificient codec if the shared settings are not loaded.
+    """
+    backend = shared_settings.get(SettingKey.EXI_CODEC, EXICodecBackend.EXIFICIENT)
+    if backend == EXICodecBackend.IN_PROCESS:
+        return InProcessEXICodec()
+    if backend == EXICodecBackend.SERVICE:
+        return ServiceEXICodec(shared_settings[SettingKey.EXI_CODEC_SOCKET])
+    return ExificientEXICodec(
+        pool_size=shared_settings.get(SettingKey.EXIFICIENT_POOL_SIZE, 1)
+    )
+
+
+def content_hash(msg_content: Union[dict, str]) -> bytes:
+    """
+    Hash of the codec input of a message, which identifies its content. The
+    dicts of the message models always list their fields in the same order,
+    so equal messages have equal representations.
+    """
+    return blake2b(repr(msg_content).encode(), digest_size=16).digest()
+
+
 class CustomJSONEncoder(json.JSONEncoder):
     """
     Custom JSON encoder to allow the encoding of raw bytes to Base64 encoded
@@ -99,6 +131,10 @@ class CustomJSONDecoder(json.JSONDecoder):
     corresponding ISO 15118 message and datatype fields that we know have a
     bytes value and are serialised as Base64 encoded (base64_encoded_fields_set)
     and then decode each matching dict entry from Base64 back to raw bytes.
+
+    EXI.from_exi() does not use this decoder anymore, it converts the bytes
+    values with the decoding plans of exi_decoding_plan.py, which know the
+    exact fields from the message models.
     """
 
     base64_encoded_fields_set = {
@@ -171,11 +207,21 @@ class EXI:
         if cls._instance is None:
             cls._instance = super(EXI, cls).__new__(cls)
             cls._instance.exi_codec = None
+            cls._instance.executor = None
+            cls._instance.encode_cache = None
+            cls._instance.decode_cache = None
         return cls._instance
 
     def set_exi_codec(self, codec: IEXICodec):
         logger.info(f"EXI Codec version: {codec.get_version()}")
+        if codec is self.exi_codec:
+            # E.g. another EVSE of this process (re)started with the shared
+            # codec, whose cached messages are still valid
+            return
         self.exi_codec = codec
+        for cache in (self.encode_cache, self.decode_cache):
+            if cache is not None:
+                cache.clear()
 
     def get_exi_codec(self) -> IEXICodec:
         """
@@ -185,6 +231,85 @@ class EXI:
             self.exi_codec = ExificientEXICodec()
         return self.exi_codec
 
+    def get_executor(self) -> ThreadPoolExecutor:
+        """
+        Returns the thread pool the async encode and decode operations run on.
+        The number of worker threads is bounded by the EXI_CODEC_WORKERS
+        setting, which limits the number of concurrent calls into the codec.
+        """
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(
+                max_workers=shared_settings.get(SettingKey.EXI_CODEC_WORKERS, 1),
+                thread_name_prefix="exi-codec",
+            )
+        return self.executor
+
+    def get_encode_cache(self) -> EXICache:
+        """
+        Returns the cache of EXI encoded messages, bounded by the
+        EXI_ENCODE_CACHE_ENTRIES and EXI_ENCODE_CACHE_BYTES settings. Its
+        stats() give the hit and miss counters.
+        """
+        if self.encode_cache is None:
+            self.encode_cache = EXICache(
+                max_entries=shared_settings.get(
+                    SettingKey.EXI_ENCODE_CACHE_ENTRIES, 256
+                ),
+                max_bytes=shared_settings.get(
+                    SettingKey.EXI_ENCODE_CACHE_BYTES, 1024 * 1024
+                ),
+            )
+        return self.encode_cache
+
+    def get_decode_cache(self) -> EXICache:
+        """
+        Returns the cache of decoded messages, keyed by namespace and EXI
+        payload and bounded by the EXI_DECODE_CACHE_ENTRIES and
+        EXI_DECODE_CACHE_BYTES settings (the latter counting the payloads).
+        Disabled unless EXI_DECODE_CACHE_ENTRIES is set.
+        """
+        if self.decode_cache is None:
+            self.decode_cache = EXICache(
+                max_entries=shared_settings.get(
+                    SettingKey.EXI_DECODE_CACHE_ENTRIES, 0
+                ),
+                max_bytes=shared_settings.get(
+                    SettingKey.EXI_DECODE_CACHE_BYTES, 256 * 1024
+                ),
+            )
+        return self.decode_cache
+
+    def shutdown_executor(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
+    async def to_exi_async(self, msg_element: BaseModel, protocol_ns: str) -> bytes:
+        """
+        Same as to_exi(), but runs the encoding on the codec executor so that
+        the event loop is not blocked while the codec is busy.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.get_executor(), self.to_exi, msg_element, protocol_ns
+        )
+
+    async def from_exi_async(self, exi_message: bytes, namespace: str) -> Union[
+        SupportedAppProtocolReq,
+        SupportedAppProtocolRes,
+        V2GMessageV2,
+        V2GMessageV20,
+        V2GMessageDINSPEC,
+    ]:
+        """
+        Same as from_exi(), but runs the decoding on the codec executor so that
+        the event loop is not blocked while the codec is busy.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.get_executor(), self.from_exi, exi_message, namespace
+        )
+
     def to_exi(self, msg_element: BaseModel, protocol_ns: str) -> bytes:
         """
         Encodes the message into a bytes stream using the EXI codec
@@ -198,6 +323,93 @@ class EXI:
         Returns:
             A bytes object, representing the EXI encoded message
         """
+        msg_content = self._to_codec_input(msg_element, protocol_ns)
+
+        # Identical messages (e.g. the same response in every charging loop
+        # iteration) are encoded once and then taken from the cache
+        cache = self.get_encode_cache()
+        cache_key = None
+        exi_stream = None
+        if cache.max_entries > 0:
+            cache_key = (protocol_ns, content_hash(msg_content))
+            exi_stream = cache.get(cache_key)
+
+        if exi_stream is None:
+            try:
+                if self.exi_codec.supports_dict:
+                    exi_stream = self.exi_codec.encode_dict(msg_content, protocol_ns)
+                else:
+                    exi_stream = self.exi_codec.encode(msg_content, protocol_ns)
+            except Exception as exc:
+                logger.error(
+                    f"EXIEncodingError in {protocol_ns} with {str(msg_content)}: "
+                    f"{exc}"
+                )
+                raise EXIEncodingError(
+                    f"EXIEncodingError for {str(msg_element)}: " f"{exc}"
+                ) from exc
+            if cache_key is not None:
+                cache.put(cache_key, exi_stream, len(exi_stream))
+
+        if shared_settings[SettingKey.MESSAGE_LOG_EXI]:
+            logger.debug(f"EXI-encoded message: {exi_stream.hex()}")
+
+        return exi_stream
+
+    def to_exi_many(
+        self, msg_elements: List[BaseModel], protocol_ns: str
+    ) -> List[bytes]:
+        """
+        Encodes several messages (or message elements) of the same namespace
+        with a single call to the EXI codec, e.g. the elements referenced by a
+        signature.
+
+        Args:
+            msg_elements: The V2G messages (or message elements) to be EXI
+                          encoded
+            protocol_ns: The protocol namespace that uniquely identifies the XSD
+                         schema, which the EXI encoder needs to use for the encoding
+                         process
+
+        Returns:
+            The EXI encoded messages, in the order of msg_elements
+        """
+        msg_contents = [
+            self._to_codec_input(msg_element, protocol_ns)
+            for msg_element in msg_elements
+        ]
+
+        try:
+            if self.exi_codec.supports_dict:
+                exi_streams = [
+                    self.exi_codec.encode_dict(msg_content, protocol_ns)
+                    for msg_content in msg_contents
+                ]
+            else:
+                exi_streams = self.exi_codec.encode_many(
+                    [(msg_content, protocol_ns) for msg_content in msg_contents]
+                )
+        except Exception as exc:
+            logger.error(f"EXIEncodingError in {protocol_ns}: {exc}")
+            raise EXIEncodingError(
+                f"EXIEncodingError for "
+                f"{', '.join(str(msg_element) for msg_element in msg_elements)}: "
+                f"{exc}"
+            ) from exc
+
+        if shared_settings[SettingKey.MESSAGE_LOG_EXI]:
+            for exi_stream in exi_streams:
+                logger.debug(f"EXI-encoded message: {exi_stream.hex()}")
+
+        return exi_streams
+
+    def _to_codec_input(
+        self, msg_element: BaseModel, protocol_ns: str
+    ) -> Union[dict, str]:
+        """
+        Returns the message in the representation the EXI codec consumes:
+        the dict itself if the codec supports dicts, its JSON otherwise.
+        """
         msg_to_dct: dict = msg_element.dict(by_alias=True, exclude_none=True)
         try:
             # Pydantic does not export the name of the model itself to a dict,
@@ -237,7 +449,10 @@ class EXI:
             else:
                 message_dict = {str(msg_element): msg_to_dct}
 
-            msg_content = json.dumps(message_dict, cls=CustomJSONEncoder)
+            if self.exi_codec.supports_dict:
+                msg_content = message_dict
+            else:
+                msg_content = json.dumps(message_dict, cls=CustomJSONEncoder)
         except Exception as exc:
             raise EXIEncodingError(
                 f"EXIEncodingError for {str(msg_element)}: \
@@ -247,20 +462,7 @@ class EXI:
         if shared_settings[SettingKey.MESSAGE_LOG_JSON]:
             logger.info(f"Message to encode (ns={protocol_ns}): {msg_content}")
 
-        try:
-            exi_stream = self.exi_codec.encode(msg_content, protocol_ns)
-        except Exception as exc:
-            logger.error(
-                f"EXIEncodingError in {protocol_ns} with {str(msg_content)}: {exc}"
-            )
-            raise EXIEncodingError(
-                f"EXIEncodingError for {str(msg_element)}: " f"{exc}"
-            ) from exc
-
-        if shared_settings[SettingKey.MESSAGE_LOG_EXI]:
-            logger.debug(f"EXI-encoded message: {exi_stream.hex()}")
-
-        return exi_stream
+        return msg_content
 
     def from_exi(self, exi_message: bytes, namespace: str) -> Union[
         SupportedAppProtocolReq,
@@ -281,42 +483,75 @@ class EXI:
         Raises:
             EXIDecodingError
         """
+        cache = self.get_decode_cache()
+        if cache.max_entries <= 0:
+            return self._from_exi(exi_message, namespace)
+
+        # Identical payloads (e.g. the same charging loop request) are decoded
+        # once. The cached message is frozen, so states can't alter it
+        cache_key = (namespace, bytes(exi_message))
+        message = cache.get(cache_key)
+        if message is None:
+            message = self._from_exi(exi_message, namespace)
+            frozen = freeze(message)
+            if frozen is not None:
+                cache.put(cache_key, frozen, len(exi_message))
+                message = frozen
+        return message
+
+    def _from_exi(self, exi_message: bytes, namespace: str) -> Union[
+        SupportedAppProtocolReq,
+        SupportedAppProtocolRes,
+        V2GMessageV2,
+        V2GMessageV20,
+        V2GMessageDINSPEC,
+    ]:
         if shared_settings[SettingKey.MESSAGE_LOG_EXI]:
             logger.debug(f"EXI-encoded message (ns={namespace}): {exi_message.hex()}")
 
         try:
-            exi_decoded = self.exi_codec.decode(exi_message, namespace)
+            if self.exi_codec.supports_dict:
+                exi_decoded = self.exi_codec.decode_dict(exi_message, namespace)
+            else:
+                exi_decoded = self.exi_codec.decode(exi_message, namespace)
         except Exception as exc:
             raise EXIDecodingError(
                 f"EXIDecodingError ({exc.__class__.__name__}): " f"{exc}"
             ) from exc
-        try:
-            decoded_dict = json.loads(exi_decoded, cls=CustomJSONDecoder)
-        except json.JSONDecodeError as exc:
-            raise EXIDecodingError(
-                f"JSON decoding error ({exc.__class__.__name__}) while "
-                f"processing decoded EXI: {exc}"
-            ) from exc
+
+        if self.exi_codec.supports_dict:
+            # Already typed by the schema, base64Binary values are bytes
+            decoded_dict = exi_decoded
+        else:
+            # The Base64 encoded bytes values are converted by the decoding
+            # plan of the message type (see _parse_obj)
+            try:
+                decoded_dict = json.loads(exi_decoded)
+            except json.JSONDecodeError as exc:
+                raise EXIDecodingError(
+                    f"JSON decoding error ({exc.__class__.__name__}) while "
+                    f"processing decoded EXI: {exc}"
+                ) from exc
 
         if shared_settings[SettingKey.MESSAGE_LOG_JSON]:
             logger.info(f"Decoded message (ns={namespace}): {exi_decoded}")
 
         try:
             if namespace == Namespace.SAP and "supportedAppProtocolReq" in decoded_dict:
-                return SupportedAppProtocolReq.parse_obj(
-                    decoded_dict["supportedAppProtocolReq"]
+                return self._parse_obj(
+                    SupportedAppProtocolReq, decoded_dict["supportedAppProtocolReq"]
                 )
 
             if namespace == Namespace.SAP and "supportedAppProtocolRes" in decoded_dict:
-                return SupportedAppProtocolRes.parse_obj(
-                    decoded_dict["supportedAppProtocolRes"]
+                return self._parse_obj(
+                    SupportedAppProtocolRes, decoded_dict["supportedAppProtocolRes"]
                 )
 
             if namespace == Namespace.DIN_MSG_DEF:
-                return V2GMessageDINSPEC.parse_obj(decoded_dict["V2G_Message"])
+                return self._parse_obj(V2GMessageDINSPEC, decoded_dict["V2G_Message"])
 
             if namespace == Namespace.ISO_V2_MSG_DEF:
-                return V2GMessageV2.parse_obj(decoded_dict["V2G_Message"])
+                return self._parse_obj(V2GMessageV2, decoded_dict["V2G_Message"])
 
             if namespace.startswith(Namespace.ISO_V20_BASE):
                 # The message name is the first key of the dict
@@ -369,7 +604,7 @@ class EXI:
                     )
                     raise EXIDecodingError(f"Unable to decode {msg_name}")
 
-                return msg_class.parse_obj(msg_dict)
+                return self._parse_obj(msg_class, msg_dict)
 
             raise EXIDecodingError("Can't identify protocol to use for decoding")
         except ValidationError as exc:
@@ -410,3 +645,11 @@ class EXI:
             raise EXIDecodingError(
                 f"EXI decoding error: {exc}. \n\nDecoded dict: " f"{decoded_dict}"
             ) from exc
+
+    def _parse_obj(self, msg_class: Type[BaseModel], msg_dict: dict):
+        if not self.exi_codec.supports_dict:
+            get_decoding_plan(msg_class).apply(msg_dict)
+        if shared_settings.get(SettingKey.EXI_TRUSTED_DECODING, False):
+            # The codec validated the message against the XSD already
+            return build_trusted(msg_class, msg_dict)
+        return msg_class.parse_obj(msg_dict)
@@ -0,0 +1,300 @@
+"""
+Standalone EXI codec service, shared by several SECC / EVCC processes on the
+same host through a UNIX domain socket, so that a single codec backend (e.g.
+one pool of Exificient JVMs) serves all of them.
+
+Start it with
+    python -m iso15118.shared.exi_codec_service [--socket PATH]
+and set EXI_CODEC=service (and EXI_CODEC_SOCKET, if a custom path is used)
+for the SECC / EVCC processes. Use
+    python -m iso15118.shared.exi_codec_service --health
+to query the health endpoint, e.g. as container health check.
+
+The wire format is described in service_exi_codec.py.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from asyncio import StreamReader, StreamWriter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional, Set
+
+from iso15118.shared.iexi_codec import IEXICodec
+from iso15118.shared.service_exi_codec import (
+    REQUEST_HEADER,
+    Op,
+    ServiceEXICodec,
+    Status,
+    pack_response,
+)
+from iso15118.shared.settings import (
+    EXICodecBackend,
+    SettingKey,
+    load_shared_settings,
+    shared_settings,
+)
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait for a started service to answer, e.g. while the JVMs launch
+SERVICE_START_TIMEOUT = 60.0
+
+
+@dataclass
+class _Request:
+    op: int
+    request_id: int
+    namespace: str
+    payload: bytes
+    writer: StreamWriter
+    received_at: float
+
+
+class EXICodecService:
+    """
+    Serves EXI encode / decode requests of many client connections.
+
+    Requests of all connections are collected in one queue. Each of the
+    `workers` batch workers takes whatever requests are queued (up to
+    `max_batch`) and processes them in a single hop to a worker thread,
+    which keeps the per-request scheduling overhead low under load.
+    """
+
+    def __init__(
+        self,
+        codec: IEXICodec,
+        socket_path: str,
+        workers: int = 1,
+        max_batch: int = 32,
+    ):
+        self.codec = codec
+        self.socket_path = socket_path
+        self.workers = workers
+        self.max_batch = max_batch
+        self._queue: "asyncio.Queue[_Request]" = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="exi-service"
+        )
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._tasks: List[asyncio.Task] = []
+        self._writers: Set[StreamWriter] = set()
+        # Read once when starting, so answering a health request never waits
+        # for the codec (e.g. for a free JVM)
+        self.codec_version: Optional[str] = None
+        self.started_at = time.monotonic()
+        self.connections = 0
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.max_latency = 0.0
+
+    async def start(self):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self.codec_version = await asyncio.get_running_loop().run_in_executor(
+            self._executor, self.codec.get_version
+        )
+        self._server = await asyncio.start_unix_server(
+            self._handle_connection, path=self.socket_path
+        )
+        self._tasks = [
+            asyncio.create_task(self._batch_worker()) for _ in range(self.workers)
+        ]
+        logger.info(f"EXI codec service listening on {self.socket_path}")
+
+    async def serve_forever(self):
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        if self._server:
+            self._server.close()
+        for writer in self._writers:
+            writer.close()
+        if self._server:
+            await self._server.wait_closed()
+        self._executor.shutdown(wait=False)
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def health(self) -> dict:
+        return {
+            "status": "ok",
+            "codec": self.codec_version,
+            "uptime": round(time.monotonic() - self.started_at, 3),
+            "connections": self.connections,
+            "requests": self.requests,
+            "errors": self.errors,
+            "batches": self.batches,
+            "queued": self._queue.qsize(),
+            "max_latency": round(self.max_latency, 6),
+        }
+
+    async def _handle_connection(self, reader: StreamReader, writer: StreamWriter):
+        self.connections += 1
+        self._writers.add(writer)
+        try:
+            while True:
+                header = await reader.readexactly(REQUEST_HEADER.size)
+                op, request_id, ns_length, length = REQUEST_HEADER.unpack(header)
+                namespace = (await reader.readexactly(ns_length)).decode()
+                payload = await reader.readexactly(length)
+                if op == Op.HEALTH:
+                    writer.write(
+                        pack_response(
+                            request_id, Status.OK, json.dumps(self.health()).encode()
+                        )
+                    )
+                    continue
+                self._queue.put_nowait(
+                    _Request(
+                        op,
+                        request_id,
+                        namespace,
+                        payload,
+                        writer,
+                        time.monotonic(),
+                    )
+                )
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.connections -= 1
+            self._writers.discard(writer)
+            writer.close()
+
+    async def _batch_worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            responses = await loop.run_in_executor(
+                self._executor, self._process_batch, batch
+            )
+            self.batches += 1
+            now = time.monotonic()
+            for request, response in zip(batch, responses):
+                self.max_latency = max(self.max_latency, now - request.received_at)
+                if not request.writer.is_closing():
+                    request.writer.write(response)
+
+    def _process_batch(self, batch: List[_Request]) -> List[bytes]:
+        return [self._process(request) for request in batch]
+
+    def _process(self, request: _Request) -> bytes:
+        self.requests += 1
+        try:
+            if request.op == Op.ENCODE:
+                result = bytes(
+                    self.codec.encode(request.payload.decode(), request.namespace)
+                )
+            elif request.op == Op.DECODE:
+                result = self.codec.decode(request.payload, request.namespace).encode()
+            elif request.op == Op.VERSION:
+                result = self.codec_version.encode()
+            else:
+                raise ValueError(f"Unknown operation {request.op}")
+            return pack_response(request.request_id, Status.OK, result)
+        except Exception as exc:
+            self.errors += 1
+            return pack_response(
+                request.request_id,
+                Status.ERROR,
+                f"{exc.__class__.__name__}: {exc}".encode(),
+            )
+
+
+def _create_backend(backend: str) -> IEXICodec:
+    if backend == EXICodecBackend.IN_PROCESS:
+        from iso15118.shared.inprocess_exi_codec import InProcessEXICodec
+
+        return InProcessEXICodec()
+    from iso15118.shared.exificient_exi_codec import ExificientEXICodec
+
+    return ExificientEXICodec(
+        pool_size=shared_settings[SettingKey.EXIFICIENT_POOL_SIZE]
+    )
+
+
+def start_exi_codec_service(
+    socket_path: str, timeout: float = SERVICE_START_TIMEOUT
+) -> subprocess.Popen:
+    """
+    Starts the service in a process of its own and returns once it answers
+    on socket_path, e.g. before starting the SECC / EVCC processes using it.
+    Raises RuntimeError if it doesn't answer within timeout seconds.
+    """
+    service = subprocess.Popen(
+        [sys.executable, "-m", "iso15118.shared.exi_codec_service"]
+        + ["--socket", socket_path]
+    )
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            ServiceEXICodec(socket_path).health()
+            return service
+        except (OSError, TimeoutError):
+            if service.poll() is not None:
+                raise RuntimeError("EXI codec service failed to start")
+            if time.monotonic() >= deadline:
+                service.terminate()
+                raise RuntimeError(
+                    f"EXI codec service did not answer within {timeout} s"
+                )
+            time.sleep(0.5)
+
+
+def main():
+    load_shared_settings()
+    parser = argparse.ArgumentParser(description="Shared EXI codec service")
+    parser.add_argument(
+        "--socket",
+        default=shared_settings[SettingKey.EXI_CODEC_SOCKET],
+        help="Path of the UNIX domain socket to listen on",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=[EXICodecBackend.EXIFICIENT, EXICodecBackend.IN_PROCESS],
+        default=EXICodecBackend.EXIFICIENT,
+        help="EXI codec used by the service",
+    )
+    parser.add_argument(
+        "--health",
+        action="store_true",
+        help="Query the health endpoint of a running service and exit",
+    )
+    args = parser.parse_args()
+
+    if args.health:
+        try:
+            print(json.dumps(ServiceEXICodec(args.socket).health()))
+        except (OSError, TimeoutError) as exc:
+            print(f"EXI codec service unavailable: {exc}", file=sys.stderr)
+            sys.exit(1)
+        return
+
+    logging.basicConfig(level=logging.INFO)
+    service = EXICodecService(
+        _create_backend(args.backend),
+        args.socket,
+        workers=shared_settings[SettingKey.EXIFICIENT_POOL_SIZE],
+    )
+    try:
+        asyncio.run(service.serve_forever())
+    except KeyboardInterrupt:
+        logger.debug("EXI codec service terminated manually")
+
+
+if __name__ == "__main__":
+    main()
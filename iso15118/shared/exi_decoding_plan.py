@@ -0,0 +1,136 @@
+"""
+Decoding plans for the JSON representation of decoded EXI messages.
+
+The JSON produced by the Exificient codec carries base64Binary values as
+Base64 encoded strings, which need to be turned back into bytes before the
+pydantic models can parse them. A decoding plan is built once per message
+model from its fields and knows exactly under which (aliased) keys bytes
+values and nested models are found, so converting a decoded message is a
+single pass over the branches that actually contain bytes.
+"""
+
+from base64 import b64decode
+from threading import Lock
+from typing import Dict, List, Optional, Set, Tuple, Type
+
+from pydantic import BaseModel
+from pydantic.fields import ModelField
+
+
+class DecodingPlan:
+    """
+    Maps the alias of each field that holds bytes to None and the alias of
+    each field that holds a model with bytes somewhere below it to the plan
+    of that model. All other fields are left alone.
+    """
+
+    __slots__ = ("fields",)
+
+    def __init__(self):
+        self.fields: Dict[str, Optional["DecodingPlan"]] = {}
+
+    def apply(self, dct: dict) -> dict:
+        """
+        Converts the Base64 encoded strings of dct (and of the dicts nested in
+        it) into bytes, in place. Values that are bytes already are kept, so a
+        plan can be applied more than once.
+        """
+        for alias, plan in self.fields.items():
+            value = dct.get(alias)
+            if value is None:
+                continue
+            if plan is None:
+                if isinstance(value, list):
+                    dct[alias] = [_to_bytes(item) for item in value]
+                else:
+                    dct[alias] = _to_bytes(value)
+            elif isinstance(value, list):
+                for item in value:
+                    if isinstance(item, dict):
+                        plan.apply(item)
+            elif isinstance(value, dict):
+                plan.apply(value)
+        return dct
+
+
+def _to_bytes(value):
+    if isinstance(value, str):
+        return b64decode(value)
+    return value
+
+
+def leaf_types(field: ModelField) -> List[type]:
+    """
+    The types a field can hold once Optional, List and Union are unpacked
+    """
+    if field.sub_fields:
+        return [leaf for sub in field.sub_fields for leaf in leaf_types(sub)]
+    return [field.type_]
+
+
+_plans: Dict[Type[BaseModel], DecodingPlan] = {}
+_plans_lock = Lock()
+
+
+def _compile(
+    model: Type[BaseModel],
+    building: Dict[Type[BaseModel], DecodingPlan],
+    compiling: Set[Type[BaseModel]],
+    unions: List[Tuple[DecodingPlan, List[DecodingPlan]]],
+) -> DecodingPlan:
+    plan = _plans.get(model) or building.get(model)
+    if plan is not None:
+        return plan
+    plan = DecodingPlan()
+    # Registered before the fields are compiled, so recursive models end up
+    # referencing their own plan
+    building[model] = plan
+    compiling.add(model)
+    for field in model.__fields__.values():
+        field_types = [leaf for leaf in leaf_types(field) if isinstance(leaf, type)]
+        if any(issubclass(leaf, bytes) for leaf in field_types):
+            plan.fields[field.alias] = None
+            continue
+        sub_plans = [
+            _compile(leaf, building, compiling, unions)
+            for leaf in field_types
+            if issubclass(leaf, BaseModel)
+        ]
+        if not sub_plans:
+            continue
+        if len(sub_plans) == 1:
+            sub_plan = sub_plans[0]
+        else:
+            # A union of models: the keys of all of them may show up. They're
+            # merged once all plans are complete, as a member may still be
+            # compiling
+            sub_plan = DecodingPlan()
+            unions.append((sub_plan, sub_plans))
+        # A plan still being compiled may get fields later on
+        compiling_plans = [building[leaf] for leaf in compiling]
+        if any(
+            member_plan.fields
+            or any(member_plan is compiling_plan for compiling_plan in compiling_plans)
+            for member_plan in sub_plans
+        ):
+            plan.fields[field.alias] = sub_plan
+    compiling.discard(model)
+    return plan
+
+
+def get_decoding_plan(model: Type[BaseModel]) -> DecodingPlan:
+    """
+    Returns the decoding plan of the model, built on first use
+    """
+    plan = _plans.get(model)
+    if plan is None:
+        with _plans_lock:
+            building: Dict[Type[BaseModel], DecodingPlan] = {}
+            unions: List[Tuple[DecodingPlan, List[DecodingPlan]]] = []
+            plan = _compile(model, building, set(), unions)
+            for union_plan, member_plans in unions:
+                for member_plan in member_plans:
+                    union_plan.fields.update(member_plan.fields)
+            # Only published once complete, as readers don't take the lock
+            _plans.update(building)
+    return plan
@@ -0,0 +1,265 @@
+"""
+Trusted construction of message models from the output of the EXI codec.
+
+The EXI codecs are schema-informed: a decoded message has the structure,
+the types and the facets (lengths, ranges, patterns, enumerations) of the
+XSD already, so pydantic re-checking every single field of it is duplicate
+work. build_trusted() constructs the models without pydantic's type
+coercion and constraint checks, but still runs the validators the models
+define themselves (the root and field validators, e.g. the
+one_field_must_be_set() checks of shared/validators.py), as those enforce
+the semantics the XSD can't express.
+
+Whenever a value doesn't have the type the field expects, the field falls
+back to the regular pydantic validation, so unexpected input is never
+accepted silently.
+"""
+
+from enum import Enum
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple, Type, Union
+
+from pydantic import BaseModel, ValidationError
+from pydantic.error_wrappers import ErrorWrapper
+from pydantic.fields import SHAPE_LIST, SHAPE_SINGLETON, ModelField
+from pydantic.types import ConstrainedBytes, ConstrainedInt, ConstrainedStr
+from pydantic.typing import all_literal_values, is_literal_type
+
+from iso15118.shared.exi_decoding_plan import leaf_types
+
+# The builtin types a codec output value is checked against
+_SIMPLE_TYPES = (bool, int, str, bytes)
+_IMMUTABLE_TYPES = (type(None), bool, int, float, str, bytes, Enum)
+_CONSTRAINED_TYPES = {
+    ConstrainedInt: int,
+    ConstrainedStr: str,
+    ConstrainedBytes: bytes,
+}
+
+
+class _Kind:
+    SIMPLE = 0
+    ENUM = 1
+    MODEL = 2
+    LITERAL = 3
+    # Anything else, which goes through the regular pydantic validation
+    OTHER = 4
+
+
+class _FieldPlan:
+    __slots__ = (
+        "name",
+        "alias",
+        "field",
+        "kind",
+        "target",
+        "is_list",
+        "pre_validators",
+        "post_validators",
+    )
+
+    def __init__(self, field: ModelField):
+        self.name = field.name
+        self.alias = field.alias
+        self.field = field
+        self.kind = _Kind.OTHER
+        self.target: Optional[Union[type, Dict[Any, Any]]] = None
+        self.is_list = field.shape == SHAPE_LIST
+        # The model's own (not each_item) validators of the field
+        self.pre_validators = tuple(field.pre_validators or ())
+        self.post_validators = tuple(field.post_validators or ())
+
+        types = leaf_types(field)
+        if (
+            field.shape == SHAPE_SINGLETON
+            and len(types) == 1
+            and is_literal_type(types[0])
+            and not field.class_validators
+        ):
+            # The allowed values, also by the value of an Enum member
+            self.kind, self.target = _Kind.LITERAL, {}
+            for allowed in all_literal_values(types[0]):
+                self.target[allowed] = allowed
+                if isinstance(allowed, Enum):
+                    self.target.setdefault(allowed.value, allowed)
+            return
+        if (
+            field.shape not in (SHAPE_SINGLETON, SHAPE_LIST)
+            or len(types) != 1
+            or not isinstance(types[0], type)
+            or any(v.each_item for v in field.class_validators.values())
+        ):
+            return
+        field_type = types[0]
+        if issubclass(field_type, BaseModel):
+            self.kind, self.target = _Kind.MODEL, field_type
+        elif issubclass(field_type, Enum):
+            self.kind, self.target = _Kind.ENUM, field_type
+        elif field_type in _SIMPLE_TYPES:
+            self.kind, self.target = _Kind.SIMPLE, field_type
+        else:
+            for constrained, simple_type in _CONSTRAINED_TYPES.items():
+                if issubclass(field_type, constrained):
+                    self.kind, self.target = _Kind.SIMPLE, simple_type
+
+
+class _ModelPlan:
+    __slots__ = ("fields", "keys", "defaults", "mutable_defaults", "required")
+
+    def __init__(self, model: Type[BaseModel]):
+        self.fields = [_FieldPlan(field) for field in model.__fields__.values()]
+        # Every key the model accepts, by alias or by field name
+        self.keys = {field.alias for field in self.fields} | {
+            field.name for field in self.fields
+        }
+        # The values of a new instance, in the order of the fields. Immutable
+        # defaults (mostly None) are shared by all instances, like pydantic
+        # does, the others are copied for every instance
+        self.defaults: Dict[str, Any] = {}
+        self.mutable_defaults: List[ModelField] = []
+        self.required = set()
+        for field in model.__fields__.values():
+            self.defaults[field.name] = None
+            if field.required:
+                self.required.add(field.name)
+            elif isinstance(field.default, _IMMUTABLE_TYPES):
+                self.defaults[field.name] = field.default
+            else:
+                self.mutable_defaults.append(field)
+
+
+_plans: Dict[Type[BaseModel], _ModelPlan] = {}
+_plans_lock = Lock()
+
+
+def _get_plan(model: Type[BaseModel]) -> _ModelPlan:
+    plan = _plans.get(model)
+    if plan is None:
+        with _plans_lock:
+            plan = _plans.get(model)
+            if plan is None:
+                plan = _ModelPlan(model)
+                _plans[model] = plan
+    return plan
+
+
+def _convert(plan: _FieldPlan, value: Any) -> Tuple[Any, bool]:
+    """
+    Returns the value for the field and whether it could be taken on trust
+    """
+    if plan.kind == _Kind.SIMPLE:
+        # bool is a subclass of int, but no valid int value
+        trusted = isinstance(value, plan.target) and not (
+            plan.target is int and isinstance(value, bool)
+        )
+        return value, trusted
+    if plan.kind == _Kind.ENUM:
+        if isinstance(value, plan.target):
+            return value, True
+        try:
+            return plan.target(value), True
+        except ValueError:
+            return value, False
+    if plan.kind == _Kind.LITERAL:
+        try:
+            return plan.target[value], True
+        except (KeyError, TypeError):
+            return value, False
+    if plan.kind == _Kind.MODEL:
+        if isinstance(value, dict):
+            return build_trusted(plan.target, value), True
+        return value, isinstance(value, plan.target)
+    return value, False
+
+
+def build_trusted(model: Type[BaseModel], raw: dict) -> BaseModel:
+    """
+    Constructs the model from the decoded dict raw (keyed by aliases or
+    field names) without re-validating what the XSD guarantees already.
+    The model's own root and field validators still run, and any violation
+    is raised as pydantic ValidationError, like parse_obj() does.
+    """
+    plan = _get_plan(model)
+    if not raw.keys() <= plan.keys:
+        # Let pydantic report the extra fields
+        return model.parse_obj(raw)
+
+    config = model.__config__
+    errors: List[ErrorWrapper] = []
+    try:
+        for root_validator in model.__pre_root_validators__:
+            raw = root_validator(model, raw)
+    except (ValueError, TypeError, AssertionError) as exc:
+        raise ValidationError([ErrorWrapper(exc, loc="__root__")], model)
+
+    values: Dict[str, Any] = dict(plan.defaults)
+    for field in plan.mutable_defaults:
+        values[field.name] = field.get_default()
+    fields_set = set()
+    for field_plan in plan.fields:
+        if field_plan.alias in raw:
+            value = raw[field_plan.alias]
+        elif field_plan.name in raw:
+            value = raw[field_plan.name]
+        else:
+            continue
+        fields_set.add(field_plan.name)
+        field = field_plan.field
+
+        if field_plan.kind == _Kind.OTHER or value is None:
+            value, error = field.validate(value, values, loc=field.alias, cls=model)
+            if error:
+                errors.append(error)
+            else:
+                values[field_plan.name] = value
+            continue
+
+        try:
+            for validator in field_plan.pre_validators:
+                value = validator(model, value, values, field, config)
+            if field_plan.is_list and isinstance(value, list):
+                converted = [_convert(field_plan, item) for item in value]
+                trusted = all(item_trusted for _, item_trusted in converted)
+                if trusted:
+                    value = [item for item, _ in converted]
+            elif field_plan.is_list:
+                trusted = False
+            else:
+                value, trusted = _convert(field_plan, value)
+            if not trusted:
+                value, error = field.validate(value, values, loc=field.alias, cls=model)
+                if error:
+                    errors.append(error)
+                    continue
+                values[field_plan.name] = value
+                continue
+            for validator in field_plan.post_validators:
+                value = validator(model, value, values, field, config)
+        except ValidationError as exc:
+            errors.append(ErrorWrapper(exc, loc=field.alias))
+            continue
+        except (ValueError, TypeError, AssertionError) as exc:
+            errors.append(ErrorWrapper(exc, loc=field.alias))
+            continue
+        values[field_plan.name] = value
+
+    if not plan.required <= fields_set:
+        # Let pydantic report the missing fields
+        return model.parse_obj(raw)
+
+    for skip_on_failure, root_validator in model.__post_root_validators__:
+        if skip_on_failure and errors:
+            continue
+        try:
+            values = root_validator(model, values)
+        except (ValueError, TypeError, AssertionError) as exc:
+            errors.append(ErrorWrapper(exc, loc="__root__"))
+
+    if errors:
+        raise ValidationError(errors, model)
+    # What BaseModel.construct() does, without another pass over the fields
+    instance = model.__new__(model)
+    object.__setattr__(instance, "__dict__", values)
+    object.__setattr__(instance, "__fields_set__", fields_set)
+    instance._init_private_attributes()
+    return instance
@@ -1,8 +1,12 @@
 import json
 import logging
+import queue
+import threading
 import time
 from builtins import Exception
+from typing import List, Tuple, Type
 
+from iso15118.shared.exceptions import EXIDecodingError, EXIEncodingError
 from iso15118.shared.iexi_codec import IEXICodec
 from iso15118.shared.settings import JAR_FILE_PATH
 from py4j.java_gateway import JavaGateway, GatewayParameters, Py4JNetworkError, launch_gateway
@@ -14,59 +18,150 @@ def compare_messages(json_to_encode, decoded_json):
     decoded_json_obj = json.loads(decoded_json)
     return sorted(json_obj.items()) == sorted(decoded_json_obj.items())
 
-class ExificientEXICodec(IEXICodec):
-    def __init__(self):
-        logging.getLogger("py4j").setLevel(logging.CRITICAL)
-        self.gateway = self.create_gateway()
-        self.exi_codec = self.gateway.jvm.com.siemens.ct.exi.main.cmd.EXICodec()
 
-    def create_gateway(self):
+class ExificientGateway:
+    """
+    A JVM running the Exificient codec, together with the py4j gateway to it
+    and the Java-side EXICodec instance. The EXICodec keeps the error of the
+    last call, so a gateway must only be used by one caller at a time.
+    """
+
+    def __init__(self):
         port = launch_gateway(
             classpath=JAR_FILE_PATH,
             die_on_exit=True,
-            javaopts=["--add-opens", "java.base/java.lang=ALL-UNNAMED", 
-                        "-Xms128m", 
+            javaopts=["--add-opens", "java.base/java.lang=ALL-UNNAMED",
+                        "-Xms128m",
                         "-Xmx256m",
                         "-XX:MaxMetaspaceSize=128m",    # Maximum metaspace size
                         "-XX:MaxDirectMemorySize=128m",  # Maximum direct memory size
                     ]
         )
-        return JavaGateway(gateway_parameters=GatewayParameters(port=port))
+        self.gateway = JavaGateway(gateway_parameters=GatewayParameters(port=port))
+        self.exi_codec = self.gateway.jvm.com.siemens.ct.exi.main.cmd.EXICodec()
 
-    def reset_gateway(self):
+    def shutdown(self):
         try:
             self.gateway.shutdown()
         except Exception as e:
             logger.error(f"Failed to shutdown Java gateway: {e}")
-        finally:
-            self.gateway = self.create_gateway()
-            self.exi_codec = self.gateway.jvm.com.siemens.ct.exi.main.cmd.EXICodec()
-    
+
+
+class ExificientEXICodec(IEXICodec):
+    """
+    EXI codec backed by a pool of Exificient gateways.
+
+    Every encode or decode call checks out a gateway from the pool and
+    returns it afterwards, so up to pool_size calls (e.g. from the EXI codec
+    executor threads) run in parallel. A gateway that fails with a
+    Py4JNetworkError is replaced by a background thread and the call is
+    retried with the next available gateway.
+    """
+
+    # Seconds to wait before trying again to launch a replacement gateway
+    REPLACE_RETRY_DELAY = 1.0
+    # Seconds a call waits for a free gateway, e.g. while all of them are
+    # being relaunched, before failing
+    CHECKOUT_TIMEOUT = 10.0
+
+    def __init__(self, pool_size: int = 1):
+        logging.getLogger("py4j").setLevel(logging.CRITICAL)
+        self.pool_size = pool_size
+        self._pool: "queue.Queue[ExificientGateway]" = queue.Queue()
+        self._stopped = False
+        for _ in range(pool_size):
+            self._pool.put(self.create_gateway())
+
+    def create_gateway(self) -> ExificientGateway:
+        return ExificientGateway()
+
+    def _replace_gateway(self, broken: ExificientGateway):
+        broken.shutdown()
+        while not self._stopped:
+            try:
+                self._pool.put(self.create_gateway())
+                return
+            except Exception as e:
+                logger.error(f"Failed to launch Java gateway: {e}")
+                time.sleep(self.REPLACE_RETRY_DELAY)
+
+    def replace_gateway_in_background(self, broken: ExificientGateway):
+        threading.Thread(
+            target=self._replace_gateway,
+            args=(broken,),
+            name="exificient-replace",
+            daemon=True,
+        ).start()
+
+    def _drain_idle_gateways(self):
+        idle = []
+        while True:
+            try:
+                idle.append(self._pool.get_nowait())
+            except queue.Empty:
+                return idle
+
+    def reset_gateway(self):
+        """
+        Replaces all idle gateways of the pool in the background. Gateways
+        checked out by ongoing calls are handled once they fail.
+        """
+        for gateway in self._drain_idle_gateways():
+            self.replace_gateway_in_background(gateway)
+
     def stop_gateway(self):
+        self._stopped = True
+        for gateway in self._drain_idle_gateways():
+            gateway.shutdown()
+
+    def _check_out_gateway(self, error: Type[Exception]) -> ExificientGateway:
         try:
-            self.gateway.shutdown()
-        except Exception as e:
-            logger.error(f"Failed to shutdown Java gateway: {e}")
-        finally:
-            return
+            return self._pool.get(timeout=self.CHECKOUT_TIMEOUT)
+        except queue.Empty:
+            raise error(
+                f"No Exificient gateway available within {self.CHECKOUT_TIMEOUT} s"
+            )
+
+    def _call_many(
+        self, method: str, get_last_error: str, calls: list, error: Type[Exception]
+    ) -> list:
+        """
+        Runs all calls with the same gateway, so a batch only waits once for
+        a free gateway of the pool.
+        """
+        # One retry, as a broken gateway is only detected by using it
+        for attempt in range(2):
+            gateway = self._check_out_gateway(error)
+            try:
+                results = []
+                for args in calls:
+                    result = getattr(gateway.exi_codec, method)(*args)
+                    if result is None:
+                        raise Exception(getattr(gateway.exi_codec, get_last_error)())
+                    results.append(result)
+            except Py4JNetworkError:
+                logger.error("Py4JNetworkError: Replacing the gateway.")
+                self.replace_gateway_in_background(gateway)
+                if attempt:
+                    raise
+                continue
+            except Exception:
+                self._pool.put(gateway)
+                raise
+            self._pool.put(gateway)
+            return results
 
     def encode(self, message: str, namespace: str) -> bytes:
         """
         Calls the Exificient EXI implementation to encode input json.
         Returns a byte[] for the input message if conversion was successful.
         """
-        try:
-            exi = self.exi_codec.encode(message, namespace)
-            if exi is None:
-                raise Exception(self.exi_codec.get_last_encoding_error())
-            return exi
-        except Py4JNetworkError:
-            logger.error("Py4JNetworkError: Resetting the gateway.")
-            self.reset_gateway()
-            exi = self.exi_codec.encode(message, namespace)
-            if exi is None:
-                raise Exception(self.exi_codec.get_last_encoding_error())
-            return exi
+        return self.encode_many([(message, namespace)])[0]
+
+    def encode_many(self, messages: List[Tuple[str, str]]) -> List[bytes]:
+        return self._call_many(
+            "encode", "get_last_encoding_error", messages, EXIEncodingError
+        )
 
     def decode(self, stream: bytes, namespace: str) -> str:
         """
@@ -74,21 +169,19 @@ class ExificientEXICodec(IEXICodec):
         Returns a JSON representation of the input EXI stream if the conversion
         was successful.
         """
-        try:
-            decoded_message = self.exi_codec.decode(stream, namespace)
-            if decoded_message is None:
-                raise Exception(self.exi_codec.get_last_decoding_error())
-            return decoded_message
-        except Py4JNetworkError:
-            logger.error("Py4JNetworkError: Resetting the gateway.")
-            self.reset_gateway()
-            decoded_message = self.exi_codec.decode(stream, namespace)
-            if decoded_message is None:
-                raise Exception(self.exi_codec.get_last_decoding_error())
-            return decoded_message
+        return self.decode_many([(stream, namespace)])[0]
+
+    def decode_many(self, streams: List[Tuple[bytes, str]]) -> List[str]:
+        return self._call_many(
+            "decode", "get_last_decoding_error", streams, EXIDecodingError
+        )
 
     def get_version(self) -> str:
         """
         Returns the version of the Exificient codec
         """
-        return self.exi_codec.get_version()
+        gateway = self._check_out_gateway(RuntimeError)
+        try:
+            return gateway.exi_codec.get_version()
+        finally:
+            self._pool.put(gateway)
@@ -1,7 +1,13 @@
 from abc import ABCMeta, abstractmethod
+from typing import List, Tuple
 
 
 class IEXICodec(metaclass=ABCMeta):
+    # Codecs that set this consume and produce the dict representation of the
+    # messages (see encode_dict / decode_dict), so the EXI facade hands the
+    # dicts over directly instead of serialising them to JSON and back
+    supports_dict = False
+
     @abstractmethod
     def encode(self, message: str, namespace: str) -> bytes:
         """
@@ -20,6 +26,42 @@ class IEXICodec(metaclass=ABCMeta):
         """
         raise NotImplementedError
 
+    def encode_dict(self, message: dict, namespace: str) -> bytes:
+        """
+        Encodes the dict representation of a message to EXI
+        Message: Message as nested dicts, with base64Binary values as bytes
+        Namespace: String indicating the schema to be used while encoding
+        Only called if supports_dict is set.
+        """
+        raise NotImplementedError
+
+    def decode_dict(self, stream: bytes, namespace: str) -> dict:
+        """
+        Decodes EXI stream to the dict representation of the message
+        Stream: EXI bytes stream
+        Namespace: String indicating the schema to be used while decoding
+        Only called if supports_dict is set.
+        """
+        raise NotImplementedError
+
+    def encode_many(self, messages: List[Tuple[str, str]]) -> List[bytes]:
+        """
+        Encodes several messages to EXI in one go
+        Messages: List of (message payload, namespace) tuples
+        Returns the EXI streams in the order of the messages. Codecs with a
+        per-call overhead (e.g. a gateway or socket crossing) should override
+        this to encode all messages with a single crossing.
+        """
+        return [self.encode(message, namespace) for message, namespace in messages]
+
+    def decode_many(self, streams: List[Tuple[bytes, str]]) -> List[str]:
+        """
+        Decodes several EXI streams in one go
+        Streams: List of (EXI bytes stream, namespace) tuples
+        Returns the message payloads in the order of the streams.
+        """
+        return [self.decode(stream, namespace) for stream, namespace in streams]
+
     @abstractmethod
     def get_version(self) -> str:
         pass
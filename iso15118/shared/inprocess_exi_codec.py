@@ -0,0 +1,122 @@
+import json
+import logging
+import os
+from base64 import b64encode
+from threading import Lock
+from typing import Dict
+
+from iso15118.shared.exceptions import EXIDecodingError, EXIEncodingError
+from iso15118.shared.exi.processor import EXIProcessor
+from iso15118.shared.iexi_codec import IEXICodec
+from iso15118.shared.messages.enums import Namespace
+from iso15118.shared.settings import SHARED_CWD
+
+logger = logging.getLogger(__name__)
+
+SCHEMAS_DIR = os.path.join(SHARED_CWD, "schemas")
+
+# Namespace -> (XSD relative to SCHEMAS_DIR, encode every element as fragment)
+SCHEMA_FILES = {
+    Namespace.SAP: ("V2G_CI_AppProtocol.xsd", False),
+    Namespace.DIN_MSG_DEF: ("din_spec/V2G_CI_MsgDef.xsd", False),
+    Namespace.ISO_V2_MSG_DEF: ("iso15118_2/V2G_CI_MsgDef.xsd", False),
+    Namespace.ISO_V20_COMMON_MSG: ("iso15118_20/V2G_CI_CommonMessages.xsd", False),
+    Namespace.ISO_V20_AC: ("iso15118_20/V2G_CI_AC.xsd", False),
+    Namespace.ISO_V20_DC: ("iso15118_20/V2G_CI_DC.xsd", False),
+    Namespace.ISO_V20_WPT: ("iso15118_20/V2G_CI_WPT.xsd", False),
+    Namespace.ISO_V20_ACDP: ("iso15118_20/V2G_CI_ACDP.xsd", False),
+    Namespace.XML_DSIG: ("xmldsig-core-schema.xsd", True),
+}
+
+
+def _json_default(o):
+    if isinstance(o, bytes):
+        return b64encode(o).decode()
+    raise TypeError(f"Object of type {o.__class__.__name__} is not JSON serializable")
+
+
+class InProcessEXICodec(IEXICodec):
+    """
+    Schema-informed EXI codec that runs inside the Python process, so neither
+    a JVM nor the py4j gateway is needed.
+
+    The EXI processor works on the dict representation of the messages, so the
+    EXI facade passes the dicts of the pydantic models straight through
+    (supports_dict). encode() and decode() consume and produce the same JSON
+    representation as the Exificient codec. The grammars of a schema are
+    built on first use of its namespace and kept for the lifetime of the
+    codec.
+    """
+
+    supports_dict = True
+
+    def __init__(self):
+        self._processors: Dict[str, EXIProcessor] = {}
+        self._lock = Lock()
+
+    def _get_processor(self, namespace: str) -> EXIProcessor:
+        processor = self._processors.get(namespace)
+        if processor is None:
+            try:
+                schema_file, fragments_only = SCHEMA_FILES[namespace]
+            except KeyError:
+                raise ValueError(f"No XSD schema known for namespace {namespace}")
+            with self._lock:
+                processor = self._processors.get(namespace)
+                if processor is None:
+                    processor = EXIProcessor(
+                        os.path.join(SCHEMAS_DIR, schema_file),
+                        SCHEMAS_DIR,
+                        fragments_only=fragments_only,
+                    )
+                    self._processors[namespace] = processor
+        return processor
+
+    def encode(self, message: str, namespace: str) -> bytes:
+        """
+        Encodes the JSON representation of a message (or message element)
+        with the grammars of the XSD belonging to the namespace.
+        """
+        try:
+            message_dict = json.loads(message)
+        except Exception as exc:
+            raise EXIEncodingError(f"{exc.__class__.__name__}: {exc}") from exc
+        return self.encode_dict(message_dict, namespace)
+
+    def encode_dict(self, message: dict, namespace: str) -> bytes:
+        """
+        Encodes the dict representation of a message (or message element)
+        with the grammars of the XSD belonging to the namespace.
+        """
+        try:
+            return self._get_processor(namespace).encode(message)
+        except EXIEncodingError:
+            raise
+        except Exception as exc:
+            raise EXIEncodingError(f"{exc.__class__.__name__}: {exc}") from exc
+
+    def decode(self, stream: bytes, namespace: str) -> str:
+        """
+        Decodes the EXI stream into the JSON representation of the message,
+        with base64Binary values given as Base64 encoded strings.
+        """
+        decoded = self.decode_dict(stream, namespace)
+        try:
+            return json.dumps(decoded, default=_json_default)
+        except Exception as exc:
+            raise EXIDecodingError(f"{exc.__class__.__name__}: {exc}") from exc
+
+    def decode_dict(self, stream: bytes, namespace: str) -> dict:
+        """
+        Decodes the EXI stream into the dict representation of the message,
+        with base64Binary values given as bytes.
+        """
+        try:
+            return self._get_processor(namespace).decode(stream)
+        except EXIDecodingError:
+            raise
+        except Exception as exc:
+            raise EXIDecodingError(f"{exc.__class__.__name__}: {exc}") from exc
+
+    def get_version(self) -> str:
+        return "in-process EXI 1.0 (bit-packed, schema-informed)"
@@ -0,0 +1,57 @@
+import asyncio
+from abc import ABCMeta, abstractmethod
+from ipaddress import IPv6Address
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from iso15118.evcc.transport.tcp_client import TCPClient
+    from iso15118.evcc.transport.udp_client import UDPClient
+    from iso15118.secc.transport.tcp_server import TCPServer
+    from iso15118.secc.transport.udp_server import UDPServer
+
+
+class ITransport(metaclass=ABCMeta):
+    """
+    Creates the endpoints the EVCC and the SECC communicate through: the UDP
+    server and client for the SECC Discovery Protocol (SDP) and the TCP
+    server and client for the V2G communication session.
+    """
+
+    @abstractmethod
+    def create_udp_server(
+        self,
+        session_handler_queue: asyncio.Queue,
+        iface: str,
+        sdp_port: Optional[int] = None,
+    ) -> "UDPServer":
+        """The SECC's SDP server, listening on the given SDP port"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def create_tcp_server(
+        self, session_handler_queue: asyncio.Queue, iface: str
+    ) -> "TCPServer":
+        """The SECC's TCP server, started with start_tls() or start_no_tls()"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def create_udp_client(
+        self,
+        session_handler_queue: asyncio.Queue,
+        iface: str,
+        sdp_port: Optional[int] = None,
+    ) -> "UDPClient":
+        """The EVCC's SDP client, sending to the given SDP port"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def create_tcp_client(
+        self,
+        host: IPv6Address,
+        port: int,
+        session_handler_queue: asyncio.Queue,
+        is_tls: bool,
+        iface: str,
+    ) -> "TCPClient":
+        """The EVCC's TCP client, connected to the SECC's TCP server"""
+        raise NotImplementedError
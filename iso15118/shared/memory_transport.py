@@ -0,0 +1,433 @@
+"""
+An in-memory transport, which connects EVCCs and SECCs running in the same
+event loop without any network interface.
+
+All EVCCs and SECCs that shall find each other use a transport of the same
+MemoryNetwork, each with an IPv6 address of its own:
+
+    network = MemoryNetwork()
+    secc_handler = SECCHandler(..., transport=network.transport())
+    evcc_handler = EVCCHandler(..., transport=network.transport())
+
+SDP requests go to the SECC listening on the requested SDP port. The TCP
+connections are pairs of StreamReaders and StreamWriters that pass the bytes
+on through the event loop, secured with TLS just like a socket connection
+if the SDP response asks for it. This allows running the full protocol, for
+example in load tests, on any machine.
+"""
+
+import asyncio
+import errno
+import itertools
+import logging
+from collections import deque
+from ipaddress import IPv6Address
+from ssl import SSLContext, SSLError
+from typing import Any, Deque, Dict, Optional, Set, Tuple
+
+from iso15118.evcc.transport.tcp_client import TCPClient
+from iso15118.evcc.transport.udp_client import UDPClient
+from iso15118.secc.transport.tcp_server import TCPServer
+from iso15118.secc.transport.udp_server import UDPServer
+from iso15118.shared.itransport import ITransport
+from iso15118.shared.network import SDP_MULTICAST_GROUP, get_tcp_port
+from iso15118.shared.security import record_tls_handshake
+from iso15118.shared.utils import cancel_task
+
+logger = logging.getLogger(__name__)
+
+# The address the IPv6 addresses of the transports are counted up from
+MEMORY_NETWORK_PREFIX = IPv6Address("fe80::")
+
+
+class MemoryStreamTransport(asyncio.Transport):
+    """
+    One end of an in-memory stream connection. The bytes written to it are
+    received by the protocol of its peer in the next iteration of the event
+    loop, in the order they were written.
+    """
+
+    # Allows loop.start_tls() to secure the connection with TLS
+    _start_tls_compatible = True
+
+    def __init__(self, sockname: Tuple[Any, ...], peername: Tuple[Any, ...]):
+        super().__init__(extra={"sockname": sockname, "peername": peername})
+        self._loop = asyncio.get_running_loop()
+        self._protocol: Optional[asyncio.BaseProtocol] = None
+        self._peer: Optional["MemoryStreamTransport"] = None
+        # The received bytes not yet passed to the protocol, with None for EOF
+        self._pending: Deque[Optional[bytes]] = deque()
+        self._flush_scheduled = False
+        self._paused = False
+        self._closing = False
+
+    @classmethod
+    def pair(
+        cls, client_address: Tuple[Any, ...], server_address: Tuple[Any, ...]
+    ) -> Tuple["MemoryStreamTransport", "MemoryStreamTransport"]:
+        """Returns the client and the server end of a new connection"""
+        client = cls(client_address, server_address)
+        server = cls(server_address, client_address)
+        client._peer, server._peer = server, client
+        return client, server
+
+    def set_protocol(self, protocol: asyncio.BaseProtocol):
+        self._protocol = protocol
+        self._flush_soon()
+
+    def get_protocol(self) -> Optional[asyncio.BaseProtocol]:
+        return self._protocol
+
+    def is_closing(self) -> bool:
+        return self._closing
+
+    def is_reading(self) -> bool:
+        return not self._paused and not self._closing
+
+    def pause_reading(self):
+        self._paused = True
+
+    def resume_reading(self):
+        self._paused = False
+        self._flush_soon()
+
+    def get_write_buffer_size(self) -> int:
+        return 0
+
+    def get_write_buffer_limits(self) -> Tuple[int, int]:
+        return 0, 0
+
+    def set_write_buffer_limits(self, high=None, low=None):
+        pass
+
+    def can_write_eof(self) -> bool:
+        return False
+
+    def write(self, data):
+        if self._closing or not data:
+            return
+        self._peer._receive(bytes(data))
+
+    def close(self):
+        self._force_close(None)
+
+    def abort(self):
+        self._force_close(None)
+
+    def _force_close(self, exc: Optional[Exception]):
+        if self._closing:
+            return
+        self._closing = True
+        self._peer._receive(None)
+        if self._protocol is not None:
+            self._loop.call_soon(self._protocol.connection_lost, exc)
+
+    def _receive(self, data: Optional[bytes]):
+        if self._closing:
+            return
+        self._pending.append(data)
+        self._flush_soon()
+
+    def _flush_soon(self):
+        if not self._flush_scheduled and self._pending:
+            self._flush_scheduled = True
+            self._loop.call_soon(self._flush)
+
+    def _flush(self):
+        self._flush_scheduled = False
+        while self._pending and not self._paused and self._protocol is not None:
+            if self._closing:
+                self._pending.clear()
+                return
+            data = self._pending.popleft()
+            if data is None:
+                # The peer closed the connection
+                if not self._protocol.eof_received():
+                    self.close()
+            elif isinstance(self._protocol, asyncio.BufferedProtocol):
+                self._feed_buffered_protocol(data)
+            else:
+                self._protocol.data_received(data)
+
+    def _feed_buffered_protocol(self, data: bytes):
+        view = memoryview(data)
+        while view:
+            buffer = self._protocol.get_buffer(len(view))
+            length = min(len(buffer), len(view))
+            buffer[:length] = view[:length]
+            self._protocol.buffer_updated(length)
+            view = view[length:]
+
+
+class MemoryDatagramTransport(asyncio.DatagramTransport):
+    """A datagram endpoint at an address of the MemoryNetwork"""
+
+    def __init__(
+        self,
+        network: "MemoryNetwork",
+        address: Tuple[Any, ...],
+        protocol: asyncio.DatagramProtocol,
+    ):
+        super().__init__(extra={"sockname": address})
+        if address[:2] in network.datagram_endpoints:
+            raise OSError(errno.EADDRINUSE, f"Address {address} is already in use")
+        self._network = network
+        self._address = address
+        self._protocol = protocol
+        self._closing = False
+        network.datagram_endpoints[address[:2]] = protocol
+
+    def sendto(self, data, addr=None):
+        if not self._closing:
+            self._network.send_datagram(bytes(data), addr, self._address)
+
+    def is_closing(self) -> bool:
+        return self._closing
+
+    def close(self):
+        if not self._closing:
+            self._closing = True
+            del self._network.datagram_endpoints[self._address[:2]]
+
+    def abort(self):
+        self.close()
+
+
+async def open_memory_stream(
+    transport: MemoryStreamTransport,
+    ssl_context: Optional[SSLContext],
+    server_side: bool,
+    server_hostname: Optional[str] = None,
+) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    """
+    Returns the StreamReader and StreamWriter for one end of an in-memory
+    connection, once the TLS handshake (if any SSL context is given) is done
+    """
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    protocol = asyncio.StreamReaderProtocol(reader)
+    transport.set_protocol(protocol)
+    protocol.connection_made(transport)
+    stream_transport: asyncio.BaseTransport = transport
+    if ssl_context is not None:
+        stream_transport = await loop.start_tls(
+            transport,
+            protocol,
+            ssl_context,
+            server_side=server_side,
+            server_hostname=server_hostname,
+        )
+    return reader, asyncio.StreamWriter(stream_transport, protocol, reader, loop)
+
+
+class MemoryUDPServer(UDPServer):
+    """The SECC's SDP server, receiving the SDP requests sent to its port"""
+
+    def __init__(
+        self,
+        session_handler_queue: asyncio.Queue,
+        iface: str,
+        secc_custom_sdp_port: Optional[int],
+        transport: "MemoryTransport",
+    ):
+        super().__init__(session_handler_queue, iface, secc_custom_sdp_port)
+        self.memory_transport = transport
+
+    async def start(self, ready_event: asyncio.Event):
+        self._transport = MemoryDatagramTransport(
+            self.memory_transport.network,
+            (SDP_MULTICAST_GROUP, self.secc_sdp_port, 0, 0),
+            self,
+        )
+        self.connection_made(self._transport)
+        logger.info(
+            f"In-memory UDP server started at address {SDP_MULTICAST_GROUP} "
+            f"and port {self.secc_sdp_port}"
+        )
+        ready_event.set()
+        rcv_task = asyncio.create_task(self.rcv_task())
+        try:
+            await rcv_task
+        finally:
+            # Never leaves the task pending, however start() ends
+            await cancel_task(rcv_task)
+            self._transport.close()
+
+
+class MemoryTCPServer(TCPServer):
+    """The SECC's TCP server, accepting in-memory connections"""
+
+    def __init__(
+        self,
+        session_handler_queue: asyncio.Queue,
+        iface: str,
+        transport: "MemoryTransport",
+    ):
+        super().__init__(session_handler_queue, iface)
+        self.memory_transport = transport
+        # The connections whose TLS handshake is ongoing
+        self._handshakes: Set[asyncio.Task] = set()
+
+    async def server_factory(self, ready_event: asyncio.Event, tls: bool) -> None:
+        server_type = self._load_ssl_context(tls)
+        network = self.memory_transport.network
+        host = self.memory_transport.host
+        while (host, self.port) in network.tcp_servers:
+            self.port = get_tcp_port()
+        self.full_ipv6_address = (host, self.port, 0, 0)
+        self.ipv6_address_host = host
+        self.ipv6_address_bytes = IPv6Address(host).packed
+        network.tcp_servers[(host, self.port)] = self
+
+        logger.info(
+            f"In-memory {server_type} server started at address {host} and "
+            f"port {self.port}"
+        )
+        ready_event.set()
+
+        try:
+            await asyncio.Event().wait()
+        finally:
+            del network.tcp_servers[(host, self.port)]
+            for handshake in self._handshakes:
+                handshake.cancel()
+
+    def accept(self, transport: MemoryStreamTransport):
+        """Accepts the server end of a new connection"""
+        handshake = asyncio.create_task(self._accept(transport))
+        self._handshakes.add(handshake)
+        handshake.add_done_callback(self._handshakes.discard)
+
+    async def _accept(self, transport: MemoryStreamTransport):
+        try:
+            reader, writer = await open_memory_stream(
+                transport, self.ssl_context, server_side=True
+            )
+        except (ConnectionError, SSLError) as exc:
+            logger.warning(f"In-memory connection failed: {exc}")
+            return
+        await self(reader, writer)
+
+
+class MemoryUDPClient(UDPClient):
+    """The EVCC's SDP client, sending its SDP requests to the SECC's port"""
+
+    def __init__(
+        self,
+        session_handler_queue: asyncio.Queue,
+        iface: str,
+        secc_custom_sdp_port: Optional[int],
+        transport: "MemoryTransport",
+    ):
+        super().__init__(session_handler_queue, iface, secc_custom_sdp_port)
+        self.memory_transport = transport
+
+    async def start(self):
+        network = self.memory_transport.network
+        self._transport = MemoryDatagramTransport(
+            network, (self.memory_transport.host, network.next_port(), 0, 0), self
+        )
+        self.connection_made(self._transport)
+
+
+class MemoryTransport(ITransport):
+    """The transport of one EVCC or SECC, at its address in the MemoryNetwork"""
+
+    def __init__(self, network: "MemoryNetwork", host: str):
+        self.network = network
+        self.host = host
+
+    def create_udp_server(
+        self,
+        session_handler_queue: asyncio.Queue,
+        iface: str,
+        sdp_port: Optional[int] = None,
+    ) -> MemoryUDPServer:
+        return MemoryUDPServer(session_handler_queue, iface, sdp_port, self)
+
+    def create_tcp_server(
+        self, session_handler_queue: asyncio.Queue, iface: str
+    ) -> MemoryTCPServer:
+        return MemoryTCPServer(session_handler_queue, iface, self)
+
+    def create_udp_client(
+        self,
+        session_handler_queue: asyncio.Queue,
+        iface: str,
+        sdp_port: Optional[int] = None,
+    ) -> MemoryUDPClient:
+        return MemoryUDPClient(session_handler_queue, iface, sdp_port, self)
+
+    async def create_tcp_client(
+        self,
+        host: IPv6Address,
+        port: int,
+        session_handler_queue: asyncio.Queue,
+        is_tls: bool,
+        iface: str,
+    ) -> TCPClient:
+        tcp_client = TCPClient(session_handler_queue, port, is_tls)
+        tcp_client.reader, tcp_client.writer = await self.network.open_connection(
+            self.host, host.compressed, port, tcp_client.ssl_context
+        )
+        record_tls_handshake(tcp_client.writer.get_extra_info("ssl_object"), False)
+        return tcp_client
+
+
+class MemoryNetwork:
+    """Connects the MemoryTransports created with transport()"""
+
+    def __init__(self):
+        self._hosts = itertools.count(1)
+        self._ports = itertools.count(49152)
+        # The datagram protocols, keyed by their (host, port)
+        self.datagram_endpoints: Dict[Tuple[str, int], asyncio.DatagramProtocol] = {}
+        # The listening TCP servers, keyed by their (host, port)
+        self.tcp_servers: Dict[Tuple[str, int], MemoryTCPServer] = {}
+
+    def transport(self) -> MemoryTransport:
+        """A transport at a new IPv6 address of this network"""
+        return MemoryTransport(
+            self, (MEMORY_NETWORK_PREFIX + next(self._hosts)).compressed
+        )
+
+    def next_port(self) -> int:
+        """A port number for a client endpoint"""
+        return next(self._ports)
+
+    def send_datagram(
+        self, data: bytes, address: Tuple[Any, ...], sender: Tuple[Any, ...]
+    ):
+        """
+        Passes the datagram on to the endpoint at the given address, if there
+        is any (like UDP, silently dropping it otherwise)
+        """
+        protocol = self.datagram_endpoints.get(tuple(address[:2]))
+        if protocol is not None:
+            asyncio.get_running_loop().call_soon(
+                protocol.datagram_received, data, sender
+            )
+
+    async def open_connection(
+        self,
+        client_host: str,
+        host: str,
+        port: int,
+        ssl_context: Optional[SSLContext] = None,
+    ) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        """
+        Connects to the TCP server at the given host and port, returning the
+        client's StreamReader and StreamWriter
+        """
+        tcp_server = self.tcp_servers.get((host, port))
+        if tcp_server is None:
+            raise ConnectionRefusedError(
+                errno.ECONNREFUSED, f"No server listening at {host} port {port}"
+            )
+        client, server = MemoryStreamTransport.pair(
+            (client_host, self.next_port(), 0, 0), (host, port, 0, 0)
+        )
+        tcp_server.accept(server)
+        return await open_memory_stream(
+            client, ssl_context, server_side=False, server_hostname=host
+        )
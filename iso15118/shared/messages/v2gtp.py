@@ -191,24 +191,37 @@ class V2GTPMessage:
         # The smallest possible datagram is a V2GTP message with an
         # SDP request of 2 bytes
         if len(data) >= 10:
-            header = data[:8]
-
-            payload_type: Union[ISOV2PayloadTypes, ISOV20PayloadTypes]
-            if cls.is_header_valid(protocol, header):
-                if protocol.ns.startswith("urn:iso:std:iso:15118:-20"):
-                    payload_type = ISOV20PayloadTypes(cls.get_payload_type(header))
-                else:
-                    payload_type = ISOV2PayloadTypes(cls.get_payload_type(header))
-                return V2GTPMessage(protocol, payload_type, data[8:])
-            raise InvalidV2GTPMessageError(
-                "Not a valid V2GTP message " "(header check failed)"
-            )
+            # Check the header on a view, so only the payload is copied
+            data_view = memoryview(data)
+            return cls.from_frame(protocol, data_view[:8], bytes(data_view[8:]))
         raise InvalidV2GTPMessageError(
             f"Incoming data is too short to be "
             "a valid V2GTP message"
             f" (only {len(data)} bytes)"
         )
 
+    @classmethod
+    def from_frame(
+        cls, protocol: Protocol, header: Union[bytes, memoryview], payload: bytes
+    ) -> "V2GTPMessage":
+        """
+        Creates a V2GTP message from its header and payload, read separately
+        from a byte stream (see V2GTPStreamReader). The payload is used as is.
+
+        Raises:
+            InvalidV2GTPMessageError
+        """
+        payload_type: Union[ISOV2PayloadTypes, ISOV20PayloadTypes]
+        if cls.is_header_valid(protocol, header):
+            if protocol.ns.startswith("urn:iso:std:iso:15118:-20"):
+                payload_type = ISOV20PayloadTypes(cls.get_payload_type(header))
+            else:
+                payload_type = ISOV2PayloadTypes(cls.get_payload_type(header))
+            return V2GTPMessage(protocol, payload_type, payload)
+        raise InvalidV2GTPMessageError(
+            "Not a valid V2GTP message " "(header check failed)"
+        )
+
     def __repr__(self):
         return (
             f"[Header = [{hex(self.protocol_version)}, "
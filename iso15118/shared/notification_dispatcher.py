@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationDispatcher:
+    """
+    Processes the notifications of a session handler's receiving queue in
+    lanes. The notifications of one lane (e.g. those of one peer) are
+    processed one after the other, in the order they came in, while those of
+    different lanes are processed concurrently. So a slow SDP exchange or
+    session stop of one peer doesn't hold up the other peers.
+
+    At most max_lanes lanes are processed at once, the others wait for a
+    free slot. A lane ends as soon as it has no notifications left.
+
+    The dispatcher measures how long the notifications waited in their lane
+    and how long processing them took. Other items than notifications (e.g.
+    the messages of the OCPP outbox) can be dispatched the same way.
+    """
+
+    def __init__(
+        self,
+        process: Callable[[Any], Awaitable[None]],
+        lane_key: Callable[[Any], Hashable],
+        max_lanes: int = 64,
+    ):
+        self._process = process
+        self._lane_key = lane_key
+        self._lane_slots = asyncio.Semaphore(max_lanes)
+        self._queue: Optional[asyncio.Queue] = None
+        # The notifications of each lane not processed yet, with the time
+        # they were dispatched
+        self._lanes: Dict[Hashable, Deque[Tuple[Any, float]]] = {}
+        self._lane_tasks: Dict[Hashable, asyncio.Task] = {}
+        self.processed = 0
+        self.failed = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.total_processing_seconds = 0.0
+        self.max_processing_seconds = 0.0
+
+    async def run(self, queue: asyncio.Queue):
+        """Dispatches the notifications coming in on the queue until cancelled"""
+        self._queue = queue
+        try:
+            while True:
+                try:
+                    notification = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    notification = await queue.get()
+                self.dispatch(notification)
+        finally:
+            for lane_task in list(self._lane_tasks.values()):
+                lane_task.cancel()
+
+    def dispatch(self, notification: Any):
+        """Queues the notification in its lane, starting the lane if needed"""
+        key = self._lane_key(notification)
+        lane = self._lanes.get(key)
+        if lane is None:
+            lane = self._lanes[key] = deque()
+            self._lane_tasks[key] = asyncio.create_task(self._run_lane(key, lane))
+        lane.append((notification, time.monotonic()))
+
+    async def _run_lane(self, key: Hashable, lane: Deque[Tuple[Any, float]]):
+        try:
+            async with self._lane_slots:
+                while lane:
+                    notification, dispatched_at = lane[0]
+                    started_at = time.monotonic()
+                    try:
+                        await self._process(notification)
+                    except Exception as exc:
+                        self.failed += 1
+                        logger.exception(
+                            f"{exc.__class__.__name__} while processing "
+                            f"{notification.__class__.__name__}: {exc}"
+                        )
+                    finally:
+                        lane.popleft()
+                        self._record(started_at - dispatched_at, started_at)
+                        if self._queue is not None:
+                            self._queue.task_done()
+        finally:
+            # Without awaiting anything after the lane ran empty, so no
+            # notification can be dispatched to it in between
+            del self._lanes[key]
+            del self._lane_tasks[key]
+
+    def _record(self, wait_seconds: float, started_at: float):
+        processing_seconds = time.monotonic() - started_at
+        self.processed += 1
+        self.total_wait_seconds += wait_seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+        self.total_processing_seconds += processing_seconds
+        self.max_processing_seconds = max(
+            self.max_processing_seconds, processing_seconds
+        )
+
+    @property
+    def queue_depth(self) -> int:
+        """The notifications received but not processed yet"""
+        queued = self._queue.qsize() if self._queue is not None else 0
+        return queued + sum(len(lane) for lane in self._lanes.values())
+
+    def stats(self) -> dict:
+        processed = self.processed
+        return {
+            "queued": self.queue_depth,
+            "lanes": len(self._lanes),
+            "processed": processed,
+            "failed": self.failed,
+            "mean_wait_ms": (
+                self.total_wait_seconds / processed * 1000 if processed else 0.0
+            ),
+            "max_wait_ms": self.max_wait_seconds * 1000,
+            "mean_processing_ms": (
+                self.total_processing_seconds / processed * 1000 if processed else 0.0
+            ),
+            "max_processing_ms": self.max_processing_seconds * 1000,
+        }
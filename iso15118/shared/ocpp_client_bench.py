@@ -2,12 +2,16 @@ import asyncio
 import logging
 import time
 import csv
-import psutil
 from datetime import datetime
 import uuid
+from iso15118.shared.benchmark_recorder import BenchmarkRecorder
+from iso15118.shared.csms_connection import CSMSConnectionManager, CSMSEndpoint
 from iso15118.shared.find_ip_addr import ip_address_assign
-import sys
-import json
+from iso15118.shared.ocpp_outbox import OCPPOutbox
+from iso15118.shared.ocpp_wire_stats import SUMMARY_HEADER, OCPPWireStats
+from iso15118.shared.settings import SettingKey, shared_settings
+from iso15118.shared.utils import cancel_task
+from typing import List, Optional
 
 try:
     import websockets
@@ -24,26 +28,8 @@ from ocpp.routing import on, after
 from ocpp.v201 import ChargePoint as cp
 from ocpp.v201 import call, call_result
 
-from dataclasses import is_dataclass
-
 logging.basicConfig(level=logging.ERROR)
 
-def get_dataclass_size(obj):
-    """Recursively calculates the size of a dataclass instance."""
-    size = sys.getsizeof(obj)
-    # Check if it's a dataclass instance before proceeding
-    if is_dataclass(obj):
-        for field in obj.__dataclass_fields__.values():
-            attr = getattr(obj, field.name)
-            if isinstance(attr, (list, dict)):
-                size += sum(get_dataclass_size(x) for x in attr)
-            elif is_dataclass(attr):  # Recursive call for nested dataclasses
-                size += get_dataclass_size(attr)
-            else:
-                size += sys.getsizeof(attr)
-
-    return size
-
 class ChargePoint(cp):
     def __init__(self, charge_point_id, websocket):
         super(cp, self).__init__(charge_point_id, websocket)
@@ -81,59 +67,72 @@ class ChargePoint(cp):
         self.evMaxVoltage = None
     
         self.charging_profile = None
+        # Resolved with the charging profile the CSMS sets for this EVSE
+        self._charging_profile_request: Optional[asyncio.Future] = None
         self.start_time_on_set_charging_profile = 0
         self.end_time_on_set_charging_profile = 0
+
+        # The requests the ISO 15118 states don't need to wait for, sent to
+        # the CSMS in the background
+        self.outbox = OCPPOutbox(
+            self.call,
+            shared_settings.get(SettingKey.OCPP_OUTBOX_MAX_ATTEMPTS, 3),
+            shared_settings.get(SettingKey.OCPP_OUTBOX_RETRY_DELAY, 1.0),
+        )
         
 
-        # Initialize IP generator base values
+        # The CSMS nodes of the experiment setup
         self.local_ip_addresses = ['127.0.0.1', '0.0.0.0', '192.168.219.15']
-        self.local_ip_index = 0
         self.ip_base = ".".join(self.my_address.split('.')[:3])
-        self.current_octet = 0
+        self.csms = CSMSConnectionManager(
+            self.csms_endpoints(),
+            self.open_websocket,
+            shared_settings.get(SettingKey.CSMS_PARALLEL_CONNECTS, 3),
+            shared_settings.get(SettingKey.CSMS_CONNECT_TIMEOUT, 5.0),
+            backoff_max=shared_settings.get(SettingKey.CSMS_RECONNECT_BACKOFF_MAX, 30.0),
+        )
+        # Set while connected to a CSMS, _connection_lost is resolved once
+        # that connection is lost
+        self._csms_connected = asyncio.Event()
+        self._connection_lost: Optional[asyncio.Future] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
 
         # Initialize file for benchmarks
         current_time = datetime.now().strftime("%m-%d-%Y")
         self.benchmark_file = f"client_exp_data_for_evse_id_{self.cp_id}_on_{current_time}.csv"
-        with open(self.benchmark_file, mode='w', newline='') as file:
-            writer = csv.writer(file)
-            writer.writerow(["Timestamp", "Message", "Latency","Throughput", "CPU_Usage", "Memory_Usage", "TransactionID", "EVSEID", "CPID", "Interval", "CSMSAddress"])
-
-    def record_benchmark(self, message_name, start_time, end_time, total_size):
-        latency = end_time - start_time
-        cpu_usage = psutil.cpu_percent()
-        memory_usage = psutil.virtual_memory().percent
-        throughput = (total_size * 8) / (latency * 1_000_000)
-        with open(self.benchmark_file, mode='a', newline='') as file:
-            writer = csv.writer(file)
-            writer.writerow([
-                datetime.now().isoformat(), message_name, latency, throughput, cpu_usage, memory_usage, 
-                self.transaction_id, self.evse_id, self.cp_id, self._heartbeat_interval, self.csms_address
-            ])
+        self.benchmarks = BenchmarkRecorder(
+            self.benchmark_file,
+            ["Timestamp", "Message", "Latency","Throughput", "CPU_Usage", "Memory_Usage", "TransactionID", "EVSEID", "CPID", "Interval", "CSMSAddress"],
+            shared_settings.get(SettingKey.BENCHMARK_BUFFER_SIZE, 10000),
+            shared_settings.get(SettingKey.BENCHMARK_FLUSH_INTERVAL, 1.0),
+        )
+        self.wire_stats = OCPPWireStats(self.record_benchmark)
+        self.wire_summary_file = f"client_summary_for_evse_id_{self.cp_id}_on_{current_time}.csv"
+
+    def record_benchmark(self, message_name, latency, total_size):
+        """
+        Buffers a benchmark row of an OCPP call measured by wire_stats,
+        total_size being the bytes of the request and response frames. The
+        CPU and memory usage are the ones sampled last by the recorder.
+        """
+        throughput = (total_size * 8) / (latency * 1_000_000) if latency else 0.0
+        self.benchmarks.record([
+            datetime.now().isoformat(), message_name, latency, throughput,
+            self.benchmarks.cpu_usage, self.benchmarks.memory_usage,
+            self.transaction_id, self.evse_id, self.cp_id, self._heartbeat_interval, self.csms_address
+        ])
     
     def start_session_benchmark(self, session_id:str, start_time:datetime, ocpp_server_id:str):
         self.session_ids.update({session_id: [start_time, ocpp_server_id]})
     
     def end_session_benchmark(self, session_id, stop_time, energy_requested, evid, ocpp_server_id):
-        with open(self.benchmark_file, mode='a', newline='') as file:
-            writer = csv.writer(file)
-            writer.writerow([
-                datetime.now().isoformat(),self.session_ids[session_id] , self.session_ids[session_id][0], stop_time, energy_requested, 
-                evid, self.session_ids[session_id][1], ocpp_server_id
-            ])
+        self.benchmarks.record([
+            datetime.now().isoformat(),self.session_ids[session_id] , self.session_ids[session_id][0], stop_time, energy_requested, 
+            evid, self.session_ids[session_id][1], ocpp_server_id
+        ])
         self.session_ids.pop(session_id)
 
     
-    #Calculate throughput
-    """
-        #First calculate the total size of the message exchanged
-        msg_size = sys.getsizeof(get_dataclass_size(ocpp_request)) + sys.getsizeof(get_dataclass_size(response))
-        #Pickup the total latency of the round trip time of the message
-        latency = end_time - start_time
-        #Calculate the throughput
-        ocpp_throughput = (msg_size * 8) / (total_latency * 1_000_000)
-    """
-
-
     def update_boot_status(self, new_value: bool):
         self._station_booted = new_value
 
@@ -145,22 +144,18 @@ class ChargePoint(cp):
             self._secc_previous_state = self._secc_current_state
 
     async def send_boot_notification(self):
-        start_time = time.time()
         ocpp_request =  call.BootNotification(
             charging_station={"model": "Wallbox INESCTEC_TLO", "vendor_name": "INESCTEC"},
             reason="PowerUp",
         )
         response = await self.call(ocpp_request)
-        end_time = time.time()
-        total_size = sys.getsizeof(get_dataclass_size(ocpp_request)) + sys.getsizeof(get_dataclass_size(response))
-        self.record_benchmark("BootNotification", start_time,end_time,total_size)
 
         self._heartbeat_interval = response.interval
 
         if response.status == "Accepted":
             print("Connected to central system.")
             self.update_boot_status(True)
-            heartbeat_task = asyncio.create_task(self.send_heartbeat(self._heartbeat_interval))
+            self._heartbeat_task = asyncio.create_task(self.send_heartbeat(self._heartbeat_interval))
             await asyncio.sleep(0.5)
         elif response.status == "Rejected":
             await self._connection.close()
@@ -168,15 +163,29 @@ class ChargePoint(cp):
     async def send_heartbeat(self, interval):
         ocpp_request = call.Heartbeat()
         while True:
-            start_time = time.time()
-            ocpp_response = await self.call(ocpp_request)
-            end_time = time.time()
-            total_size = sys.getsizeof(get_dataclass_size(ocpp_request)) + sys.getsizeof(get_dataclass_size(ocpp_response))
-            self.record_benchmark("Heartbeat", start_time, end_time, total_size)
+            await self.call(ocpp_request)
             await asyncio.sleep(interval)
 
-    async def send_transaction_event(self):
-        start_time = time.time()
+    async def _send(self, message):
+        self.wire_stats.sent(message)
+        await super()._send(message)
+
+    async def route_message(self, raw_msg):
+        self.wire_stats.received(raw_msg)
+        await super().route_message(raw_msg)
+
+    def write_wire_summary(self):
+        """Writes the round trip times and bytes per OCPP action measured so far"""
+        with open(self.wire_summary_file, mode='w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(SUMMARY_HEADER)
+            writer.writerows(self.wire_stats.summary_rows())
+
+    def queue_transaction_event(self) -> Optional[asyncio.Future]:
+        """
+        Queues the TransactionEvent matching the current SECC state in the
+        outbox, without waiting for the CSMS
+        """
         if self.transaction_id is None:
             self.transaction_id = "LOC_" + datetime.now().strftime("%m-%d-%Y_%H-%M-%S")
         if self._secc_current_state == "SessionSetup":
@@ -187,7 +196,6 @@ class ChargePoint(cp):
                 seq_no=0,
                 transaction_info={'transactionId': self.transaction_id, 'chargingState': "EVConnected"},
             )
-            ocpp_response = await self.call(ocpp_request)
         elif self._secc_current_state == "SessionStop":
             ocpp_request = call.TransactionEvent(
                 event_type="Ended",
@@ -196,42 +204,36 @@ class ChargePoint(cp):
                 seq_no=0,
                 transaction_info={'transactionId': self.transaction_id, 'chargingState': "SuspendedEV"},
             )
-            ocpp_response = await self.call(ocpp_request)
         else:
-            ocpp_request = None
-        end_time = time.time()
-        total_size = sys.getsizeof(get_dataclass_size(ocpp_request)) + sys.getsizeof(get_dataclass_size(ocpp_response))
-        self.record_benchmark("TransactionEvent", start_time, end_time, total_size)
+            return None
+        return self.outbox.submit(ocpp_request, self.transaction_id)
 
-    async def send_status_notification(self):
-        start_time = time.time()
+    def queue_status_notification(self) -> Optional[asyncio.Future]:
+        """
+        Queues the StatusNotification matching the current SECC state in the
+        outbox, without waiting for the CSMS
+        """
         if "SupportedAppProtocol" in self._secc_current_state:
             self.connector_status = "Occupied"
-            ocpp_request = call.StatusNotification(timestamp=datetime.now().strftime('%Y-%m-%d T %H:%M:%S '),
-                                                   connector_status=self.connector_status,
-                                                   evse_id=self.evse_id,
-                                                   connector_id=1)
-            response = await self.call(ocpp_request)
         elif "SessionStop" in self._secc_current_state:
             self.connector_status = "Available"
-            ocpp_request = call.StatusNotification(timestamp=datetime.now().strftime('%Y-%m-%d T %H:%M:%S '),
-                                                   connector_status=self.connector_status,
-                                                   evse_id=self.evse_id,
-                                                   connector_id=1)
-            response = await self.call(ocpp_request)
         else:
-            ocpp_request = None
-        end_time = time.time()
-        total_size = sys.getsizeof(get_dataclass_size(ocpp_request)) + sys.getsizeof(get_dataclass_size(response))
-        self.record_benchmark("StatusNotification", start_time, end_time, total_size)
+            return None
+        ocpp_request = call.StatusNotification(timestamp=datetime.now().strftime('%Y-%m-%d T %H:%M:%S '),
+                                               connector_status=self.connector_status,
+                                               evse_id=self.evse_id,
+                                               connector_id=1)
+        return self.outbox.submit(ocpp_request)
 
     async def send_authorize(self):
-        start_time = time.time()
+        """
+        Sends the Authorize request through the outbox and returns whether
+        the CSMS accepted the ID token. Not being a transaction message, it
+        doesn't wait for the transaction's requests queued before (e.g. a
+        TransactionEvent being retried)
+        """
         ocpp_request = call.Authorize(id_token={"idToken": str(self.id_token), "type": self.id_token_type})
-        response = await self.call(ocpp_request)
-        end_time = time.time()
-        total_size = sys.getsizeof(get_dataclass_size(ocpp_request)) + sys.getsizeof(get_dataclass_size(response))
-        self.record_benchmark("Authorize", start_time, end_time, total_size)
+        response = await self.outbox.submit(ocpp_request)
         if response.id_token_info['status'] == 'Accepted':
             self._session_authorized = True
         else:
@@ -248,8 +250,24 @@ class ChargePoint(cp):
         self.evMaxCurrent = evMaxCurrent
         self.evMaxVoltage = evMaxVoltage
 
-    async def send_notify_ev_charging_needs(self):
-        start_time = time.time()
+    def request_charging_profile(self) -> asyncio.Future:
+        """
+        Queues a NotifyEVChargingNeeds with the EV's charging needs in the
+        outbox and returns a future resolved with the charging profile of
+        the CSMS's SetChargingProfile request for this EVSE, or with None
+        right away if there are no charging needs to send
+        """
+        if self._charging_profile_request and not self._charging_profile_request.done():
+            # Asked for by a previous session, so a charging profile the CSMS
+            # sets from now on doesn't resolve it
+            self._charging_profile_request.cancel()
+        charging_profile_request = asyncio.get_running_loop().create_future()
+        self._charging_profile_request = charging_profile_request
+        if self.charging_profile:
+            # Set by the CSMS before the EV asked for it
+            charging_profile_request.set_result(self.charging_profile)
+            self.charging_profile = None
+            return charging_profile_request
         if self.eAmount:
             self.max_schedule_tuples = 1
             requestedEnergyTransfer = "AC_single_phase"
@@ -263,90 +281,105 @@ class ChargePoint(cp):
                                 'departureTime': str(self.departureTime)},
                 evse_id=self.evse_id,
                 max_schedule_tuples=int(self.max_schedule_tuples))
+            self.start_time_on_set_charging_profile = time.perf_counter()
+            notify_response = self.outbox.submit(ocpp_request, self.transaction_id)
+            notify_response.add_done_callback(
+                lambda response: self._on_notify_ev_charging_needs_response(
+                    response, charging_profile_request
+                )
+            )
+        else:
+            # Without the charging needs, the CSMS won't send a charging profile
+            charging_profile_request.set_result(None)
+        return charging_profile_request
+
+    @staticmethod
+    def _on_notify_ev_charging_needs_response(
+        response: asyncio.Future, charging_profile_request: asyncio.Future
+    ):
+        # Without the charging needs, the CSMS won't send a charging profile
+        if charging_profile_request.done() or response.cancelled():
+            return
+        if response.exception():
+            charging_profile_request.set_exception(response.exception())
 
-            response = await self.call(ocpp_request)
-            end_time = time.time()
-            total_size = sys.getsizeof(get_dataclass_size(ocpp_request)) + sys.getsizeof(get_dataclass_size(response))
-            self.record_benchmark("NotifyEVChargingNeeds", start_time, end_time, total_size)
-            await asyncio.sleep(1)
-            self.start_time_on_set_charging_profile = time.time()
-            return response
-    
     @on("SetChargingProfile")
     def on_set_charging_profile(self, evse_id, charging_profile):
-        self.end_time_on_set_charging_profile = time.time()
-        total_size = sys.getsizeof(json.dumps(evse_id)) + sys.getsizeof(json.dumps(charging_profile))
-        """ 
-        self.record_benchmark("SetChargingProfile", 
-                              self.start_time_on_set_charging_profile, 
-                              self.end_time_on_set_charging_profile, 
-                              total_size)
-        """
+        self.end_time_on_set_charging_profile = time.perf_counter()
         logging.info(f"Received charging profile from CSMS; {charging_profile}")
         if evse_id == self.evse_id:
-            self.charging_profile = charging_profile
+            if self._charging_profile_request and not self._charging_profile_request.done():
+                self._charging_profile_request.set_result(charging_profile)
+            else:
+                # Kept until the EV asks for a charging profile
+                self.charging_profile = charging_profile
         return call_result.SetChargingProfile(status="Accepted")
     
-    def ip_generator(self):
-        # Check if we need to return a local IP address
-        if self.local_ip_index < len(self.local_ip_addresses):
-            new_ip = self.local_ip_addresses[self.local_ip_index]
-            self.local_ip_index += 1
-            return new_ip
-        
-        # Generate the next IP in the sequence within the range .20 to .40
-        new_ip = f"{self.ip_base}.{self.current_octet}"
-        self.current_octet += 1
-
-        # Reset the current_octet and local_ip_index when wrapping around
-        if self.current_octet > 30:
-            self.current_octet = 20
-            self.local_ip_index = 0
-        """
-        # Generate the next IP in the sequence
-        new_ip = f"{self.ip_base}.{self.current_octet}"
-        self.current_octet = (self.current_octet + 1) % 256
-
-        # Reset local IP index when wrapping around
-        if self.current_octet == 0:
-            self.local_ip_index = 0
-        """
-        return new_ip
-    
-    async def get_csms_address(self):
+    def csms_endpoints(self) -> List[CSMSEndpoint]:
+        endpoints = shared_settings.get(SettingKey.CSMS_ENDPOINTS)
+        if endpoints:
+            return [CSMSEndpoint.parse(endpoint) for endpoint in endpoints]
         if self.experiment: #Fixed port in different devices
-            if self.my_address:
-                self.csms_address = self.ip_generator()
-            else:
-                self.my_address = ip_address_assign()
-            self.ocpp_port = self.csms_base_port
-        else:
-            if self.ocpp_port > 2920:
-                self.ocpp_port = 2910
-            else:
-                self.ocpp_port += 1
-        
-        return self.csms_address, self.ocpp_port
+            hosts = self.local_ip_addresses + [f"{self.ip_base}.{octet}" for octet in range(20, 31)]
+            return [CSMSEndpoint(host, self.csms_base_port) for host in hosts]
+        return [CSMSEndpoint(self.csms_address, port) for port in range(2910, 2921)]
 
-    async def websocket_connection(self, csms_addr, csms_port):
+    async def open_websocket(self, endpoint: CSMSEndpoint):
+        return await websockets.connect(
+            f"ws://{endpoint.host}:{endpoint.port}/CP0{self.cp_id}", subprotocols=["ocpp2.0.1"]
+        )
+
+    async def call(self, payload, suppress=True, unique_id=None):
+        """
+        Sends the call once connected to a CSMS, waiting for the connection
+        at most the response timeout. If the connection is lost before the
+        response arrived, the call fails with a ConnectionError right away
+        instead of after the response timeout, so the outbox sends it again
+        on the next connection.
+        """
+        await asyncio.wait_for(self._csms_connected.wait(), self._response_timeout)
+        connection_lost = self._connection_lost
+        started_at = time.perf_counter()
+        call_task = asyncio.ensure_future(
+            super().call(payload, suppress, unique_id)
+        )
+        try:
+            await asyncio.wait({call_task, connection_lost}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            if not call_task.done():
+                await cancel_task(call_task)
+        if call_task.cancelled():
+            raise ConnectionError(f"Connection to CSMS lost during {payload.__class__.__name__}")
+        response = call_task.result()
+        self.csms.record_round_trip(time.perf_counter() - started_at)
+        return response
+
+    async def websocket_connection(self, endpoint: CSMSEndpoint, ws):
+        self._connection = ws
+        self.csms_address, self.ocpp_port = endpoint.host, endpoint.port
+        self._connection_lost = asyncio.get_running_loop().create_future()
+        self._csms_connected.set()
+        boot_task = asyncio.create_task(self.send_boot_notification())
         try:
-            async with websockets.connect(
-                f"ws://{csms_addr}:{csms_port}/CP0{self.cp_id}", subprotocols=["ocpp2.0.1"]
-            ) as ws:
-                self._connection = ws
-                # Start the other tasks once the WebSocket connection is established
-                start_task = asyncio.create_task(self.start())
-                boot_task = asyncio.create_task(self.send_boot_notification())
-                # Wait for the tasks to complete
-                await asyncio.gather(start_task, boot_task)
+            await self.start()
         except Exception as e:
             logging.info(str(e))
-            timestamp = time.time()
-            #self.record_benchmark(str(e), timestamp, timestamp + 0.01, 0)
+        finally:
+            self._csms_connected.clear()
+            self._connection_lost.set_result(None)
+            tasks = [task for task in (boot_task, self._heartbeat_task) if task]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.csms.disconnected()
+            await ws.close()
 
-    
     async def ocpp_cli_routine(self):
-        while True:
-            self.csms_address, self.ocpp_port = await self.get_csms_address()
-            await self.websocket_connection(self.csms_address, self.ocpp_port)
-            await asyncio.sleep(0.5)
+        benchmarks_task = asyncio.create_task(self.benchmarks.run())
+        try:
+            while True:
+                endpoint, ws = await self.csms.connect()
+                await self.websocket_connection(endpoint, ws)
+        finally:
+            await cancel_task(benchmarks_task)
+            self.write_wire_summary()
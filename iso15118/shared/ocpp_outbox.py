@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+from iso15118.shared.notification_dispatcher import NotificationDispatcher
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxMessage:
+    """An OCPP request waiting to be sent, and the future of its response"""
+
+    __slots__ = ("request", "transaction_id", "response", "queued_at")
+
+    def __init__(self, request: Any, transaction_id: Optional[str]):
+        self.request = request
+        self.transaction_id = transaction_id
+        self.response: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.queued_at = time.monotonic()
+
+
+def _transaction_id(message: OutboxMessage) -> Hashable:
+    return message.transaction_id
+
+
+def _retrieve_exception(response: asyncio.Future):
+    # Most requests are sent fire-and-forget, their failures are logged by
+    # the dispatcher already
+    if not response.cancelled():
+        response.exception()
+
+
+class OCPPOutbox:
+    """
+    Sends the OCPP requests of a charging station to the CSMS in the
+    background, so the ISO 15118 states don't wait for the CSMS before
+    answering the EV.
+
+    The requests of one transaction are sent one after the other, in the
+    order they were submitted, the requests of the station itself (without
+    transaction) in a lane of their own. A request failing (e.g. with a
+    timeout) is sent again after retry_delay seconds, doubling the delay with
+    each attempt, up to max_attempts times. A request whose connection was
+    lost (ConnectionError) is sent again right away, call waiting for the
+    next connection.
+
+    submit() returns the future of the response, which only needs to be
+    awaited if the next ISO 15118 message depends on the CSMS's reply (e.g.
+    the authorization).
+    """
+
+    def __init__(
+        self,
+        call: Callable[[Any], Awaitable[Any]],
+        max_attempts: int = 3,
+        retry_delay: float = 1.0,
+    ):
+        self._call = call
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._dispatcher = NotificationDispatcher(self._send, _transaction_id)
+        self.retries = 0
+        self.failed = 0
+        self.max_lag_seconds = 0.0
+
+    def submit(
+        self, request: Any, transaction_id: Optional[str] = None
+    ) -> asyncio.Future:
+        message = OutboxMessage(request, transaction_id)
+        message.response.add_done_callback(_retrieve_exception)
+        self._dispatcher.dispatch(message)
+        return message.response
+
+    async def _send(self, message: OutboxMessage):
+        name = message.request.__class__.__name__
+        for attempt in range(self.max_attempts):
+            try:
+                response = await self._call(message.request)
+            except Exception as exc:
+                if attempt + 1 == self.max_attempts:
+                    self.failed += 1
+                    if not message.response.done():
+                        message.response.set_exception(exc)
+                    raise
+                self.retries += 1
+                if isinstance(exc, ConnectionError):
+                    delay = 0.0
+                else:
+                    delay = self.retry_delay * 2**attempt
+                logger.warning(
+                    f"{name} failed ({exc.__class__.__name__}: {exc}), "
+                    f"sending it again in {delay:.1f} s"
+                )
+                await asyncio.sleep(delay)
+            else:
+                # The time from submitting the request until its response
+                lag = time.monotonic() - message.queued_at
+                self.max_lag_seconds = max(self.max_lag_seconds, lag)
+                if not message.response.done():
+                    message.response.set_result(response)
+                return
+
+    @property
+    def queue_depth(self) -> int:
+        """The requests not sent yet"""
+        return self._dispatcher.queue_depth
+
+    def stats(self) -> dict:
+        dispatcher_stats = self._dispatcher.stats()
+        return {
+            "queued": dispatcher_stats["queued"],
+            "lanes": dispatcher_stats["lanes"],
+            "sent": dispatcher_stats["processed"] - dispatcher_stats["failed"],
+            "retries": self.retries,
+            "failed": self.failed,
+            "mean_queue_lag_ms": dispatcher_stats["mean_wait_ms"],
+            "max_queue_lag_ms": dispatcher_stats["max_wait_ms"],
+            "max_response_lag_ms": self.max_lag_seconds * 1000,
+        }
@@ -0,0 +1,165 @@
+import json
+import logging
+import math
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# The OCPP-J message type IDs
+CALL = 2
+CALL_RESULT = 3
+CALL_ERROR = 4
+
+# The round trip times kept per action for the percentiles
+MAX_SAMPLES = 10000
+# The calls waiting for their response, older ones never got one
+MAX_PENDING_CALLS = 1024
+PERCENTILES = (50, 95, 99)
+
+SUMMARY_HEADER = [
+    "Action",
+    "Calls",
+    "Errors",
+    "RequestBytes",
+    "ResponseBytes",
+    "BytesPerSecond",
+    "MeanRTT_ms",
+] + [f"P{percentile}RTT_ms" for percentile in PERCENTILES]
+
+
+class _PendingCall:
+    __slots__ = ("action", "size", "at")
+
+    def __init__(self, action: str, size: int, at: float):
+        self.action = action
+        self.size = size
+        self.at = at
+
+
+class _ActionStats:
+    __slots__ = (
+        "calls",
+        "errors",
+        "request_bytes",
+        "response_bytes",
+        "round_trip_time",
+        "round_trips",
+    )
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.round_trip_time = 0.0
+        self.round_trips: Deque[float] = deque(maxlen=MAX_SAMPLES)
+
+
+def percentile(sorted_values: Sequence[float], percent: float) -> float:
+    """The nearest-rank percentile of the already sorted values"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(percent / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def frame_header(frame: str) -> Optional[Tuple[int, str, Optional[str]]]:
+    """The message type ID, unique ID and, for calls, action of an OCPP-J frame"""
+    try:
+        message = json.loads(frame)
+        message_type_id, unique_id = message[0], message[1]
+    except (ValueError, TypeError, IndexError, KeyError):
+        return None
+    action = message[2] if message_type_id == CALL and len(message) > 2 else None
+    return message_type_id, unique_id, action
+
+
+class OCPPWireStats:
+    """
+    Measures the OCPP-J frames of a websocket connection as they are sent
+    and received: their size in bytes (UTF-8 encoded, as on the wire) and
+    the round trip time of each call, correlating a call and its
+    CallResult or CallError by their unique ID.
+
+    The calls of the charging station are measured from sending the call
+    until receiving its response, the calls of the CSMS (e.g.
+    SetChargingProfile) from receiving the call until sending the response.
+    on_exchange, if given, is called with the action, the round trip time
+    in seconds and the bytes of request and response of each completed
+    call.
+    """
+
+    def __init__(self, on_exchange: Optional[Callable[[str, float, int], None]] = None):
+        self.on_exchange = on_exchange
+        self._pending: Dict[str, _PendingCall] = {}
+        self._actions: Dict[str, _ActionStats] = {}
+
+    def sent(self, frame: str, now: Optional[float] = None):
+        self._frame(frame, time.perf_counter() if now is None else now)
+
+    def received(self, frame: str, now: Optional[float] = None):
+        self._frame(frame, time.perf_counter() if now is None else now)
+
+    def _frame(self, frame: str, now: float):
+        header = frame_header(frame)
+        if header is None:
+            logger.debug(f"Not measuring frame that is not OCPP-J: {frame}")
+            return
+        message_type_id, unique_id, action = header
+        size = len(frame.encode("utf-8"))
+        if message_type_id == CALL:
+            if len(self._pending) >= MAX_PENDING_CALLS:
+                del self._pending[next(iter(self._pending))]
+            self._pending[unique_id] = _PendingCall(action, size, now)
+            return
+        call = self._pending.pop(unique_id, None)
+        if call is None:
+            # E.g. the response to a call that timed out
+            return
+        stats = self._actions.setdefault(call.action, _ActionStats())
+        round_trip = now - call.at
+        stats.calls += 1
+        stats.errors += message_type_id == CALL_ERROR
+        stats.request_bytes += call.size
+        stats.response_bytes += size
+        stats.round_trip_time += round_trip
+        stats.round_trips.append(round_trip)
+        if self.on_exchange:
+            self.on_exchange(call.action, round_trip, call.size + size)
+
+    @property
+    def pending_calls(self) -> int:
+        return len(self._pending)
+
+    def summary(self) -> Dict[str, dict]:
+        """The statistics per action"""
+        summary = {}
+        for action, stats in self._actions.items():
+            round_trips = sorted(stats.round_trips)
+            total_bytes = stats.request_bytes + stats.response_bytes
+            action_summary = {
+                "calls": stats.calls,
+                "errors": stats.errors,
+                "request_bytes": stats.request_bytes,
+                "response_bytes": stats.response_bytes,
+                "bytes_per_second": (
+                    total_bytes / stats.round_trip_time
+                    if stats.round_trip_time
+                    else 0.0
+                ),
+                "mean_rtt_ms": stats.round_trip_time / stats.calls * 1000,
+            }
+            for percent in PERCENTILES:
+                action_summary[f"p{percent}_rtt_ms"] = (
+                    percentile(round_trips, percent) * 1000
+                )
+            summary[action] = action_summary
+        return summary
+
+    def summary_rows(self) -> List[list]:
+        return [
+            [action] + list(action_summary.values())
+            for action, action_summary in sorted(self.summary().items())
+        ]
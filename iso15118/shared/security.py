@@ -1,12 +1,15 @@
+import asyncio
 import logging
 import os
 import secrets
 import ssl
+import time
 from base64 import urlsafe_b64encode
 from datetime import datetime
 from enum import Enum, auto
 from ssl import DER_cert_to_PEM_cert, SSLContext, SSLError, VerifyMode
-from typing import Dict, List, Optional, Tuple, Union, cast
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple, Union, cast
 
 from cryptography.exceptions import InvalidSignature, UnsupportedAlgorithm
 from cryptography.hazmat.backends.openssl.backend import Backend
@@ -55,6 +58,7 @@ from iso15118.shared.exceptions import (
     PrivateKeyReadError,
 )
 from iso15118.shared.exi_codec import EXI
+from iso15118.shared.messages import BaseModel
 from iso15118.shared.messages.enums import Namespace, Protocol
 from iso15118.shared.messages.iso15118_2.datatypes import (
     CertificateChain as CertificateChainV2,
@@ -98,14 +102,187 @@ def get_random_bytes(nbytes: int) -> bytes:
     return secrets.token_bytes(nbytes)
 
 
+class TLSHandshakeStats:
+    """
+    Counts the completed TLS handshakes of either the TLS server or the TLS
+    client, split into full and resumed ones, and measures their duration,
+    from the creation of the connection's SSL object until the handshake
+    completed.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self.full = 0
+        self.resumed = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def record(self, resumed: bool, seconds: float):
+        with self._lock:
+            if resumed:
+                self.resumed += 1
+            else:
+                self.full += 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+
+    def stats(self) -> dict:
+        with self._lock:
+            handshakes = self.full + self.resumed
+            return {
+                "full": self.full,
+                "resumed": self.resumed,
+                "mean_ms": (
+                    self.total_seconds / handshakes * 1000 if handshakes else 0.0
+                ),
+                "max_ms": self.max_seconds * 1000,
+            }
+
+
+# The handshake statistics of the TLS server (True) and the TLS client (False)
+_tls_handshake_stats: Dict[bool, TLSHandshakeStats] = {
+    True: TLSHandshakeStats(),
+    False: TLSHandshakeStats(),
+}
+
+
+def get_tls_handshake_stats(server_side: bool) -> TLSHandshakeStats:
+    return _tls_handshake_stats[server_side]
+
+
+def record_tls_handshake(ssl_object: Optional[ssl.SSLObject], server_side: bool):
+    """
+    Adds the completed handshake of the connection to the statistics of the
+    TLS server or client. ssl_object is the connection's
+    StreamWriter.get_extra_info("ssl_object"), None for plain TCP.
+    """
+    if ssl_object is None:
+        return
+    started = getattr(ssl_object, "handshake_started", None)
+    seconds = time.monotonic() - started if started is not None else 0.0
+    resumed = ssl_object.session_reused
+    _tls_handshake_stats[server_side].record(resumed, seconds)
+    logger.debug(
+        f"TLS handshake ({'resumed' if resumed else 'full'}) took "
+        f"{seconds * 1000:.1f} ms"
+    )
+
+
+class _ResumingSSLContext(SSLContext):
+    """
+    An SSLContext that notes when the handshake of each connection started
+    and that, as TLS client, offers the session of the previous connection
+    to the same server for resumption (asyncio doesn't pass a session on to
+    wrap_bio()). As TLS server, reusing the context is all it takes to
+    resume sessions, by session ID or session ticket.
+    """
+
+    def __init__(self, *args, **kwargs):
+        # The last SSL object per server_hostname, whose session is read only
+        # when it's needed, as a TLS 1.3 server sends its session tickets
+        # after the handshake
+        self._last_ssl_objects: Dict[Optional[str], ssl.SSLObject] = {}
+
+    def wrap_bio(
+        self,
+        incoming: ssl.MemoryBIO,
+        outgoing: ssl.MemoryBIO,
+        server_side: bool = False,
+        server_hostname: Optional[str] = None,
+        session: Optional[ssl.SSLSession] = None,
+    ) -> ssl.SSLObject:
+        if not server_side and session is None:
+            previous = self._last_ssl_objects.get(server_hostname)
+            if previous is not None and previous.session is not None:
+                if previous.session.has_ticket or previous.session.id:
+                    session = previous.session
+        ssl_object = super().wrap_bio(
+            incoming, outgoing, server_side, server_hostname, session
+        )
+        ssl_object.handshake_started = time.monotonic()
+        if not server_side:
+            self._last_ssl_objects[server_hostname] = ssl_object
+        return ssl_object
+
+
+# The SSL contexts of the TLS server (True) and the TLS client (False), along
+# with the state of the PKI files they were created from
+_ssl_contexts: Dict[bool, Tuple[tuple, Optional[SSLContext]]] = {}
+_ssl_contexts_lock = Lock()
+
+
+def _pki_fingerprint(server_side: bool) -> tuple:
+    """
+    Identifies the state of the files an SSL context is created from, so any
+    change of them (e.g. new SECC certificates) is noticed
+    """
+    tls_1_3 = shared_settings[SettingKey.ENABLE_TLS_1_3]
+    if server_side:
+        paths = [
+            CertPath.CPO_CERT_CHAIN_PEM,
+            KeyPath.SECC_LEAF_PEM,
+            KeyPasswordPath.SECC_LEAF_KEY_PASSWORD,
+        ]
+        if tls_1_3:
+            paths.append(CertPath.OEM_ROOT_PEM)
+    else:
+        paths = [CertPath.V2G_ROOT_PEM]
+        if tls_1_3:
+            paths.extend(
+                [
+                    CertPath.OEM_CERT_CHAIN_PEM,
+                    KeyPath.OEM_LEAF_PEM,
+                    KeyPasswordPath.OEM_LEAF_KEY_PASSWORD,
+                ]
+            )
+
+    fingerprint: List[Any] = [tls_1_3]
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            fingerprint.append((path, stat.st_ino, stat.st_size, stat.st_mtime_ns))
+        except OSError:
+            fingerprint.append((path, None))
+    return tuple(fingerprint)
+
+
 def get_ssl_context(server_side: bool) -> Optional[SSLContext]:
+    """
+    Returns the process-wide SSLContext object for the TCP client or TCP
+    server. The context is created on the first call and created again only
+    once any of the PKI files it was created from changed, so TLS sessions
+    can be resumed: by the TLS server with the session cache and the
+    session tickets of its context, by the TLS client with the session of
+    its previous connection to the same server.
+
+    Returns:
+        An SSLContext object, or None if it couldn't be created (see
+        create_ssl_context())
+    """
+    fingerprint = _pki_fingerprint(server_side)
+    with _ssl_contexts_lock:
+        cached = _ssl_contexts.get(server_side)
+        if cached is not None and cached[0] == fingerprint:
+            return cached[1]
+        if cached is not None:
+            logger.info(
+                f"PKI files changed, reloading the TLS "
+                f"{'server' if server_side else 'client'} SSL context"
+            )
+        ssl_context = create_ssl_context(server_side)
+        _ssl_contexts[server_side] = (fingerprint, ssl_context)
+        return ssl_context
+
+
+def create_ssl_context(server_side: bool) -> Optional[SSLContext]:
     """
     Creates an SSLContext object for the TCP client or TCP server.
     An SSL context holds various data longer-lived than single SSL
     connections, such as SSL configuration options, certificate(s) and
     private key(s). It also manages a cache of SSL sessions for
     server-side sockets, in order to speed up repeated connections from
-    the same clients.
+    the same clients. Use get_ssl_context() instead, which reuses the
+    context.
 
     The IANA cipher suite names
     - TLS_ECDH_ECDSA_WITH_AES_128_CBC_SHA256 and
@@ -128,15 +305,16 @@ def get_ssl_context(server_side: bool) -> Optional[SSLContext]:
          as well as read the password.
     """
 
+    ssl_context: SSLContext
     if shared_settings[SettingKey.ENABLE_TLS_1_3]:
-        ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS)
+        ssl_context = _ResumingSSLContext(ssl.PROTOCOL_TLS)
     else:
         # Specifying protocol as `PROTOCOL_TLS` does best effort.
         # TLSv1.3 will be attempted and would fallback to 1.2 if not possible.
         # However, there may be TLS clients that can't perform
         # 1.2 fallback, here we explicitly set the TLS version
         # to 1.2, to be sure we won't fall into connection issues
-        ssl_context = SSLContext(protocol=ssl.PROTOCOL_TLSv1_2)
+        ssl_context = _ResumingSSLContext(protocol=ssl.PROTOCOL_TLSv1_2)
 
     if server_side:
         try:
@@ -765,6 +943,37 @@ def get_cert_issuer_serial(cert_path: str) -> Tuple[str, int]:
     return der_cert.issuer.__str__(), der_cert.serial_number
 
 
+def get_elements_to_sign(
+    elements: List[BaseModel], namespace: Namespace
+) -> List[Tuple[str, bytes]]:
+    """
+    EXI encodes the elements referenced by a signature with a single call to
+    the EXI codec and pairs each element's Id attribute with its EXI stream,
+    as expected by create_signature() and verify_signature().
+
+    Args:
+        elements: The message elements to be signed, each with an `id` field
+        namespace: The namespace of the XSD schema the elements belong to
+
+    Returns:
+        A list of (Id, EXI encoded element) tuples, in the order of elements
+    """
+    exi_streams = EXI().to_exi_many(elements, namespace)
+    return [(element.id, exi) for element, exi in zip(elements, exi_streams)]
+
+
+async def get_elements_to_sign_async(
+    elements: List[BaseModel], namespace: Namespace
+) -> List[Tuple[str, bytes]]:
+    """
+    Same as get_elements_to_sign(), but runs on the EXI codec executor, so the
+    event loop is not blocked while the elements are EXI encoded.
+    """
+    return await asyncio.get_running_loop().run_in_executor(
+        EXI().get_executor(), get_elements_to_sign, elements, namespace
+    )
+
+
 def create_signature(
     elements_to_sign: List[Tuple[str, bytes]], signature_key: EllipticCurvePrivateKey
 ) -> Signature:
@@ -850,6 +1059,18 @@ def create_signature(
     return signature
 
 
+async def create_signature_async(
+    elements_to_sign: List[Tuple[str, bytes]], signature_key: EllipticCurvePrivateKey
+) -> Signature:
+    """
+    Same as create_signature(), but runs on the EXI codec executor, so the
+    event loop is not blocked while the SignedInfo element is EXI encoded.
+    """
+    return await asyncio.get_running_loop().run_in_executor(
+        EXI().get_executor(), create_signature, elements_to_sign, signature_key
+    )
+
+
 def verify_signature(
     signature: Signature,
     elements_to_sign: List[Tuple[str, bytes]],
@@ -1003,6 +1224,28 @@ def verify_signature(
     return True
 
 
+async def verify_signature_async(
+    signature: Signature,
+    elements_to_sign: List[Tuple[str, bytes]],
+    leaf_cert: bytes,
+    sub_ca_certs: List[bytes] = None,
+    root_ca_cert: bytes = None,
+) -> bool:
+    """
+    Same as verify_signature(), but runs on the EXI codec executor, so the
+    event loop is not blocked while the SignedInfo element is EXI encoded.
+    """
+    return await asyncio.get_running_loop().run_in_executor(
+        EXI().get_executor(),
+        verify_signature,
+        signature,
+        elements_to_sign,
+        leaf_cert,
+        sub_ca_certs,
+        root_ca_cert,
+    )
+
+
 def create_digest(exi_encoded_element) -> bytes:
     digest = Hash(SHA256())
     digest.update(exi_encoded_element)
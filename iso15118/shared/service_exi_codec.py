@@ -0,0 +1,201 @@
+"""
+Client side of the shared EXI codec service (see exi_codec_service.py).
+
+Frames exchanged over the UNIX domain socket:
+
+request:  op (1 byte) | request id (4 bytes) | namespace length (2 bytes) |
+          payload length (4 bytes) | namespace (UTF-8) | payload
+response: request id (4 bytes) | status (1 byte) | payload length (4 bytes) |
+          payload
+
+All integers are unsigned and big endian. Requests are identified by their
+id, so several threads can have requests in flight on the same connection
+and the service may answer them out of order.
+"""
+
+import itertools
+import json
+import logging
+import socket
+import struct
+import threading
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Dict, List, Optional, Tuple
+
+from iso15118.shared.exceptions import EXIDecodingError, EXIEncodingError
+from iso15118.shared.iexi_codec import IEXICodec
+
+logger = logging.getLogger(__name__)
+
+REQUEST_HEADER = struct.Struct(">BIHI")
+RESPONSE_HEADER = struct.Struct(">IBI")
+
+
+class Op:
+    ENCODE = 1
+    DECODE = 2
+    VERSION = 3
+    HEALTH = 4
+
+
+class Status:
+    OK = 0
+    ERROR = 1
+
+
+def pack_request(op: int, request_id: int, namespace: str, payload: bytes) -> bytes:
+    ns = namespace.encode()
+    return REQUEST_HEADER.pack(op, request_id, len(ns), len(payload)) + ns + payload
+
+
+def pack_response(request_id: int, status: int, payload: bytes) -> bytes:
+    return RESPONSE_HEADER.pack(request_id, status, len(payload)) + payload
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    buffer = bytearray()
+    while len(buffer) < size:
+        chunk = sock.recv(size - len(buffer))
+        if not chunk:
+            raise ConnectionError("EXI codec service closed the connection")
+        buffer += chunk
+    return bytes(buffer)
+
+
+class ServiceEXICodec(IEXICodec):
+    """
+    Thin IEXICodec client for the shared EXI codec service.
+
+    The connection is opened on first use and re-opened after it broke, so
+    the client survives a restart of the service.
+    """
+
+    def __init__(self, socket_path: str, timeout: float = 5.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        # Guards the socket while sending, _pending_lock guards the futures,
+        # so the reader thread never waits for a blocked sender
+        self._send_lock = threading.Lock()
+        self._pending_lock = threading.Lock()
+        self._pending: Dict[int, Future] = {}
+        self._ids = itertools.count(1)
+
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(self.socket_path)
+        threading.Thread(
+            target=self._read_responses,
+            args=(sock,),
+            name="exi-service-reader",
+            daemon=True,
+        ).start()
+        return sock
+
+    def _read_responses(self, sock: socket.socket):
+        try:
+            while True:
+                request_id, status, length = RESPONSE_HEADER.unpack(
+                    _recv_exactly(sock, RESPONSE_HEADER.size)
+                )
+                payload = _recv_exactly(sock, length)
+                with self._pending_lock:
+                    future = self._pending.pop(request_id, None)
+                if future:
+                    future.set_result((status, payload))
+        except (ConnectionError, OSError) as exc:
+            with self._send_lock:
+                if self._sock is sock:
+                    self._sock = None
+            with self._pending_lock:
+                pending, self._pending = self._pending, {}
+            for future in pending.values():
+                future.set_exception(ConnectionError(str(exc)))
+            sock.close()
+
+    def _request(self, op: int, namespace: str, payload: bytes) -> Tuple[int, bytes]:
+        return self._request_many(op, [(namespace, payload)])[0]
+
+    def _request_many(
+        self, op: int, requests: List[Tuple[str, bytes]]
+    ) -> List[Tuple[int, bytes]]:
+        """
+        Sends all requests with a single write and waits for their responses,
+        so a batch costs one round trip to the service.
+        """
+        futures: Dict[int, Future] = {}
+        frames = []
+        with self._send_lock:
+            if self._sock is None:
+                self._sock = self._connect()
+            for namespace, payload in requests:
+                request_id = next(self._ids) & 0xFFFFFFFF
+                futures[request_id] = Future()
+                frames.append(pack_request(op, request_id, namespace, payload))
+            with self._pending_lock:
+                self._pending.update(futures)
+            try:
+                self._sock.sendall(b"".join(frames))
+            except OSError:
+                with self._pending_lock:
+                    for request_id in futures:
+                        self._pending.pop(request_id, None)
+                self._sock.close()
+                self._sock = None
+                raise
+        try:
+            return [future.result(self.timeout) for future in futures.values()]
+        except FutureTimeoutError:
+            with self._pending_lock:
+                for request_id in futures:
+                    self._pending.pop(request_id, None)
+            raise TimeoutError(
+                f"No answer from EXI codec service within {self.timeout} s"
+            )
+
+    def close(self):
+        with self._send_lock:
+            if self._sock is not None:
+                self._sock.close()
+                self._sock = None
+
+    def encode(self, message: str, namespace: str) -> bytes:
+        status, payload = self._request(Op.ENCODE, namespace, message.encode())
+        if status != Status.OK:
+            raise EXIEncodingError(payload.decode())
+        return payload
+
+    def encode_many(self, messages: List[Tuple[str, str]]) -> List[bytes]:
+        responses = self._request_many(
+            Op.ENCODE,
+            [(namespace, message.encode()) for message, namespace in messages],
+        )
+        for status, payload in responses:
+            if status != Status.OK:
+                raise EXIEncodingError(payload.decode())
+        return [payload for _, payload in responses]
+
+    def decode(self, stream: bytes, namespace: str) -> str:
+        status, payload = self._request(Op.DECODE, namespace, bytes(stream))
+        if status != Status.OK:
+            raise EXIDecodingError(payload.decode())
+        return payload.decode()
+
+    def decode_many(self, streams: List[Tuple[bytes, str]]) -> List[str]:
+        responses = self._request_many(
+            Op.DECODE, [(namespace, bytes(stream)) for stream, namespace in streams]
+        )
+        for status, payload in responses:
+            if status != Status.OK:
+                raise EXIDecodingError(payload.decode())
+        return [payload.decode() for _, payload in responses]
+
+    def get_version(self) -> str:
+        _, payload = self._request(Op.VERSION, "", b"")
+        return f"EXI codec service ({payload.decode()})"
+
+    def health(self) -> dict:
+        """Returns the status and the counters reported by the service"""
+        _, payload = self._request(Op.HEALTH, "", b"")
+        return json.loads(payload)
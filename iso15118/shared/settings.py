@@ -3,12 +3,45 @@ from typing import Optional
 
 import environs
 
+from iso15118.shared.messages.enums import UINT_32_MAX
+
 
 class SettingKey:
     PKI_PATH = "PKI_PATH"
     MESSAGE_LOG_JSON = "MESSAGE_LOG_JSON"
     MESSAGE_LOG_EXI = "MESSAGE_LOG_EXI"
     ENABLE_TLS_1_3 = "ENABLE_TLS_1_3"
+    EXI_CODEC = "EXI_CODEC"
+    EXI_CODEC_WORKERS = "EXI_CODEC_WORKERS"
+    EXIFICIENT_POOL_SIZE = "EXIFICIENT_POOL_SIZE"
+    EXI_CODEC_SOCKET = "EXI_CODEC_SOCKET"
+    EXI_TRUSTED_DECODING = "EXI_TRUSTED_DECODING"
+    EXI_ENCODE_CACHE_ENTRIES = "EXI_ENCODE_CACHE_ENTRIES"
+    EXI_ENCODE_CACHE_BYTES = "EXI_ENCODE_CACHE_BYTES"
+    EXI_DECODE_CACHE_ENTRIES = "EXI_DECODE_CACHE_ENTRIES"
+    EXI_DECODE_CACHE_BYTES = "EXI_DECODE_CACHE_BYTES"
+    V2GTP_MAX_PAYLOAD_LENGTH = "V2GTP_MAX_PAYLOAD_LENGTH"
+    SESSION_STOP_DATA_LINK_DELAY = "SESSION_STOP_DATA_LINK_DELAY"
+    SESSION_STOP_TCP_CLOSE_DELAY = "SESSION_STOP_TCP_CLOSE_DELAY"
+    SDP_DUPLICATE_WINDOW = "SDP_DUPLICATE_WINDOW"
+    SDP_REQUEST_RATE = "SDP_REQUEST_RATE"
+    SDP_REQUEST_BURST = "SDP_REQUEST_BURST"
+    OCPP_OUTBOX_MAX_ATTEMPTS = "OCPP_OUTBOX_MAX_ATTEMPTS"
+    OCPP_OUTBOX_RETRY_DELAY = "OCPP_OUTBOX_RETRY_DELAY"
+    OCPP_AUTHORIZE_WAIT = "OCPP_AUTHORIZE_WAIT"
+    OCPP_CHARGING_PROFILE_MARGIN = "OCPP_CHARGING_PROFILE_MARGIN"
+    BENCHMARK_BUFFER_SIZE = "BENCHMARK_BUFFER_SIZE"
+    BENCHMARK_FLUSH_INTERVAL = "BENCHMARK_FLUSH_INTERVAL"
+    CSMS_ENDPOINTS = "CSMS_ENDPOINTS"
+    CSMS_PARALLEL_CONNECTS = "CSMS_PARALLEL_CONNECTS"
+    CSMS_CONNECT_TIMEOUT = "CSMS_CONNECT_TIMEOUT"
+    CSMS_RECONNECT_BACKOFF_MAX = "CSMS_RECONNECT_BACKOFF_MAX"
+
+
+class EXICodecBackend:
+    EXIFICIENT = "exificient"
+    IN_PROCESS = "in_process"
+    SERVICE = "service"
 
 
 shared_settings = {}
@@ -27,6 +60,129 @@ def load_shared_settings(env_path: Optional[str] = None):
         SettingKey.MESSAGE_LOG_JSON: env.bool("MESSAGE_LOG_JSON", default=True),
         SettingKey.MESSAGE_LOG_EXI: env.bool("MESSAGE_LOG_EXI", default=False),
         SettingKey.ENABLE_TLS_1_3: env.bool("ENABLE_TLS_1_3", default=False),
+        SettingKey.EXI_CODEC: env.str(
+            "EXI_CODEC",
+            default=EXICodecBackend.EXIFICIENT,
+            validate=environs.validate.OneOf(
+                [
+                    EXICodecBackend.EXIFICIENT,
+                    EXICodecBackend.IN_PROCESS,
+                    EXICodecBackend.SERVICE,
+                ]
+            ),
+        ),
+        SettingKey.EXI_CODEC_WORKERS: env.int(
+            "EXI_CODEC_WORKERS",
+            default=1,
+            validate=environs.validate.Range(min=1),
+        ),
+        SettingKey.EXIFICIENT_POOL_SIZE: env.int(
+            "EXIFICIENT_POOL_SIZE",
+            default=1,
+            validate=environs.validate.Range(min=1),
+        ),
+        SettingKey.EXI_CODEC_SOCKET: env.str(
+            "EXI_CODEC_SOCKET", default="/tmp/iso15118_exi_codec.sock"
+        ),
+        SettingKey.EXI_TRUSTED_DECODING: env.bool(
+            "EXI_TRUSTED_DECODING", default=False
+        ),
+        SettingKey.EXI_ENCODE_CACHE_ENTRIES: env.int(
+            "EXI_ENCODE_CACHE_ENTRIES",
+            default=256,
+            validate=environs.validate.Range(min=0),
+        ),
+        SettingKey.EXI_ENCODE_CACHE_BYTES: env.int(
+            "EXI_ENCODE_CACHE_BYTES",
+            default=1024 * 1024,
+            validate=environs.validate.Range(min=0),
+        ),
+        SettingKey.EXI_DECODE_CACHE_ENTRIES: env.int(
+            "EXI_DECODE_CACHE_ENTRIES",
+            default=0,
+            validate=environs.validate.Range(min=0),
+        ),
+        SettingKey.EXI_DECODE_CACHE_BYTES: env.int(
+            "EXI_DECODE_CACHE_BYTES",
+            default=256 * 1024,
+            validate=environs.validate.Range(min=0),
+        ),
+        SettingKey.V2GTP_MAX_PAYLOAD_LENGTH: env.int(
+            "V2GTP_MAX_PAYLOAD_LENGTH",
+            default=128 * 1024,
+            validate=environs.validate.Range(min=1, max=UINT_32_MAX),
+        ),
+        SettingKey.SESSION_STOP_DATA_LINK_DELAY: env.float(
+            "SESSION_STOP_DATA_LINK_DELAY",
+            default=2.0,
+            validate=environs.validate.Range(min=0),
+        ),
+        SettingKey.SESSION_STOP_TCP_CLOSE_DELAY: env.float(
+            "SESSION_STOP_TCP_CLOSE_DELAY",
+            default=3.0,
+            validate=environs.validate.Range(min=0),
+        ),
+        SettingKey.SDP_DUPLICATE_WINDOW: env.float(
+            "SDP_DUPLICATE_WINDOW",
+            default=0.1,
+            validate=environs.validate.Range(min=0),
+        ),
+        SettingKey.SDP_REQUEST_RATE: env.float(
+            "SDP_REQUEST_RATE",
+            default=10.0,
+            validate=environs.validate.Range(min=0),
+        ),
+        SettingKey.SDP_REQUEST_BURST: env.int(
+            "SDP_REQUEST_BURST",
+            default=5,
+            validate=environs.validate.Range(min=1),
+        ),
+        SettingKey.OCPP_OUTBOX_MAX_ATTEMPTS: env.int(
+            "OCPP_OUTBOX_MAX_ATTEMPTS",
+            default=3,
+            validate=environs.validate.Range(min=1),
+        ),
+        SettingKey.OCPP_OUTBOX_RETRY_DELAY: env.float(
+            "OCPP_OUTBOX_RETRY_DELAY",
+            default=1.0,
+            validate=environs.validate.Range(min=0),
+        ),
+        SettingKey.OCPP_AUTHORIZE_WAIT: env.float(
+            "OCPP_AUTHORIZE_WAIT",
+            default=1.0,
+            validate=environs.validate.Range(min=0),
+        ),
+        SettingKey.OCPP_CHARGING_PROFILE_MARGIN: env.float(
+            "OCPP_CHARGING_PROFILE_MARGIN",
+            default=0.5,
+            validate=environs.validate.Range(min=0),
+        ),
+        SettingKey.BENCHMARK_BUFFER_SIZE: env.int(
+            "BENCHMARK_BUFFER_SIZE",
+            default=10000,
+            validate=environs.validate.Range(min=1),
+        ),
+        SettingKey.BENCHMARK_FLUSH_INTERVAL: env.float(
+            "BENCHMARK_FLUSH_INTERVAL",
+            default=1.0,
+            validate=environs.validate.Range(min=0),
+        ),
+        SettingKey.CSMS_ENDPOINTS: env.list("CSMS_ENDPOINTS", default=[]),
+        SettingKey.CSMS_PARALLEL_CONNECTS: env.int(
+            "CSMS_PARALLEL_CONNECTS",
+            default=3,
+            validate=environs.validate.Range(min=1),
+        ),
+        SettingKey.CSMS_CONNECT_TIMEOUT: env.float(
+            "CSMS_CONNECT_TIMEOUT",
+            default=5.0,
+            validate=environs.validate.Range(min=0, min_inclusive=False),
+        ),
+        SettingKey.CSMS_RECONNECT_BACKOFF_MAX: env.float(
+            "CSMS_RECONNECT_BACKOFF_MAX",
+            default=30.0,
+            validate=environs.validate.Range(min=0),
+        ),
     }
     shared_settings.update(settings)
     env.seal()  # raise all errors at once, if any
@@ -0,0 +1,61 @@
+import asyncio
+from ipaddress import IPv6Address
+from typing import TYPE_CHECKING, Optional
+
+from iso15118.shared.itransport import ITransport
+
+if TYPE_CHECKING:
+    from iso15118.evcc.transport.tcp_client import TCPClient
+    from iso15118.evcc.transport.udp_client import UDPClient
+    from iso15118.secc.transport.tcp_server import TCPServer
+    from iso15118.secc.transport.udp_server import UDPServer
+
+
+class SocketTransport(ITransport):
+    """
+    The transport over IPv6 sockets bound to a network interface, as used
+    between a real EV and EVSE
+    """
+
+    # Need to import the endpoints where they're created to avoid a circular
+    # import error, as the EVCC and SECC packages use this transport
+    # pylint: disable=import-outside-toplevel
+
+    def create_udp_server(
+        self,
+        session_handler_queue: asyncio.Queue,
+        iface: str,
+        sdp_port: Optional[int] = None,
+    ) -> "UDPServer":
+        from iso15118.secc.transport.udp_server import UDPServer
+
+        return UDPServer(session_handler_queue, iface, sdp_port)
+
+    def create_tcp_server(
+        self, session_handler_queue: asyncio.Queue, iface: str
+    ) -> "TCPServer":
+        from iso15118.secc.transport.tcp_server import TCPServer
+
+        return TCPServer(session_handler_queue, iface)
+
+    def create_udp_client(
+        self,
+        session_handler_queue: asyncio.Queue,
+        iface: str,
+        sdp_port: Optional[int] = None,
+    ) -> "UDPClient":
+        from iso15118.evcc.transport.udp_client import UDPClient
+
+        return UDPClient(session_handler_queue, iface, sdp_port)
+
+    async def create_tcp_client(
+        self,
+        host: IPv6Address,
+        port: int,
+        session_handler_queue: asyncio.Queue,
+        is_tls: bool,
+        iface: str,
+    ) -> "TCPClient":
+        from iso15118.evcc.transport.tcp_client import TCPClient
+
+        return await TCPClient.create(host, port, session_handler_queue, is_tls, iface)
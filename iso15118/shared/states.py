@@ -1,7 +1,7 @@
 import base64
 import logging
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING, Optional, Type, Union
+from typing import TYPE_CHECKING, Optional, Tuple, Type, Union
 
 from pydantic import ValidationError
 
@@ -132,6 +132,21 @@ class State(ABC):
         # is first EXI encoded and then placed as a payload in a V2GTP
         # (V2G Transfer Protocol) message, which is then sent to the counterpart
         self.next_v2gtp_msg: Optional[V2GTPMessage] = None
+        # The message (and its namespace and payload type) that still needs to
+        # be EXI encoded into next_v2gtp_msg, see encode_next_message()
+        self.next_msg_to_encode: Optional[
+            Tuple[
+                Union[
+                    SupportedAppProtocolReq,
+                    SupportedAppProtocolRes,
+                    V2GMessageV2,
+                    V2GMessageV20,
+                    V2GMessageDINSPEC,
+                ],
+                Namespace,
+                Union[DINPayloadTypes, ISOV2PayloadTypes, ISOV20PayloadTypes],
+            ]
+        ] = None
         # The timeout corresponding to waiting for the subsequent message as a
         # result of sending this next message
         self.next_msg_timeout: Union[float, int] = 0
@@ -206,9 +221,12 @@ class State(ABC):
         2. Create the V2GMessage from the provided 'message' parameter in case
            it is an ISO 15118-2 V2GMessage (where the message is actually the
            body element of the V2GMessage).
-        3. EXI-encode the new message
+        3. Hand the new message over to encode_next_message(), which the
+           state machine awaits once process_message() returns, so that the
+           EXI encoding does not block the event loop
         4. Create the next V2GTP message given the EXI-encoded message and the
-           payload type.
+           payload type (done by encode_next_message() if the message still
+           needs to be EXI encoded).
 
         Args:
             next_state: The next state to transition to, or None, if we want to
@@ -335,30 +353,64 @@ class State(ABC):
 
         # If to_be_exi_encoded is None it is possible that exi_payload is already
         # set (for eg:CertificateInstallationRes from backend).
-        # Otherwise, EXI encode the message.
+        # Otherwise, the message is EXI encoded in encode_next_message().
         if to_be_exi_encoded and next_msg_payload_type:
             # Step 3
-            try:
-                exi_payload = EXI().to_exi(to_be_exi_encoded, namespace)
-
-                if hasattr(self.comm_session, "evse_id"):
-                    logger.trace(  # type: ignore[attr-defined]
-                        f"{self.comm_session.evse_id}:::"
-                        f"{exi_payload.hex()}:::"
-                        f"{namespace.value}"
-                    )
-            except EXIEncodingError as exc:
-                logger.error(f"{exc}")
-                self.next_state = Terminate
-                raise
+            self.next_v2gtp_msg = None
+            self.next_msg_to_encode = (
+                to_be_exi_encoded,
+                namespace,
+                next_msg_payload_type,
+            )
+            return
 
         # Step 4
+        self.next_msg_to_encode = None
+        self._create_next_v2gtp_msg(next_msg_payload_type, exi_payload)
+
+    async def encode_next_message(self):
+        """
+        EXI encodes the message handed over by create_next_message() and
+        creates the next V2GTP message from it. The encoding runs on the EXI
+        codec executor, so other sessions, the SDP server and the OCPP client
+        are not blocked while the codec is busy.
+
+        Does nothing if there is no message waiting to be encoded.
+
+        Raises:
+            EXIEncodingError
+        """
+        if not self.next_msg_to_encode:
+            return
+        to_be_exi_encoded, namespace, next_msg_payload_type = self.next_msg_to_encode
+        self.next_msg_to_encode = None
+        try:
+            exi_payload = await EXI().to_exi_async(to_be_exi_encoded, namespace)
+
+            if hasattr(self.comm_session, "evse_id"):
+                logger.trace(  # type: ignore[attr-defined]
+                    f"{self.comm_session.evse_id}:::"
+                    f"{exi_payload.hex()}:::"
+                    f"{namespace.value}"
+                )
+        except EXIEncodingError as exc:
+            logger.error(f"{exc}")
+            self.next_state = Terminate
+            raise
+
+        self._create_next_v2gtp_msg(next_msg_payload_type, exi_payload)
+
+    def _create_next_v2gtp_msg(
+        self,
+        payload_type: Union[DINPayloadTypes, ISOV2PayloadTypes, ISOV20PayloadTypes],
+        exi_payload: bytes,
+    ):
         try:
             # Each V2GMessage (and SupportedAppProtocolReq and -Res)
             # is first EXI encoded and then placed as a payload in a
             # V2GTPMessage (V2G Transfer Protocol message)
             self.next_v2gtp_msg = V2GTPMessage(
-                self.comm_session.protocol, next_msg_payload_type, exi_payload
+                self.comm_session.protocol, payload_type, exi_payload
             )
         except (InvalidProtocolError, InvalidPayloadTypeError) as exc:
             logger.exception(
@@ -0,0 +1,138 @@
+"""
+Reads V2G Transfer Protocol (V2GTP) messages from a TCP byte stream.
+
+TCP doesn't preserve message boundaries: one read may return a part of a
+V2GTP message (e.g. a big CertificateInstallationRes spread over several
+segments) or more than one message (if the peer sends them back to back).
+The V2GTPStreamReader therefore frames the stream by the payload length
+given in the 8-byte V2GTP header.
+"""
+
+import asyncio
+import time
+from asyncio.streams import StreamReader
+from typing import NamedTuple, Optional, Union
+
+from iso15118.shared.exceptions import InvalidV2GTPMessageError
+from iso15118.shared.messages.enums import V2GTPVersion
+from iso15118.shared.messages.v2gtp import V2GTPMessage
+
+V2GTP_HEADER_LENGTH = 8
+
+
+class V2GTPFrame(NamedTuple):
+    """The header and the payload of a V2GTP message, as read from the stream"""
+
+    header: bytes
+    payload: bytes
+    # The time.monotonic() at which the message was read completely, before
+    # it waited in the queue
+    received_at: float = 0.0
+
+
+class V2GTPStreamReader:
+    """
+    Reads complete V2GTP messages from a StreamReader into a queue.
+
+    The frames are read by a task of their own, independent of how long the
+    communication session waits for its next message. A timeout can
+    therefore never abandon a message that was read halfway, and messages
+    the peer sent before the previous one was answered (pipelining) wait in
+    the queue, in the order they arrived.
+    """
+
+    def __init__(
+        self,
+        reader: StreamReader,
+        max_payload_length: int,
+        max_queued_frames: int = 4,
+    ):
+        self.reader = reader
+        self.max_payload_length = max_payload_length
+        # A frame, None once the peer closed the stream, or the exception
+        # that ended the reading
+        self._frames: "asyncio.Queue[Union[V2GTPFrame, Exception, None]]" = (
+            asyncio.Queue(maxsize=max_queued_frames)
+        )
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._read_frames())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def read_frame(self) -> Optional[V2GTPFrame]:
+        """
+        Returns the next V2GTP message of the stream, or None if the peer
+        closed the connection.
+
+        Raises:
+            InvalidV2GTPMessageError, if the header announces a payload bigger
+            than max_payload_length or isn't a V2GTP header at all (the
+            message boundaries are lost then), ConnectionResetError or any
+            other error reading the stream
+        """
+        self.start()
+        frame = await self._frames.get()
+        if isinstance(frame, Exception):
+            # Every further read ends the same way
+            self._frames.put_nowait(frame)
+            raise frame
+        if frame is None:
+            self._frames.put_nowait(None)
+        return frame
+
+    async def _read_frames(self):
+        while True:
+            try:
+                frame = await self._read_frame()
+            except Exception as exc:
+                # E.g. an ssl.SSLError, which would otherwise end this task
+                # unnoticed and leave read_frame() waiting forever
+                await self._frames.put(exc)
+                return
+            await self._frames.put(frame)
+            if frame is None:
+                return
+
+    async def _read_frame(self) -> Optional[V2GTPFrame]:
+        try:
+            header = await self.reader.readexactly(V2GTP_HEADER_LENGTH)
+        except asyncio.IncompleteReadError as exc:
+            if not exc.partial:
+                return None
+            raise ConnectionResetError(
+                f"Connection closed after {len(exc.partial)} bytes of a V2GTP header"
+            )
+
+        if (
+            header[0] != V2GTPVersion.PROTOCOL_VERSION
+            or header[1] != V2GTPVersion.INV_PROTOCOL_VERSION
+        ):
+            raise InvalidV2GTPMessageError(
+                f"Not a valid V2GTP message (header {header.hex()})"
+            )
+        payload_length = V2GTPMessage.get_payload_length(header)
+        if payload_length > self.max_payload_length:
+            raise InvalidV2GTPMessageError(
+                f"Payload length of {payload_length} bytes for V2GTP message "
+                f"exceeds limit of {self.max_payload_length} bytes"
+            )
+
+        try:
+            payload = await self.reader.readexactly(payload_length)
+        except asyncio.IncompleteReadError as exc:
+            raise ConnectionResetError(
+                f"Connection closed after {len(exc.partial)} of "
+                f"{payload_length} bytes of a V2GTP payload"
+            )
+        return V2GTPFrame(header, payload, time.monotonic())
@@ -1,16 +1,27 @@
 # run_in_parallel.py
 import multiprocessing
+import os
 import subprocess
 
+from iso15118.shared.exi_codec_service import start_exi_codec_service
+
+# Separate from the SECCs' service, in case both run on the same host
+EXI_CODEC_SOCKET = "/tmp/iso15118_evcc_exi_codec.sock"
+
 
 def run_evcc(config_file, sdp_port):
-    subprocess.run(["python3", "iso15118/evcc/main.py", config_file, str(sdp_port)])
+    # All EVCCs share the EXI codec service instead of launching one JVM each
+    env = dict(os.environ, EXI_CODEC="service", EXI_CODEC_SOCKET=EXI_CODEC_SOCKET)
+    subprocess.run(
+        ["python3", "iso15118/evcc/main.py", config_file, str(sdp_port)], env=env
+    )
 
 if __name__ == "__main__":
     num_processes = 10 #Max of EVCCs simultaneously
     processes = []
     config_file = "iso15118/shared/examples/evcc/iso15118_2/evcc_config_eim_ac.json"
     sdp_port = 15118
+    exi_codec_service = start_exi_codec_service(EXI_CODEC_SOCKET)
 
     for _ in range(num_processes):
         p_evcc = multiprocessing.Process(target=run_evcc,args=(config_file,sdp_port,))
@@ -20,3 +31,4 @@ if __name__ == "__main__":
 
     for p in processes:
         p.join()
+    exi_codec_service.terminate()
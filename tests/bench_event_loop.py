@@ -0,0 +1,206 @@
+"""
+Compares the sessions per second and the charge loop round-trip time of
+complete ISO 15118-2 AC sessions (EIM) on the asyncio and the uvloop event
+loop.
+
+The EVCCs and SECCs run the regular state machines in one process,
+communicating over a MemoryNetwork with the in-process EXI codec, so the
+results neither depend on a network interface nor on the JVM. Each EVSE
+serves its sessions one after the other; the EVSEs run concurrently. The
+OCPP client of the SECC is replaced by one accepting everything.
+
+Run it from the repository root with
+    python -m tests.bench_event_loop [--sessions N] [--evses N]
+"""
+
+import argparse
+import asyncio
+import io
+import logging
+import statistics
+import time
+from contextlib import redirect_stdout
+from typing import Dict, List
+from unittest.mock import AsyncMock, patch
+
+from iso15118.evcc import EVCCHandler
+from iso15118.evcc.comm_session_handler import EVCCCommunicationSession
+from iso15118.evcc.controller.simulator import SimEVController
+from iso15118.evcc.evcc_config import EVCCConfig, load_from_file
+from iso15118.secc import SECCHandler
+from iso15118.secc.controller.simulator import SimEVSEController
+from iso15118.secc.secc_settings import Config
+from iso15118.shared.event_loop import EventLoop, use_event_loop
+from iso15118.shared.inprocess_exi_codec import InProcessEXICodec
+from iso15118.shared.memory_transport import MemoryNetwork
+from iso15118.shared.messages.enums import AuthEnum, Protocol
+from iso15118.shared.settings import SettingKey, load_shared_settings, shared_settings
+from iso15118.shared.utils import cancel_task
+
+EVCC_CONFIG_PATH = "iso15118/shared/examples/evcc/iso15118_2/evcc_config_eim_ac.json"
+FIRST_SDP_PORT = 15200
+# The EVCC states waiting for the response to a charge loop request
+CHARGE_LOOP_STATES = ("ChargingStatus", "CurrentDemand")
+CHARGING_PROFILE = {
+    "id": 1,
+    "charging_schedule": [
+        {
+            "charging_rate_unit": "W",
+            "duration": 86400,
+            "charging_schedule_period": [{"start_period": 0, "limit": 11000}],
+        }
+    ],
+}
+
+
+class BenchChargePoint:
+    """Stands in for the SECC's OCPP client, accepting every request"""
+
+    def __init__(self, *args):
+        self._station_booted = True
+        self._secc_current_state = None
+        self.transaction_id = None
+
+    async def ocpp_cli_routine(self):
+        await asyncio.Event().wait()
+
+    async def send_authorize(self) -> bool:
+        return True
+
+    def request_charging_profile(self) -> asyncio.Future:
+        charging_profile = asyncio.get_running_loop().create_future()
+        charging_profile.set_result(CHARGING_PROFILE)
+        return charging_profile
+
+    def queue_status_notification(self):
+        pass
+
+    def queue_transaction_event(self):
+        pass
+
+    def __getattr__(self, name: str):
+        return AsyncMock()
+
+
+class ChargeLoopTimer:
+    """
+    Measures the time from sending a charge loop request until its response
+    is processed by the EVCC
+    """
+
+    def __init__(self):
+        self.round_trips: List[float] = []
+        self._sent_at: Dict[int, float] = {}
+
+    def patch(self):
+        timer = self
+        send = EVCCCommunicationSession.send
+        process_message = EVCCCommunicationSession.process_message
+
+        async def timed_send(comm_session, message):
+            timer._sent_at[id(comm_session)] = time.perf_counter()
+            await send(comm_session, message)
+
+        async def timed_process_message(comm_session, message):
+            sent_at = timer._sent_at.pop(id(comm_session), None)
+            state = comm_session.current_state.__class__.__name__
+            if sent_at is not None and state in CHARGE_LOOP_STATES:
+                timer.round_trips.append(time.perf_counter() - sent_at)
+            await process_message(comm_session, message)
+
+        return patch.multiple(
+            EVCCCommunicationSession,
+            send=timed_send,
+            process_message=timed_process_message,
+        )
+
+
+async def serve_sessions(
+    network: MemoryNetwork,
+    evcc_config: EVCCConfig,
+    sdp_port: int,
+    sessions: int,
+):
+    config = Config(
+        iface="eth0",
+        supported_protocols=[Protocol.ISO_15118_2],
+        supported_auth_options=[AuthEnum.EIM],
+    )
+    secc_handler = SECCHandler(
+        InProcessEXICodec(), SimEVSEController(), config, network.transport()
+    )
+    secc_task = asyncio.create_task(
+        secc_handler.start("eth0", sdp_custom_port=sdp_port)
+    )
+    await secc_handler.check_ready_status()
+    try:
+        for _ in range(sessions):
+            evcc_handler = EVCCHandler(
+                evcc_config,
+                "eth0",
+                InProcessEXICodec(),
+                SimEVController(evcc_config),
+                sdp_port,
+                network.transport(),
+            )
+            await evcc_handler.start()
+            # The SDP server resumes once the SECC ended its session
+            while secc_handler.udp_server.pause_server:
+                await asyncio.sleep(0.001)
+    finally:
+        await cancel_task(secc_task)
+
+
+async def bench(sessions: int, evses: int) -> dict:
+    evcc_config = await load_from_file(EVCC_CONFIG_PATH)
+    network = MemoryNetwork()
+    timer = ChargeLoopTimer()
+    with timer.patch():
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(
+                serve_sessions(network, evcc_config, FIRST_SDP_PORT + evse, sessions)
+                for evse in range(evses)
+            )
+        )
+        elapsed = time.perf_counter() - start
+    round_trips = sorted(timer.round_trips)
+    return {
+        "sessions_per_second": sessions * evses / elapsed,
+        "mean_rtt_ms": statistics.mean(round_trips) * 1000,
+        "p95_rtt_ms": round_trips[int(len(round_trips) * 0.95)] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sessions", type=int, default=20, help="Sessions per EVSE")
+    parser.add_argument("--evses", type=int, default=4)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    load_shared_settings()
+    # The next EV connects right after the previous session stopped
+    shared_settings[SettingKey.SESSION_STOP_DATA_LINK_DELAY] = 0
+    shared_settings[SettingKey.SESSION_STOP_TCP_CLOSE_DELAY] = 0
+
+    print(f"{'Event loop':<12} {'sessions/s':>12} {'mean RTT':>10} {'p95 RTT':>10}")
+    print(f"{'':<12} {'':>12} {'[ms]':>10} {'[ms]':>10}")
+    with patch("iso15118.secc.comm_session_handler.ChargePoint", BenchChargePoint):
+        for event_loop in EventLoop.options():
+            used = use_event_loop(event_loop)
+            if used != event_loop:
+                print(f"{event_loop:<12} not installed")
+                continue
+            # The conversion of the OCPP charging profiles prints them
+            with redirect_stdout(io.StringIO()):
+                results = asyncio.run(bench(args.sessions, args.evses))
+            print(
+                f"{event_loop:<12} {results['sessions_per_second']:>12.1f} "
+                f"{results['mean_rtt_ms']:>10.2f} {results['p95_rtt_ms']:>10.2f}"
+            )
+    use_event_loop(EventLoop.ASYNCIO)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import time
 from unittest.mock import Mock
 
 import pytest
@@ -42,6 +43,7 @@ def comm_secc_session_mock():
     comm_session_mock.evse_id = "UK123E1234"
     comm_session_mock.ev_session_context = EVSessionContext15118()
     comm_session_mock.selected_schedule = 1
+    comm_session_mock.message_received_at = time.monotonic()
     comm_session_mock.evse_controller.ev_data_context.selected_energy_mode = (
         EnergyTransferModeEnum.DC_EXTENDED
     )
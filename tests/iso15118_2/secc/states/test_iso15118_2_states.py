@@ -1,3 +1,5 @@
+import asyncio
+import time
 from pathlib import Path
 from typing import List, Type, cast
 from unittest.mock import AsyncMock, Mock, patch
@@ -54,8 +56,9 @@ from iso15118.shared.messages.iso15118_2.datatypes import (
     ServiceName,
 )
 from iso15118.shared.messages.iso15118_2.msgdef import V2GMessage as V2GMessageV2
+from iso15118.shared.messages.iso15118_2.timeouts import Timeouts
 from iso15118.shared.security import get_random_bytes
-from iso15118.shared.settings import load_shared_settings
+from iso15118.shared.settings import SettingKey, load_shared_settings, shared_settings
 from iso15118.shared.states import Pause, State
 from tests.iso15118_2.secc.states.test_messages import (
     get_cable_check_req,
@@ -604,6 +607,39 @@ class TestV2GSessionScenarios:
         )
         assert authorization.next_state == ChargeParameterDiscovery
 
+    async def test_authorization_ongoing_until_csms_answers(self):
+        csms_answered = asyncio.Event()
+
+        async def send_authorize() -> bool:
+            await csms_answered.wait()
+            return True
+
+        self.comm_session.ocpp_client = Mock(send_authorize=send_authorize)
+        self.comm_session.selected_auth_option = AuthEnum.EIM
+        self.comm_session.evse_controller.ready_to_charge = Mock(return_value=True)
+        self.comm_session.evse_controller.is_authorized = AsyncMock(
+            return_value=AuthorizationResponse(
+                AuthorizationStatus.ACCEPTED, ResponseCode.OK
+            )
+        )
+        authorization = Authorization(self.comm_session)
+        with patch.dict(shared_settings, {SettingKey.OCPP_AUTHORIZE_WAIT: 0.01}):
+            await authorization.process_message(
+                message=get_dummy_v2g_message_authorization_req()
+            )
+            next_state_while_waiting = authorization.next_state
+            csms_answered.set()
+            await authorization.process_message(
+                message=get_dummy_v2g_message_authorization_req()
+            )
+
+        assert next_state_while_waiting is None
+        assert authorization.next_state == ChargeParameterDiscovery
+        assert (
+            authorization.message.body.authorization_res.evse_processing
+            == EVSEProcessing.FINISHED
+        )
+
     async def test_authorization_req_gen_challenge_invalid(self):
         self.comm_session.selected_auth_option = AuthEnum.PNC_V2
         self.comm_session.contract_cert_chain = Mock()
@@ -636,6 +672,76 @@ class TestV2GSessionScenarios:
         )
         assert authorization.next_state == ChargeParameterDiscovery
 
+    async def test_charge_parameter_discovery_ongoing_until_csms_sets_profile(self):
+        charging_profile = asyncio.get_running_loop().create_future()
+        self.comm_session.ocpp_client = Mock(
+            update_ev_charging_needs=AsyncMock(),
+            request_charging_profile=Mock(return_value=charging_profile),
+        )
+        charge_parameter_discovery = ChargeParameterDiscovery(self.comm_session)
+        # Leaves no time to wait for the CSMS
+        margin = Timeouts.CHARGE_PARAMETER_DISCOVERY_REQ
+        with patch.dict(
+            shared_settings, {SettingKey.OCPP_CHARGING_PROFILE_MARGIN: margin}
+        ):
+            await charge_parameter_discovery.process_message(
+                message=get_charge_parameter_discovery_req_message_no_departure_time()
+            )
+            processing_while_waiting = (
+                charge_parameter_discovery.message.body.charge_parameter_discovery_res.evse_processing  # noqa
+            )
+            charging_profile.set_result(
+                {
+                    "id": 1,
+                    "charging_schedule": [
+                        {
+                            "charging_rate_unit": "W",
+                            "duration": 86400,
+                            "charging_schedule_period": [
+                                {"start_period": 0, "limit": 11000}
+                            ],
+                        }
+                    ],
+                }
+            )
+            await charge_parameter_discovery.process_message(
+                message=get_charge_parameter_discovery_req_message_no_departure_time()
+            )
+        charge_parameter_discovery_res = (
+            charge_parameter_discovery.message.body.charge_parameter_discovery_res
+        )
+
+        assert processing_while_waiting == EVSEProcessing.ONGOING
+        assert charge_parameter_discovery_res.evse_processing == EVSEProcessing.FINISHED
+        assert len(charge_parameter_discovery_res.sa_schedule_list.schedule_tuples) == 1
+        # The charging needs are sent to the CSMS only once
+        self.comm_session.ocpp_client.request_charging_profile.assert_called_once()
+
+    async def test_charge_parameter_discovery_waits_from_message_arrival(self):
+        self.comm_session.ocpp_client = Mock(
+            update_ev_charging_needs=AsyncMock(),
+            request_charging_profile=Mock(
+                return_value=asyncio.get_running_loop().create_future()
+            ),
+        )
+        # E.g. the request waited for the EXI codec, leaving no time for the CSMS
+        self.comm_session.message_received_at = (
+            time.monotonic() - Timeouts.CHARGE_PARAMETER_DISCOVERY_REQ
+        )
+        charge_parameter_discovery = ChargeParameterDiscovery(self.comm_session)
+
+        await asyncio.wait_for(
+            charge_parameter_discovery.process_message(
+                message=get_charge_parameter_discovery_req_message_no_departure_time()
+            ),
+            0.5,
+        )
+
+        assert (
+            charge_parameter_discovery.message.body.charge_parameter_discovery_res.evse_processing  # noqa
+            == EVSEProcessing.ONGOING
+        )
+
     async def test_charge_parameter_discovery_res_v2g2_303(self):
         # V2G2-303 : Sum of individual time intervals shall match the period of time
         # indicated by the EVCC.
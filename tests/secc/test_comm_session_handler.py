@@ -0,0 +1,160 @@
+import asyncio
+import socket
+from contextlib import contextmanager
+from typing import Optional
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+import pytest_asyncio
+
+from iso15118.secc.comm_session_handler import CommunicationSessionHandler
+from iso15118.secc.secc_settings import Config
+from iso15118.secc.transport.tcp_server import TCPServer
+from iso15118.shared.exi_codec import EXI
+from iso15118.shared.inprocess_exi_codec import InProcessEXICodec
+from iso15118.shared.messages.enums import Protocol
+from iso15118.shared.messages.sdp import SDPRequest, Security, Transport
+from iso15118.shared.messages.v2gtp import V2GTPMessage
+from iso15118.shared.notifications import UDPPacketNotification
+
+
+class FakeServerFactory:
+    """
+    Replaces TCPServer.server_factory, without binding any socket, and
+    get_ssl_context(), which returns ssl_context
+    """
+
+    def __init__(self, ssl_context: Optional[object] = None):
+        self.ssl_context = ssl_context or object()
+        self.calls = 0
+
+    def get_ssl_context(self, server_side: bool):
+        return self.ssl_context
+
+    def __get__(self, tcp_server: TCPServer, owner):
+        async def server_factory(ready_event: asyncio.Event, tls: bool):
+            self.calls += 1
+            tcp_server.ssl_context = self.ssl_context if tls else None
+            tcp_server.is_tls_enabled = tcp_server.ssl_context is not None
+            tcp_server.ipv6_address_host = "fe80::1"
+            tcp_server.ipv6_address_bytes = socket.inet_pton(socket.AF_INET6, "fe80::1")
+            ready_event.set()
+            await asyncio.Event().wait()
+
+        return server_factory
+
+    @contextmanager
+    def patch(self):
+        with patch.object(TCPServer, "server_factory", self), patch(
+            "iso15118.secc.comm_session_handler.get_ssl_context",
+            self.get_ssl_context,
+        ):
+            yield
+
+
+@pytest.mark.asyncio
+class TestTCPServers:
+    @pytest_asyncio.fixture
+    async def handler(self):
+        previous_codec = EXI().exi_codec
+        handler = CommunicationSessionHandler(
+            Config(), InProcessEXICodec(), AsyncMock()
+        )
+        yield handler
+        for tcp_server_handler in handler.tcp_server_handlers.values():
+            tcp_server_handler.cancel()
+        EXI().exi_codec = previous_codec
+
+    async def start_tcp_servers(self, handler: CommunicationSessionHandler):
+        for with_tls in (False, True):
+            handler.tcp_servers[with_tls] = TCPServer(asyncio.Queue(), "eth0")
+            await handler.start_tcp_server(with_tls)
+
+    async def test_sdp_requests_reuse_running_servers(self, handler):
+        server_factory = FakeServerFactory()
+        with server_factory.patch():
+            await self.start_tcp_servers(handler)
+            for security in (Security.TLS, Security.NO_TLS, Security.TLS):
+                sdp_response = await handler.process_sdp_request(
+                    SDPRequest(security, Transport.TCP)
+                )
+                assert sdp_response.security == security
+                assert (
+                    sdp_response.port
+                    == handler.tcp_servers[security == Security.TLS].port
+                )
+
+        assert server_factory.calls == 2
+
+    async def test_tls_server_restarts_with_new_ssl_context(self, handler):
+        server_factory = FakeServerFactory()
+        with server_factory.patch():
+            await self.start_tcp_servers(handler)
+            await handler.check_ready_status()
+            # E.g. new SECC certificates got installed
+            server_factory.ssl_context = object()
+            await handler.process_sdp_request(SDPRequest(Security.TLS, Transport.TCP))
+            sdp_response = await handler.process_sdp_request(
+                SDPRequest(Security.TLS, Transport.TCP)
+            )
+
+        assert server_factory.calls == 3
+        assert sdp_response.security == Security.TLS
+        assert handler.tcp_servers[True].ssl_context is server_factory.ssl_context
+
+    async def send_sdp_request(
+        self, handler: CommunicationSessionHandler, security: Security
+    ):
+        sdp_request = SDPRequest(security, Transport.TCP)
+        v2gtp_msg = V2GTPMessage(
+            Protocol.UNKNOWN, sdp_request.payload_type, sdp_request.to_payload()
+        )
+        await handler.process_incoming_udp_packet(
+            UDPPacketNotification(v2gtp_msg.to_bytes(), ("fe80::2", 49152, 0, 0))
+        )
+
+    async def test_repeated_sdp_requests_are_answered_from_cache(self, handler):
+        handler.udp_server = MagicMock()
+        with FakeServerFactory().patch(), patch.object(
+            handler, "process_sdp_request", wraps=handler.process_sdp_request
+        ) as process_sdp_request:
+            await self.start_tcp_servers(handler)
+            for _ in range(3):
+                await self.send_sdp_request(handler, Security.NO_TLS)
+            await self.send_sdp_request(handler, Security.TLS)
+
+        responses = [call.args[0] for call in handler.udp_server.send_bytes.mock_calls]
+        assert process_sdp_request.call_count == 2
+        assert responses[0] == responses[1] == responses[2] != responses[3]
+
+    async def test_cached_sdp_response_expires_with_tls_server(self, handler):
+        handler.udp_server = MagicMock()
+        server_factory = FakeServerFactory()
+        with server_factory.patch():
+            await self.start_tcp_servers(handler)
+            await self.send_sdp_request(handler, Security.TLS)
+            # E.g. new SECC certificates got installed
+            server_factory.ssl_context = object()
+            await self.send_sdp_request(handler, Security.TLS)
+            await self.send_sdp_request(handler, Security.TLS)
+
+        assert server_factory.calls == 3
+        assert handler.udp_server.send_bytes.call_count == 3
+
+    async def test_cached_sdp_response_without_tls_expires_with_certificates(
+        self, handler
+    ):
+        handler.udp_server = MagicMock()
+        server_factory = FakeServerFactory()
+        # No SECC certificates, so the TLS request falls back to no TLS
+        server_factory.ssl_context = None
+        with server_factory.patch():
+            await self.start_tcp_servers(handler)
+            await self.send_sdp_request(handler, Security.TLS)
+            server_factory.ssl_context = object()
+            await self.send_sdp_request(handler, Security.TLS)
+
+        responses = [call.args[0] for call in handler.udp_server.send_bytes.mock_calls]
+        assert server_factory.calls == 3
+        assert responses[0] != responses[1]
+        assert handler.tcp_servers[True].ssl_context is server_factory.ssl_context
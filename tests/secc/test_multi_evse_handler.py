@@ -0,0 +1,59 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from iso15118.secc import MultiEVSESECCHandler, SECCHandler
+from iso15118.secc.secc_settings import Config, EVSEConfig, load_evse_configs
+from iso15118.shared.exceptions import InvalidSettingsValueError
+from iso15118.shared.exi_codec import EXI
+from iso15118.shared.inprocess_exi_codec import InProcessEXICodec
+
+
+class TestLoadEVSEConfigs:
+    def test_entries(self):
+        evses = load_evse_configs(["eth1:15118", " 15119", "eth2", ""], "eth0")
+
+        assert evses == [
+            EVSEConfig("eth1", 15118),
+            EVSEConfig("eth0", 15119),
+            EVSEConfig("eth2"),
+        ]
+
+    def test_invalid_port(self):
+        with pytest.raises(InvalidSettingsValueError):
+            load_evse_configs(["eth1:port"], "eth0")
+
+
+@pytest.mark.asyncio
+class TestMultiEVSESECCHandler:
+    async def test_each_evse_gets_its_own_handler(self):
+        previous_codec = EXI().exi_codec
+        evse_controllers = {
+            EVSEConfig("eth0", 15118): AsyncMock(),
+            EVSEConfig("eth0", 15119): AsyncMock(),
+            EVSEConfig("eth1"): AsyncMock(),
+        }
+        multi_evse_handler = MultiEVSESECCHandler(
+            InProcessEXICodec(), evse_controllers, Config()
+        )
+        started = []
+
+        async def start(handler, iface, start_udp_server=True, sdp_custom_port=None):
+            started.append((handler, iface, sdp_custom_port))
+            await asyncio.Event().wait()
+
+        with patch.object(SECCHandler, "start", start):
+            task = asyncio.create_task(multi_evse_handler.start())
+            while len(started) < len(evse_controllers):
+                await asyncio.sleep(0)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+        EXI().exi_codec = previous_codec
+
+        for evse, evse_controller in evse_controllers.items():
+            handler = multi_evse_handler.get_handler(evse.iface, evse.sdp_port)
+            assert handler.evse_controller is evse_controller
+            assert (handler, evse.iface, evse.sdp_port) in started
+        assert multi_evse_handler.get_handler("eth1", 15118) is None
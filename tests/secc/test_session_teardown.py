@@ -0,0 +1,121 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+import pytest_asyncio
+
+from iso15118.secc.comm_session_handler import (
+    CommunicationSessionHandler,
+    SECCCommunicationSession,
+)
+from iso15118.secc.secc_settings import Config
+from iso15118.shared.exi_codec import EXI
+from iso15118.shared.inprocess_exi_codec import InProcessEXICodec
+from iso15118.shared.memory_transport import MemoryStreamTransport, open_memory_stream
+from iso15118.shared.messages.enums import SessionStopAction
+from iso15118.shared.settings import SettingKey, shared_settings
+
+DATA_LINK_DELAY = 0.05
+TCP_CLOSE_DELAY = 0.05
+
+
+@pytest.fixture(autouse=True)
+def teardown_delays():
+    previous = {
+        key: shared_settings.get(key)
+        for key in (
+            SettingKey.SESSION_STOP_DATA_LINK_DELAY,
+            SettingKey.SESSION_STOP_TCP_CLOSE_DELAY,
+        )
+    }
+    shared_settings[SettingKey.SESSION_STOP_DATA_LINK_DELAY] = DATA_LINK_DELAY
+    shared_settings[SettingKey.SESSION_STOP_TCP_CLOSE_DELAY] = TCP_CLOSE_DELAY
+    yield
+    shared_settings.update(previous)
+
+
+@pytest_asyncio.fixture
+async def evcc_reader_and_session():
+    """A session of the SECC and the reader of the EVCC it's connected to"""
+    evcc_end, secc_end = MemoryStreamTransport.pair(
+        ("fe80::2", 49152, 0, 0), ("fe80::1", 50000, 0, 0)
+    )
+    evcc_reader, _ = await open_memory_stream(evcc_end, None, server_side=False)
+    transport = await open_memory_stream(secc_end, None, server_side=True)
+    comm_session = SECCCommunicationSession(
+        transport, asyncio.Queue(), Config(), AsyncMock(), "DE*SW*E1"
+    )
+    yield evcc_reader, comm_session
+    await comm_session.frame_reader.stop()
+
+
+@pytest.mark.asyncio
+class TestSessionTeardown:
+    async def test_stop_returns_before_teardown(self, evcc_reader_and_session):
+        evcc_reader, comm_session = evcc_reader_and_session
+        evse_controller = comm_session.evse_controller
+
+        teardown = await comm_session.stop("Session stopped")
+        data_link_updated_at_once = evse_controller.update_data_link.called
+        await asyncio.sleep(DATA_LINK_DELAY * 1.5)
+        data_link_updated = evse_controller.update_data_link.called
+        tcp_closed_early = comm_session.writer.is_closing()
+        await teardown
+
+        assert not data_link_updated_at_once
+        assert data_link_updated
+        evse_controller.update_data_link.assert_awaited_once_with(
+            SessionStopAction.TERMINATE
+        )
+        evse_controller.session_ended.assert_awaited_once()
+        assert not tcp_closed_early
+        assert comm_session.writer.is_closing()
+        assert await evcc_reader.read() == b""
+        assert await comm_session.stop("Stopped twice") is teardown
+
+    async def test_cancelled_teardown_closes_tcp_at_once(self, evcc_reader_and_session):
+        evcc_reader, comm_session = evcc_reader_and_session
+
+        teardown = await comm_session.stop("Session stopped")
+        await asyncio.sleep(0)
+        teardown.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await teardown
+
+        comm_session.evse_controller.update_data_link.assert_not_awaited()
+        comm_session.evse_controller.session_ended.assert_awaited_once_with(
+            str(comm_session.current_state), "Session stopped"
+        )
+        assert await asyncio.wait_for(evcc_reader.read(), DATA_LINK_DELAY) == b""
+
+    async def test_handler_is_free_while_session_tears_down(
+        self, evcc_reader_and_session
+    ):
+        evcc_reader, comm_session = evcc_reader_and_session
+        previous_codec = EXI().exi_codec
+        handler = CommunicationSessionHandler(
+            Config(), InProcessEXICodec(), AsyncMock()
+        )
+        EXI().exi_codec = previous_codec
+        handler.comm_sessions["fe80::2"] = (
+            comm_session,
+            asyncio.create_task(comm_session.stop("Session stopped")),
+        )
+        await asyncio.sleep(0)
+
+        await asyncio.wait_for(
+            handler.end_current_session(
+                ("fe80::2", 49152, 0, 0), SessionStopAction.TERMINATE
+            ),
+            DATA_LINK_DELAY / 2,
+        )
+        teardowns = set(handler.teardowns)
+        # E.g. the next EV connected
+        handler.cancel_teardowns()
+        with pytest.raises(asyncio.CancelledError):
+            await comm_session.teardown
+
+        assert handler.comm_sessions == {}
+        assert teardowns == {comm_session.teardown}
+        assert handler.teardowns == set()
+        assert await asyncio.wait_for(evcc_reader.read(), DATA_LINK_DELAY) == b""
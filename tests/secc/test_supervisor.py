@@ -0,0 +1,72 @@
+import multiprocessing
+import time
+
+from iso15118.secc.secc_settings import EVSEConfig
+from iso15118.secc.supervisor import SECCSupervisor, shard_evses
+
+EVSES = [EVSEConfig("eth0", sdp_port) for sdp_port in range(15118, 15123)]
+
+
+def report_and_crash(worker_id, evses, metrics_queue, metrics_interval):
+    metrics_queue.put({"worker": worker_id, "sessions": len(evses)})
+    raise SystemExit(1)
+
+
+def wait_for_exit(supervisor: SECCSupervisor):
+    for process in supervisor.processes.values():
+        process.join(timeout=10)
+
+
+class TestShardEVSEs:
+    def test_evses_are_spread_evenly(self):
+        shards = shard_evses(EVSES, 2)
+
+        assert shards == [EVSES[0::2], EVSES[1::2]]
+
+    def test_no_idle_workers(self):
+        assert len(shard_evses(EVSES[:2], 8)) == 2
+
+
+class TestSECCSupervisor:
+    def test_crashed_workers_are_restarted(self):
+        supervisor = SECCSupervisor(
+            EVSES,
+            workers=2,
+            restart_delay=0,
+            worker_target=report_and_crash,
+            context=multiprocessing.get_context("fork"),
+        )
+        for worker_id in supervisor.workers:
+            supervisor.start_worker(worker_id)
+        wait_for_exit(supervisor)
+
+        supervisor.check_workers()
+        wait_for_exit(supervisor)
+        deadline = time.monotonic() + 10
+        while len(supervisor.metrics) < 2 and time.monotonic() < deadline:
+            supervisor.gather_metrics(timeout=1)
+        supervisor.stop()
+
+        assert supervisor.restarts == {0: 1, 1: 1}
+        assert supervisor.metrics[0]["sessions"] == 3
+        assert supervisor.summary()["sessions"] == 5
+        assert supervisor.summary()["restarts"] == 2
+
+    def test_repeated_crashes_delay_restarts(self):
+        supervisor = SECCSupervisor(
+            EVSES,
+            workers=1,
+            restart_delay=0.5,
+            worker_target=report_and_crash,
+            context=multiprocessing.get_context("fork"),
+        )
+        supervisor.start_worker(0)
+        wait_for_exit(supervisor)
+        supervisor._crashes[0] = 3
+
+        supervisor.check_workers()
+        supervisor.stop()
+
+        # Restarted in 0.5 * 2**3 s
+        assert supervisor.restarts == {0: 0}
+        assert supervisor._restart_at[0] - time.monotonic() > 3
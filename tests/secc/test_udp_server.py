@@ -0,0 +1,46 @@
+from iso15118.secc.transport.udp_server import SDPRequestFilter
+
+SDP_REQUEST = bytes.fromhex("01fe900000000002" "1000")
+SDP_REQUEST_TLS = bytes.fromhex("01fe900000000002" "0000")
+
+
+class TestSDPRequestFilter:
+    def test_duplicates_are_dropped_within_window(self):
+        request_filter = SDPRequestFilter(duplicate_window=0.1, rate=0, burst=5)
+
+        admitted = [
+            request_filter.admit(SDP_REQUEST, "fe80::2", now=0.0),
+            request_filter.admit(SDP_REQUEST, "fe80::2", now=0.05),
+            request_filter.admit(SDP_REQUEST, "fe80::3", now=0.05),
+            request_filter.admit(SDP_REQUEST_TLS, "fe80::2", now=0.06),
+            # The EVCC's next retry
+            request_filter.admit(SDP_REQUEST_TLS, "fe80::2", now=0.31),
+        ]
+
+        assert admitted == [True, False, True, True, True]
+        assert request_filter.stats()["duplicates"] == 1
+
+    def test_sources_are_rate_limited_after_burst(self):
+        request_filter = SDPRequestFilter(duplicate_window=0, rate=4, burst=2)
+
+        admitted = [
+            request_filter.admit(SDP_REQUEST, "fe80::2", now=now)
+            for now in (0.0, 0.01, 0.02, 0.03, 0.3)
+        ]
+        other_source = request_filter.admit(SDP_REQUEST, "fe80::3", now=0.03)
+
+        assert admitted == [True, True, False, False, True]
+        assert other_source
+        assert request_filter.stats()["rate_limited"] == 2
+
+    def test_least_recently_seen_sources_are_forgotten(self):
+        request_filter = SDPRequestFilter(
+            duplicate_window=1, rate=0, burst=1, max_sources=2
+        )
+
+        for host in ("fe80::2", "fe80::3", "fe80::4"):
+            request_filter.admit(SDP_REQUEST, host, now=0.0)
+
+        assert request_filter.stats()["sources"] == 2
+        assert request_filter.admit(SDP_REQUEST, "fe80::2", now=0.1)
+        assert not request_filter.admit(SDP_REQUEST, "fe80::4", now=0.1)
@@ -0,0 +1,70 @@
+"""
+Compares the time needed to build the decoded test messages with full
+pydantic validation (parse_obj) and with trusted construction
+(build_trusted), per message type.
+
+Run it from the repository root with
+    python -m tests.shared.bench_exi_model_builder [--rounds N]
+"""
+
+import argparse
+import json
+import time
+from typing import Callable, List, Type
+
+from pydantic import BaseModel
+
+from iso15118.shared.exi_codec import CustomJSONDecoder
+from iso15118.shared.exi_model_builder import build_trusted
+from iso15118.shared.messages.din_spec.msgdef import V2GMessage as V2GMessageDINSPEC
+from iso15118.shared.messages.iso15118_2.msgdef import V2GMessage as V2GMessageV2
+from tests.shared.messages.exi_message_container import ExiMessageContainer
+from tests.shared.messages.test_din_spec import DIN_TEST_MESSAGES
+from tests.shared.messages.test_iso15118_2 import ISO_TEST_MESSAGES
+
+
+def time_per_call(build: Callable[[], BaseModel], rounds: int) -> float:
+    """Returns the mean time of a call of build in microseconds"""
+    build()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        build()
+    return (time.perf_counter() - start) / rounds * 1e6
+
+
+def bench(
+    protocol: str,
+    model: Type[BaseModel],
+    messages: List[ExiMessageContainer],
+    rounds: int,
+):
+    seen = set()
+    for message in messages:
+        if message.message_name in seen:
+            continue
+        seen.add(message.message_name)
+        decoded = json.loads(message.json_str, cls=CustomJSONDecoder)["V2G_Message"]
+        validated = time_per_call(lambda: model.parse_obj(decoded), rounds)
+        trusted = time_per_call(lambda: build_trusted(model, decoded), rounds)
+        print(
+            f"{protocol:<12} {message.message_name:<28} {validated:>10.1f} "
+            f"{trusted:>10.1f} {(1 - trusted / validated) * 100:>9.1f}%"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(
+        f"{'Protocol':<12} {'Message':<28} {'parse_obj':>10} {'trusted':>10} "
+        f"{'saving':>10}"
+    )
+    print(f"{'':<41} {'[us]':>10} {'[us]':>10}")
+    bench("ISO 15118-2", V2GMessageV2, ISO_TEST_MESSAGES, args.rounds)
+    bench("DIN 70121", V2GMessageDINSPEC, DIN_TEST_MESSAGES, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import asyncio
+import csv
+
+import pytest
+
+from iso15118.shared.benchmark_recorder import BenchmarkRecorder
+from iso15118.shared.utils import cancel_task
+
+
+def read_rows(path) -> list:
+    with open(path, newline="") as file:
+        return list(csv.reader(file))
+
+
+@pytest.mark.asyncio
+class TestBenchmarkRecorder:
+    async def test_rows_are_written_in_batches(self, tmp_path):
+        path = tmp_path / "benchmark.csv"
+        recorder = BenchmarkRecorder(str(path), ["Message"], flush_interval=0.01)
+        task = asyncio.create_task(recorder.run())
+
+        recorder.record(["Heartbeat"])
+        recorder.record(["Authorize"])
+        rows_while_recording = read_rows(path)
+        await asyncio.sleep(0.05)
+        rows_after_flush = read_rows(path)
+        recorder.record(["TransactionEvent"])
+        await cancel_task(task)
+
+        assert rows_while_recording == [["Message"]]
+        assert rows_after_flush == [["Message"], ["Heartbeat"], ["Authorize"]]
+        # The rows buffered when stopping the recorder are written as well
+        assert read_rows(path)[-1] == ["TransactionEvent"]
+        assert recorder.stats() == {"buffered": 0, "written": 3, "dropped": 0}
+
+    async def test_oldest_rows_are_dropped_if_buffer_is_full(self, tmp_path):
+        path = tmp_path / "benchmark.csv"
+        recorder = BenchmarkRecorder(str(path), ["Message"], buffer_size=2)
+
+        for message in ("BootNotification", "Heartbeat", "Authorize"):
+            recorder.record([message])
+        recorder.flush()
+
+        assert read_rows(path) == [["Message"], ["Heartbeat"], ["Authorize"]]
+        assert recorder.dropped == 1
@@ -0,0 +1,89 @@
+import asyncio
+from typing import Dict, List
+
+import pytest
+
+from iso15118.shared.csms_connection import CSMSConnectionManager, CSMSEndpoint
+
+
+class FakeConnection:
+    def __init__(self, endpoint: CSMSEndpoint):
+        self.endpoint = endpoint
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeCSMSNodes:
+    """Accepts connections after the given delays, refusing the down nodes"""
+
+    def __init__(self, delays: Dict[str, float]):
+        self.delays = delays
+        self.down: List[str] = []
+        self.attempts: List[str] = []
+        self.connections: List[FakeConnection] = []
+
+    async def open_connection(self, endpoint: CSMSEndpoint) -> FakeConnection:
+        self.attempts.append(str(endpoint))
+        await asyncio.sleep(self.delays[str(endpoint)])
+        if str(endpoint) in self.down:
+            raise ConnectionRefusedError()
+        connection = FakeConnection(endpoint)
+        self.connections.append(connection)
+        return connection
+
+
+@pytest.mark.asyncio
+class TestCSMSConnectionManager:
+    async def test_fastest_endpoint_is_connected_first(self):
+        nodes = FakeCSMSNodes({"csms1:9000": 0.05, "csms2:9000": 0.01})
+        manager = CSMSConnectionManager(
+            [CSMSEndpoint.parse(endpoint) for endpoint in nodes.delays],
+            nodes.open_connection,
+        )
+
+        endpoint, connection = await manager.connect()
+        await asyncio.sleep(0.06)
+
+        assert str(endpoint) == "csms2:9000"
+        assert nodes.attempts == ["csms1:9000", "csms2:9000"]
+        # The attempt still connecting was given up
+        assert nodes.connections == [connection]
+        assert manager.stats()["endpoint"] == "csms2:9000"
+
+    async def test_failover_to_next_node_and_back_off_from_failed_one(self):
+        nodes = FakeCSMSNodes({"csms1:9000": 0, "csms2:9000": 0})
+        endpoints = [CSMSEndpoint.parse(endpoint) for endpoint in nodes.delays]
+        manager = CSMSConnectionManager(
+            endpoints, nodes.open_connection, parallel_connects=1, backoff_base=10
+        )
+        first, _ = await manager.connect()
+
+        nodes.down.append(str(first))
+        manager.disconnected()
+        second, _ = await manager.connect()
+        stats = manager.stats()
+
+        assert (str(first), str(second)) == ("csms1:9000", "csms2:9000")
+        assert nodes.attempts == ["csms1:9000", "csms2:9000"]
+        assert (stats["connects"], stats["failovers"]) == (2, 1)
+        assert stats["endpoints"]["csms1:9000"]["failures"] == 1
+        assert stats["last_reconnect_ms"] < 100
+
+    async def test_all_nodes_down_retries_after_backoff(self):
+        nodes = FakeCSMSNodes({"csms1:9000": 0})
+        nodes.down.append("csms1:9000")
+        manager = CSMSConnectionManager(
+            [CSMSEndpoint.parse("csms1:9000")],
+            nodes.open_connection,
+            backoff_base=0.01,
+        )
+
+        connect = asyncio.create_task(manager.connect())
+        await asyncio.sleep(0.1)
+        nodes.down.clear()
+        endpoint, _ = await asyncio.wait_for(connect, 1)
+
+        assert 2 <= len(nodes.attempts) < 10
+        assert endpoint.failures == 0
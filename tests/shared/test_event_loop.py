@@ -0,0 +1,36 @@
+import asyncio
+import sys
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from iso15118.shared.event_loop import EventLoop, use_event_loop
+
+
+class UVLoopPolicy(asyncio.DefaultEventLoopPolicy):
+    pass
+
+
+@pytest.fixture(autouse=True)
+def restore_event_loop_policy():
+    yield
+    asyncio.set_event_loop_policy(None)
+
+
+class TestEventLoop:
+    def test_uvloop_is_used_if_installed(self):
+        uvloop = SimpleNamespace(EventLoopPolicy=UVLoopPolicy)
+        with patch.dict(sys.modules, {"uvloop": uvloop}):
+            used = use_event_loop(EventLoop.UVLOOP)
+
+        assert used == EventLoop.UVLOOP
+        assert isinstance(asyncio.get_event_loop_policy(), UVLoopPolicy)
+
+    def test_asyncio_is_used_without_uvloop(self):
+        # A None entry makes the import fail
+        with patch.dict(sys.modules, {"uvloop": None}):
+            used = use_event_loop(EventLoop.UVLOOP)
+
+        assert used == EventLoop.ASYNCIO
+        assert not isinstance(asyncio.get_event_loop_policy(), UVLoopPolicy)
@@ -0,0 +1,110 @@
+import copy
+import json
+
+import pytest
+
+from iso15118.shared.exi_cache import EXICache, freeze
+from iso15118.shared.exi_codec import CustomJSONDecoder
+from iso15118.shared.messages.iso15118_2.body import AuthorizationReq
+from iso15118.shared.messages.iso15118_2.datatypes import ResponseCode
+from iso15118.shared.messages.iso15118_2.msgdef import V2GMessage as V2GMessageV2
+from tests.shared.messages.test_iso15118_2 import ISO_TEST_MESSAGES
+
+
+class TestEXICache:
+    def test_get_counts_hits_and_misses(self):
+        cache = EXICache(max_entries=2, max_bytes=100)
+        cache.put("a", b"\x80\x01", 2)
+
+        assert cache.get("a") == b"\x80\x01"
+        assert cache.get("b") is None
+        assert cache.stats() == {
+            "entries": 1,
+            "bytes": 2,
+            "hits": 1,
+            "misses": 1,
+            "evictions": 0,
+        }
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = EXICache(max_entries=2, max_bytes=100)
+        cache.put("a", b"a", 1)
+        cache.put("b", b"b", 1)
+        cache.get("a")
+
+        cache.put("c", b"c", 1)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == b"a"
+        assert cache.get("c") == b"c"
+        assert cache.evictions == 1
+
+    def test_byte_limit_evicts_entries(self):
+        cache = EXICache(max_entries=10, max_bytes=5)
+        cache.put("a", b"aaa", 3)
+        cache.put("b", b"bbb", 3)
+
+        assert len(cache) == 1
+        assert cache.size == 3
+        assert cache.get("b") == b"bbb"
+
+    def test_oversized_value_is_not_cached(self):
+        cache = EXICache(max_entries=10, max_bytes=5)
+
+        cache.put("a", b"aaaaaa", 6)
+
+        assert len(cache) == 0
+
+    def test_zero_entries_disables_cache(self):
+        cache = EXICache(max_entries=0, max_bytes=100)
+
+        cache.put("a", b"a", 1)
+
+        assert cache.get("a") is None
+
+
+def iso_message(message_name: str) -> V2GMessageV2:
+    for message in ISO_TEST_MESSAGES:
+        if message.message_name == message_name:
+            decoded = json.loads(message.json_str, cls=CustomJSONDecoder)
+            return V2GMessageV2.parse_obj(decoded["V2G_Message"])
+    raise KeyError(message_name)
+
+
+class TestFreeze:
+    def test_frozen_message_rejects_assignments(self):
+        message = iso_message("ServiceDiscoveryRes")
+
+        frozen = freeze(message)
+
+        assert frozen == V2GMessageV2.parse_obj(frozen.dict())
+        assert isinstance(frozen, V2GMessageV2)
+        assert str(frozen.body.service_discovery_res) == "ServiceDiscoveryRes"
+        with pytest.raises(TypeError):
+            frozen.header.session_id = "00"
+        with pytest.raises(TypeError):
+            frozen.body.service_discovery_res.response_code = ResponseCode.FAILED
+
+    def test_lists_reject_modifications(self):
+        frozen = freeze(iso_message("ServiceDiscoveryRes"))
+
+        auth_options = frozen.body.service_discovery_res.auth_option_list.auth_options
+        with pytest.raises(TypeError):
+            auth_options.append(auth_options[0])
+        assert copy.deepcopy(auth_options) == auth_options
+
+    def test_original_message_is_untouched(self):
+        message = iso_message("SessionSetupReq")
+
+        freeze(message)
+        message.header.session_id = "00"
+
+        assert message.header.session_id == "00"
+
+    def test_message_with_challenge_is_not_frozen(self):
+        message = iso_message("AuthorizationReq")
+        message.body.authorization_req = AuthorizationReq(
+            id="id1", gen_challenge=bytes(16)
+        )
+
+        assert freeze(message) is None
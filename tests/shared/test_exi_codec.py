@@ -0,0 +1,275 @@
+import json
+import threading
+from datetime import datetime, timedelta
+from unittest.mock import Mock, patch
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.hashes import SHA256
+from cryptography.hazmat.primitives.serialization import Encoding
+from cryptography.x509.oid import NameOID
+
+from iso15118.shared.exi_cache import EXICache
+from iso15118.shared.exi_codec import EXI, CustomJSONDecoder, CustomJSONEncoder
+from iso15118.shared.inprocess_exi_codec import InProcessEXICodec
+from iso15118.shared.messages.app_protocol import (
+    AppProtocol,
+    ResponseCodeSAP,
+    SupportedAppProtocolReq,
+    SupportedAppProtocolRes,
+)
+from iso15118.shared.messages.enums import ISOV2PayloadTypes, Namespace, Protocol
+from iso15118.shared.messages.iso15118_2.body import AuthorizationReq
+from iso15118.shared.messages.iso15118_2.msgdef import V2GMessage as V2GMessageV2
+from iso15118.shared.security import (
+    create_signature_async,
+    get_elements_to_sign_async,
+    verify_signature_async,
+)
+from iso15118.shared.settings import load_shared_settings
+from iso15118.shared.states import Terminate
+from tests.shared.messages.exi_message_container import ExiMessageContainer
+from tests.shared.messages.test_iso15118_2 import ISO_TEST_MESSAGES
+
+
+class ThreadRecordingCodec(InProcessEXICodec):
+    def __init__(self):
+        super().__init__()
+        self.threads = []
+
+    def encode_dict(self, message: dict, namespace: str) -> bytes:
+        self.threads.append(threading.current_thread())
+        return super().encode_dict(message, namespace)
+
+    def decode_dict(self, stream: bytes, namespace: str) -> dict:
+        self.threads.append(threading.current_thread())
+        return super().decode_dict(stream, namespace)
+
+
+@pytest.mark.asyncio
+class TestEXIAsync:
+    @pytest.fixture(autouse=True)
+    def _exi_codec(self):
+        load_shared_settings()
+        previous_codec = EXI().exi_codec
+        self.codec = ThreadRecordingCodec()
+        EXI().set_exi_codec(self.codec)
+        yield
+        EXI().exi_codec = previous_codec
+        EXI().get_encode_cache().clear()
+
+    async def test_to_exi_async_and_from_exi_async_run_on_executor(self):
+        sap_req = SupportedAppProtocolReq(
+            app_protocol=[
+                AppProtocol(
+                    protocol_ns=Namespace.ISO_V2_MSG_DEF,
+                    major_version=2,
+                    minor_version=0,
+                    schema_id=1,
+                    priority=1,
+                )
+            ]
+        )
+
+        exi_stream = await EXI().to_exi_async(sap_req, Namespace.SAP)
+        decoded = await EXI().from_exi_async(exi_stream, Namespace.SAP)
+
+        assert decoded == sap_req
+        assert len(self.codec.threads) == 2
+        assert all(
+            thread is not threading.main_thread() for thread in self.codec.threads
+        )
+
+    async def test_signature_is_created_and_verified_on_executor(self):
+        key = ec.generate_private_key(ec.SECP256R1())
+        name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "ContractLeaf")])
+        leaf_cert = (
+            x509.CertificateBuilder()
+            .subject_name(name)
+            .issuer_name(name)
+            .public_key(key.public_key())
+            .serial_number(1)
+            .not_valid_before(datetime.utcnow())
+            .not_valid_after(datetime.utcnow() + timedelta(days=1))
+            .sign(key, SHA256())
+            .public_bytes(Encoding.DER)
+        )
+        authorization_req = AuthorizationReq(id="id1", gen_challenge=bytes(16))
+
+        elements_to_sign = await get_elements_to_sign_async(
+            [authorization_req], Namespace.ISO_V2_MSG_DEF
+        )
+        signature = await create_signature_async(elements_to_sign, key)
+        verified = await verify_signature_async(signature, elements_to_sign, leaf_cert)
+
+        assert verified
+        assert self.codec.threads
+        assert all(
+            thread is not threading.main_thread() for thread in self.codec.threads
+        )
+
+    async def test_identical_messages_are_encoded_once(self):
+        sap_res = SupportedAppProtocolRes(
+            response_code=ResponseCodeSAP.NEGOTIATION_OK, schema_id=1
+        )
+        hits = EXI().get_encode_cache().hits
+
+        first = EXI().to_exi(sap_res, Namespace.SAP)
+        second = EXI().to_exi(
+            SupportedAppProtocolRes(
+                response_code=ResponseCodeSAP.NEGOTIATION_OK, schema_id=1
+            ),
+            Namespace.SAP,
+        )
+
+        assert first == second == bytes.fromhex("80400040")
+        assert len(self.codec.threads) == 1
+        assert EXI().get_encode_cache().hits == hits + 1
+
+    async def test_to_exi_many_matches_to_exi(self):
+        sap_res_ok = SupportedAppProtocolRes(
+            response_code=ResponseCodeSAP.NEGOTIATION_OK, schema_id=1
+        )
+        sap_res_failed = SupportedAppProtocolRes(
+            response_code=ResponseCodeSAP.NEGOTIATION_FAILED
+        )
+
+        exi_streams = EXI().to_exi_many([sap_res_ok, sap_res_failed], Namespace.SAP)
+
+        assert exi_streams == [
+            EXI().to_exi(sap_res_ok, Namespace.SAP),
+            EXI().to_exi(sap_res_failed, Namespace.SAP),
+        ]
+
+    async def test_encode_next_message_creates_v2gtp_message(self):
+        comm_session = Mock()
+        comm_session.protocol = Protocol.UNKNOWN
+        state = Terminate(comm_session)
+        sap_res = SupportedAppProtocolRes(
+            response_code=ResponseCodeSAP.NEGOTIATION_OK, schema_id=1
+        )
+
+        state.create_next_message(
+            None,
+            sap_res,
+            5,
+            Namespace.SAP,
+            ISOV2PayloadTypes.EXI_ENCODED,
+        )
+
+        assert state.next_v2gtp_msg is None
+        assert state.message == sap_res
+
+        await state.encode_next_message()
+
+        assert state.next_msg_to_encode is None
+        assert state.next_v2gtp_msg.payload == bytes.fromhex("80400040")
+
+
+class TestEXIDictTransfer:
+    @pytest.fixture(autouse=True)
+    def _exi_codec(self):
+        load_shared_settings()
+        previous_codec = EXI().exi_codec
+        EXI().set_exi_codec(InProcessEXICodec())
+        yield
+        EXI().exi_codec = previous_codec
+
+    @pytest.mark.parametrize(
+        "message",
+        ISO_TEST_MESSAGES,
+        ids=[f"dict_transfer_{msg.message_name}" for msg in ISO_TEST_MESSAGES],
+    )
+    def test_messages_bypass_json(self, message: ExiMessageContainer):
+        decoded_dict = json.loads(message.json_str, cls=CustomJSONDecoder)
+        v2g_message = V2GMessageV2.parse_obj(decoded_dict["V2G_Message"])
+
+        with patch("iso15118.shared.exi_codec.json") as json_module:
+            exi_stream = EXI().to_exi(v2g_message, Namespace.ISO_V2_MSG_DEF)
+            decoded = EXI().from_exi(exi_stream, Namespace.ISO_V2_MSG_DEF)
+
+        json_module.dumps.assert_not_called()
+        json_module.loads.assert_not_called()
+        assert decoded == v2g_message
+        # Same stream as for the JSON representation used by the other codecs
+        message_json = json.dumps(
+            {"V2G_Message": v2g_message.dict(by_alias=True, exclude_none=True)},
+            cls=CustomJSONEncoder,
+        )
+        assert exi_stream == EXI().exi_codec.encode(
+            message_json, Namespace.ISO_V2_MSG_DEF
+        )
+
+
+class TestEXIDecodeCache:
+    @pytest.fixture(autouse=True)
+    def _decode_cache(self):
+        load_shared_settings()
+        previous_codec = EXI().exi_codec
+        self.codec = ThreadRecordingCodec()
+        EXI().set_exi_codec(self.codec)
+        EXI().decode_cache = EXICache(max_entries=8, max_bytes=1024)
+        yield
+        EXI().decode_cache = None
+        EXI().exi_codec = previous_codec
+
+    def test_identical_payloads_are_decoded_once(self):
+        message = ISO_TEST_MESSAGES[0]
+        v2g_message = V2GMessageV2.parse_obj(
+            json.loads(message.json_str, cls=CustomJSONDecoder)["V2G_Message"]
+        )
+        exi_stream = EXI().to_exi(v2g_message, Namespace.ISO_V2_MSG_DEF)
+
+        first = EXI().from_exi(exi_stream, Namespace.ISO_V2_MSG_DEF)
+        second = EXI().from_exi(bytearray(exi_stream), Namespace.ISO_V2_MSG_DEF)
+
+        assert first is second
+        assert first == v2g_message
+        assert len(self.codec.threads) == 2
+        assert EXI().get_decode_cache().hits == 1
+        with pytest.raises(TypeError):
+            first.header.session_id = "00"
+
+    def test_cache_is_kept_while_codec_stays_the_same(self):
+        message = ISO_TEST_MESSAGES[0]
+        v2g_message = V2GMessageV2.parse_obj(
+            json.loads(message.json_str, cls=CustomJSONDecoder)["V2G_Message"]
+        )
+        exi_stream = EXI().to_exi(v2g_message, Namespace.ISO_V2_MSG_DEF)
+        EXI().from_exi(exi_stream, Namespace.ISO_V2_MSG_DEF)
+
+        # E.g. another EVSE of this process started with the shared codec
+        EXI().set_exi_codec(self.codec)
+        entries_with_same_codec = len(EXI().get_decode_cache())
+        EXI().set_exi_codec(ThreadRecordingCodec())
+
+        assert entries_with_same_codec == 1
+        assert len(EXI().get_decode_cache()) == 0
+
+
+class JSONOnlyCodec(InProcessEXICodec):
+    supports_dict = False
+
+
+class TestEXIJSONTransfer:
+    @pytest.fixture(autouse=True)
+    def _exi_codec(self):
+        load_shared_settings()
+        previous_codec = EXI().exi_codec
+        EXI().set_exi_codec(JSONOnlyCodec())
+        yield
+        EXI().exi_codec = previous_codec
+
+    @pytest.mark.parametrize(
+        "message",
+        ISO_TEST_MESSAGES,
+        ids=[f"json_transfer_{msg.message_name}" for msg in ISO_TEST_MESSAGES],
+    )
+    def test_messages_round_trip(self, message: ExiMessageContainer):
+        decoded_dict = json.loads(message.json_str, cls=CustomJSONDecoder)
+        v2g_message = V2GMessageV2.parse_obj(decoded_dict["V2G_Message"])
+
+        exi_stream = EXI().to_exi(v2g_message, Namespace.ISO_V2_MSG_DEF)
+
+        assert EXI().from_exi(exi_stream, Namespace.ISO_V2_MSG_DEF) == v2g_message
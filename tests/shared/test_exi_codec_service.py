@@ -0,0 +1,90 @@
+import asyncio
+import json
+from unittest.mock import Mock
+
+import pytest
+import pytest_asyncio
+
+from iso15118.shared.exceptions import EXIEncodingError
+from iso15118.shared.exi_codec_service import EXICodecService
+from iso15118.shared.inprocess_exi_codec import InProcessEXICodec
+from iso15118.shared.messages.enums import Namespace
+from iso15118.shared.service_exi_codec import ServiceEXICodec
+
+SAP_RES_EXI = bytes.fromhex("80400040")
+SAP_RES_JSON = {
+    "supportedAppProtocolRes": {
+        "ResponseCode": "OK_SuccessfulNegotiation",
+        "SchemaID": 1,
+    }
+}
+
+
+@pytest.mark.asyncio
+class TestEXICodecService:
+    @pytest_asyncio.fixture
+    async def service(self, tmp_path):
+        service = EXICodecService(
+            InProcessEXICodec(), str(tmp_path / "exi.sock"), workers=2
+        )
+        await service.start()
+        yield service
+        await service.stop()
+
+    @pytest.fixture
+    def client(self, service):
+        client = ServiceEXICodec(service.socket_path)
+        yield client
+        client.close()
+
+    async def call(self, method, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, method, *args)
+
+    async def test_encode_and_decode(self, service, client):
+        exi = await self.call(client.encode, json.dumps(SAP_RES_JSON), Namespace.SAP)
+        decoded = await self.call(client.decode, exi, Namespace.SAP)
+
+        assert exi == SAP_RES_EXI
+        assert json.loads(decoded) == SAP_RES_JSON
+
+    async def test_codec_error_is_reported_to_client(self, service, client):
+        with pytest.raises(EXIEncodingError):
+            await self.call(client.encode, '{"UnknownReq": {}}', Namespace.SAP)
+        assert service.errors == 1
+
+    async def test_concurrent_requests_are_batched(self, service, client):
+        message = json.dumps(SAP_RES_JSON)
+
+        results = await asyncio.gather(
+            *[self.call(client.encode, message, Namespace.SAP) for _ in range(20)]
+        )
+
+        assert results == [SAP_RES_EXI] * 20
+        assert service.requests == 20
+        assert service.batches <= 20
+
+    async def test_encode_many_and_decode_many(self, service, client):
+        messages = [(json.dumps(SAP_RES_JSON), Namespace.SAP)] * 3
+
+        streams = await self.call(client.encode_many, messages)
+        decoded = await self.call(
+            client.decode_many, [(stream, Namespace.SAP) for stream in streams]
+        )
+
+        assert streams == [SAP_RES_EXI] * 3
+        assert [json.loads(message) for message in decoded] == [SAP_RES_JSON] * 3
+
+    async def test_health(self, service, client):
+        health = await self.call(client.health)
+
+        assert health["status"] == "ok"
+        assert health["connections"] == 1
+        assert health["codec"] == InProcessEXICodec().get_version()
+
+    async def test_health_does_not_wait_for_codec(self, service, client):
+        # E.g. all JVMs busy or broken
+        service.codec.get_version = Mock(side_effect=AssertionError)
+
+        health = await self.call(client.health)
+
+        assert health["codec"] == InProcessEXICodec().get_version()
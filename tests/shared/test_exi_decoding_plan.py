@@ -0,0 +1,92 @@
+import json
+from base64 import b64encode
+from typing import List, Optional, Union
+
+import pytest
+from pydantic import BaseModel
+
+from iso15118.shared.exi_codec import CustomJSONDecoder
+from iso15118.shared.exi_decoding_plan import get_decoding_plan
+from iso15118.shared.messages.din_spec.msgdef import V2GMessage as V2GMessageDINSPEC
+from iso15118.shared.messages.iso15118_2.datatypes import EMAID, EncryptedPrivateKey
+from iso15118.shared.messages.iso15118_2.msgdef import V2GMessage as V2GMessageV2
+from tests.shared.messages.exi_message_container import ExiMessageContainer
+from tests.shared.messages.test_din_spec import DIN_TEST_MESSAGES
+from tests.shared.messages.test_iso15118_2 import ISO_TEST_MESSAGES
+
+
+class Label(BaseModel):
+    text: str
+
+
+class Tree(BaseModel):
+    # The union's recursive member only gets its bytes field after the
+    # union has been compiled
+    children: Optional[List[Union["Tree", Label]]] = None
+    value: Optional[bytes] = None
+
+
+Tree.update_forward_refs()
+
+
+class TestDecodingPlan:
+    @pytest.mark.parametrize(
+        "message",
+        ISO_TEST_MESSAGES,
+        ids=[f"plan_{msg.message_name}" for msg in ISO_TEST_MESSAGES],
+    )
+    def test_iso15118_2_matches_json_decoder(self, message: ExiMessageContainer):
+        expected = json.loads(message.json_str, cls=CustomJSONDecoder)
+        decoded = json.loads(message.json_str)
+
+        get_decoding_plan(V2GMessageV2).apply(decoded["V2G_Message"])
+
+        assert V2GMessageV2.parse_obj(decoded["V2G_Message"]) == (
+            V2GMessageV2.parse_obj(expected["V2G_Message"])
+        )
+
+    @pytest.mark.parametrize(
+        "message",
+        DIN_TEST_MESSAGES,
+        ids=[f"plan_{msg.message_name}" for msg in DIN_TEST_MESSAGES],
+    )
+    def test_din_spec_matches_json_decoder(self, message: ExiMessageContainer):
+        expected = json.loads(message.json_str, cls=CustomJSONDecoder)
+        decoded = json.loads(message.json_str)
+
+        get_decoding_plan(V2GMessageDINSPEC).apply(decoded["V2G_Message"])
+
+        assert V2GMessageDINSPEC.parse_obj(decoded["V2G_Message"]) == (
+            V2GMessageDINSPEC.parse_obj(expected["V2G_Message"])
+        )
+
+    def test_short_bytes_value_is_decoded(self):
+        # Shorter than an EMAID once Base64 encoded, which the length
+        # heuristic of CustomJSONDecoder takes for a string
+        private_key = {"Id": "id1", "value": b64encode(b"\x01\x02\x03").decode()}
+
+        get_decoding_plan(EncryptedPrivateKey).apply(private_key)
+
+        assert private_key["value"] == b"\x01\x02\x03"
+
+    def test_string_value_is_kept(self):
+        emaid = {"Id": "id2", "value": "DE8AA1A2B3C4D5E6F7G8H9I0"}
+
+        get_decoding_plan(EMAID).apply(emaid)
+
+        assert emaid["value"] == "DE8AA1A2B3C4D5E6F7G8H9I0"
+
+    def test_plan_can_be_applied_twice(self):
+        private_key = {"Id": "id1", "value": b"\x01\x02\x03"}
+
+        get_decoding_plan(EncryptedPrivateKey).apply(private_key)
+
+        assert private_key["value"] == b"\x01\x02\x03"
+
+    def test_recursive_union_member_is_decoded(self):
+        value = b64encode(b"\x01\x02\x03").decode()
+        tree = {"children": [{"text": "leaf"}, {"children": [{"value": value}]}]}
+
+        get_decoding_plan(Tree).apply(tree)
+
+        assert tree["children"][1]["children"][0]["value"] == b"\x01\x02\x03"
@@ -0,0 +1,107 @@
+import json
+
+import pytest
+from pydantic import ValidationError
+
+from iso15118.shared.exi_codec import EXI, CustomJSONDecoder
+from iso15118.shared.exi_model_builder import build_trusted
+from iso15118.shared.inprocess_exi_codec import InProcessEXICodec
+from iso15118.shared.messages.din_spec.msgdef import V2GMessage as V2GMessageDINSPEC
+from iso15118.shared.messages.enums import Namespace
+from iso15118.shared.messages.iso15118_2.msgdef import V2GMessage as V2GMessageV2
+from iso15118.shared.settings import SettingKey, load_shared_settings, shared_settings
+from tests.shared.messages.exi_message_container import ExiMessageContainer
+from tests.shared.messages.test_din_spec import DIN_TEST_MESSAGES
+from tests.shared.messages.test_iso15118_2 import ISO_TEST_MESSAGES
+
+
+def decoded_message(message: ExiMessageContainer) -> dict:
+    return json.loads(message.json_str, cls=CustomJSONDecoder)["V2G_Message"]
+
+
+def iso_message(message_name: str) -> dict:
+    for message in ISO_TEST_MESSAGES:
+        if message.message_name == message_name:
+            return decoded_message(message)
+    raise KeyError(message_name)
+
+
+class TestBuildTrusted:
+    @pytest.mark.parametrize(
+        "message",
+        ISO_TEST_MESSAGES,
+        ids=[f"trusted_{msg.message_name}" for msg in ISO_TEST_MESSAGES],
+    )
+    def test_iso15118_2_matches_parse_obj(self, message: ExiMessageContainer):
+        expected = V2GMessageV2.parse_obj(decoded_message(message))
+
+        built = build_trusted(V2GMessageV2, decoded_message(message))
+
+        assert built == expected
+        assert built.__fields_set__ == expected.__fields_set__
+        assert built.body.__fields_set__ == expected.body.__fields_set__
+
+    @pytest.mark.parametrize(
+        "message",
+        DIN_TEST_MESSAGES,
+        ids=[f"trusted_{msg.message_name}" for msg in DIN_TEST_MESSAGES],
+    )
+    def test_din_spec_matches_parse_obj(self, message: ExiMessageContainer):
+        expected = V2GMessageDINSPEC.parse_obj(decoded_message(message))
+
+        assert build_trusted(V2GMessageDINSPEC, decoded_message(message)) == expected
+
+    def test_field_validator_still_runs(self):
+        message = iso_message("SessionSetupReq")
+        message["Header"]["SessionID"] = "not hex"
+
+        with pytest.raises(ValidationError):
+            build_trusted(V2GMessageV2, message)
+
+    def test_root_validator_still_runs(self):
+        message = iso_message("ChargeParameterDiscoveryReq")
+        # Neither AC nor DC charge parameters, see one_field_must_be_set()
+        del message["Body"]["ChargeParameterDiscoveryReq"]["DC_EVChargeParameter"]
+
+        with pytest.raises(ValidationError):
+            build_trusted(V2GMessageV2, message)
+
+    def test_unexpected_type_falls_back_to_validation(self):
+        message = iso_message("ChargeParameterDiscoveryReq")
+        charge_parameter_req = message["Body"]["ChargeParameterDiscoveryReq"]
+        charge_parameter_req["MaxEntriesSAScheduleTuple"] = "16"
+
+        built = build_trusted(V2GMessageV2, message).body
+        charge_parameter_req = built.charge_parameter_discovery_req
+
+        assert charge_parameter_req.max_entries_sa_schedule_tuple == 16
+
+    def test_extra_field_is_rejected(self):
+        message = iso_message("SessionSetupReq")
+        message["Header"]["Unknown"] = 1
+
+        with pytest.raises(ValidationError):
+            build_trusted(V2GMessageV2, message)
+
+
+class TestTrustedDecodingSetting:
+    @pytest.fixture(autouse=True)
+    def _trusted_decoding(self):
+        load_shared_settings()
+        previous_codec = EXI().exi_codec
+        EXI().set_exi_codec(InProcessEXICodec())
+        shared_settings[SettingKey.EXI_TRUSTED_DECODING] = True
+        yield
+        shared_settings[SettingKey.EXI_TRUSTED_DECODING] = False
+        EXI().exi_codec = previous_codec
+
+    @pytest.mark.parametrize(
+        "message",
+        ISO_TEST_MESSAGES,
+        ids=[f"trusted_decoding_{msg.message_name}" for msg in ISO_TEST_MESSAGES],
+    )
+    def test_from_exi_builds_trusted_models(self, message: ExiMessageContainer):
+        v2g_message = V2GMessageV2.parse_obj(decoded_message(message))
+        exi_stream = EXI().to_exi(v2g_message, Namespace.ISO_V2_MSG_DEF)
+
+        assert EXI().from_exi(exi_stream, Namespace.ISO_V2_MSG_DEF) == v2g_message
@@ -0,0 +1,95 @@
+import threading
+from unittest.mock import Mock, patch
+
+import pytest
+from py4j.java_gateway import Py4JNetworkError
+
+from iso15118.shared.exceptions import EXIDecodingError
+from iso15118.shared.exificient_exi_codec import ExificientEXICodec
+
+
+def mock_gateway(encoded: bytes = b"\x80") -> Mock:
+    gateway = Mock()
+    gateway.exi_codec.encode = Mock(return_value=encoded)
+    gateway.exi_codec.decode = Mock(return_value="{}")
+    return gateway
+
+
+class TestExificientEXICodecPool:
+    def test_calls_check_out_distinct_gateways(self):
+        gateways = [mock_gateway(), mock_gateway()]
+        with patch.object(ExificientEXICodec, "create_gateway", side_effect=gateways):
+            codec = ExificientEXICodec(pool_size=2)
+
+        both_checked_out = threading.Barrier(2, timeout=5)
+        used = []
+
+        def encode_with(gateway):
+            def encode(message, namespace):
+                used.append(gateway)
+                # Only passes if both calls hold a gateway at the same time
+                both_checked_out.wait()
+                return b"\x80"
+
+            return encode
+
+        for gateway in gateways:
+            gateway.exi_codec.encode = Mock(side_effect=encode_with(gateway))
+
+        threads = [
+            threading.Thread(target=codec.encode, args=("{}", "ns")) for _ in range(2)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+
+        assert sorted(map(id, used)) == sorted(map(id, gateways))
+
+    def test_broken_gateway_is_replaced_and_call_retried(self):
+        broken = mock_gateway()
+        broken.exi_codec.encode = Mock(side_effect=Py4JNetworkError("gone"))
+        replacement = mock_gateway(b"\x80\x40")
+        with patch.object(
+            ExificientEXICodec, "create_gateway", side_effect=[broken, replacement]
+        ):
+            codec = ExificientEXICodec(pool_size=1)
+            assert codec.encode("{}", "ns") == b"\x80\x40"
+
+        broken.shutdown.assert_called_once()
+        assert codec._pool.qsize() == 1
+
+    def test_codec_error_returns_gateway_to_pool(self):
+        gateway = mock_gateway()
+        gateway.exi_codec.encode = Mock(return_value=None)
+        gateway.exi_codec.get_last_encoding_error = Mock(return_value="invalid")
+        with patch.object(ExificientEXICodec, "create_gateway", return_value=gateway):
+            codec = ExificientEXICodec(pool_size=1)
+
+        with pytest.raises(Exception, match="invalid"):
+            codec.encode("{}", "ns")
+        assert codec._pool.get_nowait() is gateway
+
+    def test_encode_many_uses_one_gateway(self):
+        gateways = [mock_gateway(b"\x80\x01"), mock_gateway(b"\x80\x02")]
+        with patch.object(ExificientEXICodec, "create_gateway", side_effect=gateways):
+            codec = ExificientEXICodec(pool_size=2)
+
+        results = codec.encode_many([("{}", "ns1"), ("{}", "ns2"), ("{}", "ns3")])
+
+        assert results == [b"\x80\x01"] * 3
+        assert gateways[0].exi_codec.encode.call_count == 3
+        gateways[1].exi_codec.encode.assert_not_called()
+        assert codec._pool.qsize() == 2
+
+    def test_call_fails_if_no_gateway_becomes_available(self):
+        broken = mock_gateway()
+        broken.exi_codec.decode = Mock(side_effect=Py4JNetworkError("gone"))
+        with patch.object(ExificientEXICodec, "create_gateway", return_value=broken):
+            codec = ExificientEXICodec(pool_size=1)
+        codec.CHECKOUT_TIMEOUT = 0.01
+        # The JVM fails to relaunch
+        codec.replace_gateway_in_background = Mock()
+
+        with pytest.raises(EXIDecodingError):
+            codec.decode(b"\x80", "ns")
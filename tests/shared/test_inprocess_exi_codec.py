@@ -0,0 +1,141 @@
+import json
+
+import pytest
+
+from iso15118.shared.exceptions import EXIDecodingError, EXIEncodingError
+from iso15118.shared.exi_codec import CustomJSONDecoder, CustomJSONEncoder
+from iso15118.shared.inprocess_exi_codec import InProcessEXICodec
+from iso15118.shared.messages.din_spec.msgdef import V2GMessage as V2GMessageDINSPEC
+from iso15118.shared.messages.enums import Namespace
+from iso15118.shared.messages.iso15118_2.msgdef import V2GMessage as V2GMessageV2
+from iso15118.shared.messages.iso15118_20.common_messages import SessionSetupReq
+from iso15118.shared.messages.iso15118_20.common_types import MessageHeader
+from tests.shared.messages.exi_message_container import ExiMessageContainer
+from tests.shared.messages.test_din_spec import DIN_TEST_MESSAGES
+from tests.shared.messages.test_iso15118_2 import ISO_TEST_MESSAGES
+
+SAP_REQ_EXI = bytes.fromhex(
+    "8000DBAB9371D3234B71D1B981899189D191818991D26B9B3A232B30020000040040"
+)
+SAP_REQ_JSON = {
+    "supportedAppProtocolReq": {
+        "AppProtocol": [
+            {
+                "ProtocolNamespace": "urn:din:70121:2012:MsgDef",
+                "VersionNumberMajor": 2,
+                "VersionNumberMinor": 0,
+                "SchemaID": 1,
+                "Priority": 1,
+            }
+        ]
+    }
+}
+SAP_RES_EXI = bytes.fromhex("80400040")
+SAP_RES_JSON = {
+    "supportedAppProtocolRes": {
+        "ResponseCode": "OK_SuccessfulNegotiation",
+        "SchemaID": 1,
+    }
+}
+
+
+def round_trip(codec, message_dict: dict, namespace: str) -> dict:
+    exi = codec.encode(json.dumps(message_dict, cls=CustomJSONEncoder), namespace)
+    return json.loads(codec.decode(exi, namespace), cls=CustomJSONDecoder)
+
+
+class TestInProcessEXICodec:
+    @pytest.fixture(scope="class")
+    def codec(self):
+        return InProcessEXICodec()
+
+    def test_sap_req_matches_reference_stream(self, codec):
+        assert codec.encode(json.dumps(SAP_REQ_JSON), Namespace.SAP) == SAP_REQ_EXI
+        assert json.loads(codec.decode(SAP_REQ_EXI, Namespace.SAP)) == SAP_REQ_JSON
+
+    def test_sap_res_matches_reference_stream(self, codec):
+        assert codec.encode(json.dumps(SAP_RES_JSON), Namespace.SAP) == SAP_RES_EXI
+        assert json.loads(codec.decode(SAP_RES_EXI, Namespace.SAP)) == SAP_RES_JSON
+
+    @pytest.mark.parametrize(
+        "message",
+        ISO_TEST_MESSAGES,
+        ids=[f"round_trip_{msg.message_name}" for msg in ISO_TEST_MESSAGES],
+    )
+    def test_iso15118_2_messages_round_trip(self, codec, message: ExiMessageContainer):
+        decoded_dict = json.loads(message.json_str, cls=CustomJSONDecoder)
+        v2g_message = V2GMessageV2.parse_obj(decoded_dict["V2G_Message"])
+        message_dict = {
+            "V2G_Message": v2g_message.dict(by_alias=True, exclude_none=True)
+        }
+
+        decoded = round_trip(codec, message_dict, Namespace.ISO_V2_MSG_DEF)
+
+        assert V2GMessageV2.parse_obj(decoded["V2G_Message"]) == v2g_message
+
+    @pytest.mark.parametrize(
+        "message",
+        DIN_TEST_MESSAGES,
+        ids=[f"round_trip_{msg.message_name}" for msg in DIN_TEST_MESSAGES],
+    )
+    def test_din_spec_messages_round_trip(self, codec, message: ExiMessageContainer):
+        decoded_dict = json.loads(message.json_str, cls=CustomJSONDecoder)
+        v2g_message = V2GMessageDINSPEC.parse_obj(decoded_dict["V2G_Message"])
+        message_dict = {
+            "V2G_Message": v2g_message.dict(by_alias=True, exclude_none=True)
+        }
+
+        decoded = round_trip(codec, message_dict, Namespace.DIN_MSG_DEF)
+
+        assert V2GMessageDINSPEC.parse_obj(decoded["V2G_Message"]) == v2g_message
+
+    def test_iso15118_20_message_round_trip(self, codec):
+        session_setup_req = SessionSetupReq(
+            header=MessageHeader(session_id="00", timestamp=1659025085),
+            evcc_id="WMIV1234567890ABCDEX",
+        )
+        message_dict = {
+            "SessionSetupReq": session_setup_req.dict(by_alias=True, exclude_none=True)
+        }
+
+        decoded = round_trip(codec, message_dict, Namespace.ISO_V20_COMMON_MSG)
+
+        assert SessionSetupReq.parse_obj(decoded["SessionSetupReq"]) == (
+            session_setup_req
+        )
+
+    def test_signed_info_is_encoded_as_fragment(self, codec):
+        signed_info = {
+            "SignedInfo": {
+                "CanonicalizationMethod": {
+                    "Algorithm": "http://www.w3.org/TR/canonical-exi/"
+                },
+                "SignatureMethod": {
+                    "Algorithm": "http://www.w3.org/2001/04/xmldsig-more#ecdsa-sha256"
+                },
+                "Reference": [
+                    {
+                        "URI": "#id1",
+                        "Transforms": {
+                            "Transform": [
+                                {"Algorithm": "http://www.w3.org/TR/canonical-exi/"}
+                            ]
+                        },
+                        "DigestMethod": {
+                            "Algorithm": "http://www.w3.org/2001/04/xmlenc#sha256"
+                        },
+                        "DigestValue": bytes(range(32)),
+                    }
+                ],
+            }
+        }
+
+        assert round_trip(codec, signed_info, Namespace.XML_DSIG) == signed_info
+
+    def test_encode_unknown_element_raises(self, codec):
+        with pytest.raises(EXIEncodingError):
+            codec.encode(json.dumps({"UnknownReq": {}}), Namespace.ISO_V2_MSG_DEF)
+
+    def test_decode_truncated_stream_raises(self, codec):
+        with pytest.raises(EXIDecodingError):
+            codec.decode(SAP_REQ_EXI[:10], Namespace.SAP)
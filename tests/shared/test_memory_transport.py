@@ -0,0 +1,125 @@
+import asyncio
+from ipaddress import IPv6Address
+from typing import Tuple
+
+import pytest
+
+from iso15118.secc.transport.tcp_server import TCPServer
+from iso15118.shared.memory_transport import MemoryNetwork, MemoryTransport
+from iso15118.shared.messages.enums import ISOV2PayloadTypes, Protocol
+from iso15118.shared.messages.sdp import SDPRequest, Security, Transport
+from iso15118.shared.messages.v2gtp import V2GTPMessage
+from iso15118.shared.notifications import TCPClientNotification, UDPPacketNotification
+from iso15118.shared.security import get_tls_handshake_stats
+from iso15118.shared.utils import cancel_task
+from tests.shared.test_tls_context import install_secc_pki, pki_path  # noqa: F401
+
+
+async def start_tcp_server(
+    transport: MemoryTransport, queue: asyncio.Queue, tls: bool
+) -> Tuple[TCPServer, asyncio.Task]:
+    tcp_server = transport.create_tcp_server(queue, "eth0")
+    ready_event = asyncio.Event()
+    task = asyncio.create_task(tcp_server.server_factory(ready_event, tls))
+    await ready_event.wait()
+    return tcp_server, task
+
+
+@pytest.mark.asyncio
+class TestMemoryTransport:
+    async def test_sdp_request_reaches_server_on_its_port(self):
+        network = MemoryNetwork()
+        secc_queue, evcc_queue = asyncio.Queue(), asyncio.Queue()
+        udp_server = network.transport().create_udp_server(secc_queue, "eth0", 15119)
+        udp_client = network.transport().create_udp_client(evcc_queue, "eth0", 15119)
+        ready_event = asyncio.Event()
+        server_task = asyncio.create_task(udp_server.start(ready_event))
+        await ready_event.wait()
+        await udp_client.start()
+        sdp_request = SDPRequest(Security.NO_TLS, Transport.TCP)
+
+        udp_client.send(
+            V2GTPMessage(
+                Protocol.UNKNOWN, sdp_request.payload_type, sdp_request.to_payload()
+            )
+        )
+        request = await asyncio.wait_for(secc_queue.get(), 1)
+        udp_server.send(
+            V2GTPMessage(Protocol.ISO_15118_2, ISOV2PayloadTypes.SDP_RESPONSE, b""),
+            request.addr,
+        )
+        await udp_client.receive()
+        response = evcc_queue.get_nowait()
+        await cancel_task(server_task)
+
+        # The server's receiving task ended with it
+        assert asyncio.all_tasks() == {asyncio.current_task()}
+        assert isinstance(request, UDPPacketNotification)
+        assert request.addr[0] == udp_client.memory_transport.host
+        payload = V2GTPMessage.from_bytes(Protocol.UNKNOWN, request.data).payload
+        assert SDPRequest.from_payload(payload).security == Security.NO_TLS
+        assert response.addr[1] == 15119
+
+    async def test_tcp_connection(self):
+        network = MemoryNetwork()
+        secc_transport, evcc_transport = network.transport(), network.transport()
+        secc_queue = asyncio.Queue()
+        tcp_server, server_task = await start_tcp_server(
+            secc_transport, secc_queue, False
+        )
+
+        tcp_client = await evcc_transport.create_tcp_client(
+            IPv6Address(tcp_server.ipv6_address_host),
+            tcp_server.port,
+            asyncio.Queue(),
+            False,
+            "eth0",
+        )
+        notification = await asyncio.wait_for(secc_queue.get(), 1)
+        reader, writer = notification.transport
+        tcp_client.writer.write(b"request")
+        request = await reader.readexactly(7)
+        writer.write(b"response")
+        response = await tcp_client.reader.readexactly(8)
+        tcp_client.writer.close()
+        await tcp_client.writer.wait_closed()
+        await cancel_task(server_task)
+
+        assert isinstance(notification, TCPClientNotification)
+        assert notification.ip_address[0] == evcc_transport.host
+        assert tcp_server.ipv6_address_bytes == IPv6Address(secc_transport.host).packed
+        assert (request, response) == (b"request", b"response")
+        assert await reader.read() == b""
+
+    async def test_tls_connection(self):
+        install_secc_pki()
+        network = MemoryNetwork()
+        secc_queue = asyncio.Queue()
+        tcp_server, server_task = await start_tcp_server(
+            network.transport(), secc_queue, True
+        )
+        full = get_tls_handshake_stats(True).full
+
+        tcp_client = await network.transport().create_tcp_client(
+            IPv6Address(tcp_server.ipv6_address_host),
+            tcp_server.port,
+            asyncio.Queue(),
+            True,
+            "eth0",
+        )
+        reader, writer = (await asyncio.wait_for(secc_queue.get(), 1)).transport
+        tcp_client.writer.write(b"secured")
+        secured = await reader.readexactly(7)
+        await cancel_task(server_task)
+
+        assert tcp_server.is_tls_enabled
+        assert tcp_client.writer.get_extra_info("ssl_object") is not None
+        assert writer.get_extra_info("sslcontext") is tcp_server.ssl_context
+        assert secured == b"secured"
+        assert get_tls_handshake_stats(True).full == full + 1
+
+    async def test_connection_refused_without_server(self):
+        with pytest.raises(ConnectionRefusedError):
+            await MemoryNetwork().transport().create_tcp_client(
+                IPv6Address("fe80::1"), 50000, asyncio.Queue(), False, "eth0"
+            )
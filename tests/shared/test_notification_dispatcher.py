@@ -0,0 +1,86 @@
+import asyncio
+from typing import List
+
+import pytest
+
+from iso15118.shared.messages.enums import SessionStopAction
+from iso15118.shared.notification_dispatcher import NotificationDispatcher
+from iso15118.shared.notifications import StopNotification
+from iso15118.shared.utils import cancel_task
+
+
+def stop_notification(peer: str, reason: str) -> StopNotification:
+    return StopNotification(
+        True, reason, (peer, 49152, 0, 0), SessionStopAction.TERMINATE
+    )
+
+
+def peer(notification: StopNotification) -> str:
+    return notification.peer_ip_address[0]
+
+
+@pytest.mark.asyncio
+class TestNotificationDispatcher:
+    async def test_slow_peer_does_not_block_other_peers(self):
+        release_slow_peer = asyncio.Event()
+        processed: List[str] = []
+
+        async def process(notification: StopNotification):
+            if peer(notification) == "fe80::2":
+                await release_slow_peer.wait()
+            processed.append(notification.reason)
+
+        queue = asyncio.Queue()
+        dispatcher = NotificationDispatcher(process, peer)
+        dispatcher_task = asyncio.create_task(dispatcher.run(queue))
+        queue.put_nowait(stop_notification("fe80::2", "slow"))
+        queue.put_nowait(stop_notification("fe80::3", "fast"))
+        for _ in range(5):
+            await asyncio.sleep(0)
+        fast_only = list(processed)
+        depth_while_blocked = dispatcher.queue_depth
+        release_slow_peer.set()
+        await asyncio.wait_for(queue.join(), 1)
+        await cancel_task(dispatcher_task)
+
+        assert fast_only == ["fast"]
+        assert depth_while_blocked == 1
+        assert processed == ["fast", "slow"]
+
+    async def test_notifications_of_a_peer_keep_their_order(self):
+        processed: List[str] = []
+
+        async def process(notification: StopNotification):
+            await asyncio.sleep(0.01 if notification.reason == "first" else 0)
+            processed.append(notification.reason)
+
+        queue = asyncio.Queue()
+        dispatcher = NotificationDispatcher(process, peer)
+        dispatcher_task = asyncio.create_task(dispatcher.run(queue))
+        for reason in ("first", "second", "third"):
+            queue.put_nowait(stop_notification("fe80::2", reason))
+        await asyncio.wait_for(queue.join(), 1)
+        await cancel_task(dispatcher_task)
+
+        assert processed == ["first", "second", "third"]
+        assert dispatcher.stats()["lanes"] == 0
+
+    async def test_failures_are_counted_and_measured(self):
+        async def process(notification: StopNotification):
+            await asyncio.sleep(0.01)
+            if notification.reason == "broken":
+                raise ValueError(notification.reason)
+
+        queue = asyncio.Queue()
+        dispatcher = NotificationDispatcher(process, peer, max_lanes=1)
+        dispatcher_task = asyncio.create_task(dispatcher.run(queue))
+        queue.put_nowait(stop_notification("fe80::2", "broken"))
+        queue.put_nowait(stop_notification("fe80::3", "fine"))
+        await asyncio.wait_for(queue.join(), 1)
+        await cancel_task(dispatcher_task)
+        stats = dispatcher.stats()
+
+        assert (stats["processed"], stats["failed"], stats["queued"]) == (2, 1, 0)
+        assert stats["max_processing_ms"] >= 10
+        # With a single lane at a time, the second peer waited for the first
+        assert stats["max_wait_ms"] >= 10
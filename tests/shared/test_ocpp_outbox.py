@@ -0,0 +1,81 @@
+import asyncio
+from typing import List, Optional, Type
+
+import pytest
+
+from iso15118.shared.ocpp_outbox import OCPPOutbox
+
+
+class FakeCSMS:
+    """Answers each request with its name, after the given delays"""
+
+    def __init__(
+        self,
+        delays: Optional[dict] = None,
+        failures: int = 0,
+        error: Type[Exception] = asyncio.TimeoutError,
+    ):
+        self.delays = delays or {}
+        self.failures = failures
+        self.error = error
+        self.received: List[str] = []
+
+    async def call(self, request: str) -> str:
+        await asyncio.sleep(self.delays.get(request, 0))
+        if self.failures:
+            self.failures -= 1
+            raise self.error()
+        self.received.append(request)
+        return f"{request}Response"
+
+
+@pytest.mark.asyncio
+class TestOCPPOutbox:
+    async def test_requests_of_a_transaction_keep_their_order(self):
+        csms = FakeCSMS(delays={"Started": 0.05})
+        outbox = OCPPOutbox(csms.call)
+
+        started = outbox.submit("Started", "T1")
+        authorize = outbox.submit("Authorize", "T1")
+        other_transaction = outbox.submit("Updated", "T2")
+        status = outbox.submit("StatusNotification")
+        await asyncio.wait_for(authorize, 1)
+
+        assert started.done()
+        assert csms.received.index("Started") < csms.received.index("Authorize")
+        # Not held up by the slow request of the other transaction
+        assert csms.received[:2] == ["Updated", "StatusNotification"]
+        assert other_transaction.result() == "UpdatedResponse"
+        assert status.result() == "StatusNotificationResponse"
+        assert outbox.stats()["max_queue_lag_ms"] >= 50
+
+    async def test_failed_request_is_sent_again(self):
+        csms = FakeCSMS(failures=1)
+        outbox = OCPPOutbox(csms.call, max_attempts=2, retry_delay=0.01)
+
+        response = await asyncio.wait_for(outbox.submit("Authorize", "T1"), 1)
+
+        assert response == "AuthorizeResponse"
+        assert (outbox.stats()["retries"], outbox.stats()["failed"]) == (1, 0)
+
+    async def test_request_is_sent_again_right_away_after_connection_loss(self):
+        csms = FakeCSMS(failures=1, error=ConnectionError)
+        outbox = OCPPOutbox(csms.call, max_attempts=2, retry_delay=10)
+
+        response = await asyncio.wait_for(outbox.submit("Authorize", "T1"), 1)
+
+        assert response == "AuthorizeResponse"
+
+    async def test_request_fails_after_last_attempt(self):
+        csms = FakeCSMS(failures=2)
+        outbox = OCPPOutbox(csms.call, max_attempts=2, retry_delay=0.01)
+
+        fire_and_forget = outbox.submit("Ended", "T1")
+        authorize = outbox.submit("Authorize", "T1")
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(fire_and_forget, 1)
+        await asyncio.wait_for(authorize, 1)
+        stats = outbox.stats()
+
+        assert csms.received == ["Authorize"]
+        assert (stats["sent"], stats["failed"], stats["queued"]) == (1, 1, 0)
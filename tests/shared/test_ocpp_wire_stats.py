@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+from iso15118.shared.ocpp_wire_stats import OCPPWireStats, percentile
+
+
+def frame(*message) -> str:
+    return json.dumps(message, ensure_ascii=False)
+
+
+class TestOCPPWireStats:
+    def test_calls_are_measured_by_their_frames(self):
+        exchanges = []
+        stats = OCPPWireStats(lambda *exchange: exchanges.append(exchange))
+        heartbeat = frame(2, "1", "Heartbeat", {})
+        heartbeat_result = frame(3, "1", {"currentTime": "2024-07-01T00:00:00Z"})
+        # The charging profile's description is sent UTF-8 encoded
+        set_profile = frame(2, "2", "SetChargingProfile", {"id": "Zürich"})
+        set_profile_result = frame(3, "2", {"status": "Accepted"})
+
+        stats.sent(heartbeat, now=10.0)
+        stats.received(set_profile, now=10.1)
+        stats.sent(set_profile_result, now=10.15)
+        stats.received(heartbeat_result, now=10.2)
+        summary = stats.summary()
+
+        assert exchanges == [
+            (
+                "SetChargingProfile",
+                pytest.approx(0.05),
+                len(set_profile) + 1 + len(set_profile_result),
+            ),
+            ("Heartbeat", pytest.approx(0.2), len(heartbeat) + len(heartbeat_result)),
+        ]
+        assert summary["Heartbeat"]["request_bytes"] == len(heartbeat)
+        assert summary["Heartbeat"]["response_bytes"] == len(heartbeat_result)
+        assert summary["SetChargingProfile"]["request_bytes"] == len(set_profile) + 1
+        assert round(summary["Heartbeat"]["bytes_per_second"]) == 370
+        assert stats.pending_calls == 0
+
+    def test_percentiles_per_action(self):
+        stats = OCPPWireStats()
+        for call in range(100):
+            unique_id = str(call)
+            stats.sent(frame(2, unique_id, "Authorize", {}), now=0)
+            stats.received(frame(3, unique_id, {}), now=(call + 1) / 1000)
+        stats.sent(frame(2, "error", "Authorize", {}), now=0)
+        stats.received(frame(4, "error", "InternalError", "", {}), now=0.5)
+        # Responses without a call, e.g. arriving after a timeout, are ignored
+        stats.received(frame(3, "unknown", {}), now=1)
+        summary = stats.summary()["Authorize"]
+
+        assert (summary["calls"], summary["errors"]) == (101, 1)
+        assert (summary["p50_rtt_ms"], summary["p99_rtt_ms"]) == (51, 100)
+        assert percentile([], 95) == 0.0
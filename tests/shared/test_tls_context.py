@@ -0,0 +1,135 @@
+import asyncio
+import datetime
+import os
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+from iso15118.shared import security
+from iso15118.shared.security import (
+    CertPath,
+    KeyPasswordPath,
+    KeyPath,
+    get_ssl_context,
+    get_tls_handshake_stats,
+    record_tls_handshake,
+)
+from iso15118.shared.settings import SettingKey, load_shared_settings, shared_settings
+
+
+def write_self_signed_cert(cert_path: str, key_path: str, password: bytes):
+    """A self-signed SECC certificate, which also serves as V2G root"""
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "SECC")])
+    now = datetime.datetime.utcnow()
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), True)
+        .sign(key, hashes.SHA256())
+    )
+    with open(cert_path, "wb") as cert_file:
+        cert_file.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as key_file:
+        key_file.write(
+            key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.PKCS8,
+                serialization.BestAvailableEncryption(password),
+            )
+        )
+
+
+def install_secc_pki():
+    write_self_signed_cert(
+        CertPath.CPO_CERT_CHAIN_PEM, KeyPath.SECC_LEAF_PEM, b"secret"
+    )
+    with open(KeyPasswordPath.SECC_LEAF_KEY_PASSWORD, "w") as password_file:
+        password_file.write("secret")
+    with open(CertPath.CPO_CERT_CHAIN_PEM, "rb") as cert_file:
+        root = cert_file.read()
+    with open(CertPath.V2G_ROOT_PEM, "wb") as root_file:
+        root_file.write(root)
+
+
+@pytest.fixture(autouse=True)
+def pki_path(tmp_path):
+    load_shared_settings()
+    previous_pki_path = shared_settings[SettingKey.PKI_PATH]
+    shared_settings[SettingKey.PKI_PATH] = str(tmp_path)
+    os.makedirs(tmp_path / "iso15118_2" / "certs")
+    os.makedirs(tmp_path / "iso15118_2" / "private_keys")
+    security._ssl_contexts.clear()
+    yield tmp_path
+    security._ssl_contexts.clear()
+    shared_settings[SettingKey.PKI_PATH] = previous_pki_path
+
+
+class TestGetSSLContext:
+    def test_context_is_reused(self):
+        install_secc_pki()
+
+        assert get_ssl_context(True) is get_ssl_context(True)
+        assert get_ssl_context(False) is get_ssl_context(False)
+
+    def test_context_is_reloaded_on_pki_change(self):
+        install_secc_pki()
+        ssl_context = get_ssl_context(True)
+
+        install_secc_pki()
+        # Not to depend on the timestamp resolution of the file system
+        modified = os.stat(CertPath.CPO_CERT_CHAIN_PEM).st_mtime_ns + 10**9
+        os.utime(CertPath.CPO_CERT_CHAIN_PEM, ns=(modified, modified))
+
+        assert get_ssl_context(True) is not ssl_context
+
+    def test_missing_pki_until_installed(self):
+        assert get_ssl_context(True) is None
+
+        install_secc_pki()
+
+        assert get_ssl_context(True) is not None
+
+
+@pytest.mark.asyncio
+class TestTLSSessionResumption:
+    async def test_reconnecting_client_resumes_session(self):
+        install_secc_pki()
+        server_stats = get_tls_handshake_stats(True)
+        full, resumed = server_stats.full, server_stats.resumed
+        reused = []
+
+        async def echo(reader, writer):
+            record_tls_handshake(writer.get_extra_info("ssl_object"), True)
+            writer.write(await reader.readexactly(4))
+            await writer.drain()
+            writer.close()
+
+        server = await asyncio.start_server(
+            echo, "127.0.0.1", 0, ssl=get_ssl_context(True)
+        )
+        port = server.sockets[0].getsockname()[1]
+        for _ in range(2):
+            reader, writer = await asyncio.open_connection(
+                "127.0.0.1", port, ssl=get_ssl_context(False)
+            )
+            writer.write(b"ping")
+            assert await reader.readexactly(4) == b"ping"
+            reused.append(writer.get_extra_info("ssl_object").session_reused)
+            writer.close()
+            await writer.wait_closed()
+        server.close()
+        await server.wait_closed()
+
+        assert reused == [False, True]
+        assert server_stats.full == full + 1
+        assert server_stats.resumed == resumed + 1
+        assert server_stats.stats()["max_ms"] > 0
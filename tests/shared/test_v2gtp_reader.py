@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+
+from iso15118.shared.exceptions import InvalidV2GTPMessageError
+from iso15118.shared.messages.enums import ISOV2PayloadTypes, Protocol
+from iso15118.shared.messages.v2gtp import V2GTPMessage
+from iso15118.shared.v2gtp_reader import V2GTPStreamReader
+
+
+def v2gtp_bytes(payload: bytes) -> bytes:
+    return V2GTPMessage(
+        Protocol.ISO_15118_2, ISOV2PayloadTypes.EXI_ENCODED, payload
+    ).to_bytes()
+
+
+@pytest.mark.asyncio
+class TestV2GTPStreamReader:
+    async def test_fragmented_message_is_reassembled(self):
+        reader = asyncio.StreamReader()
+        frame_reader = V2GTPStreamReader(reader, max_payload_length=20000)
+        data = v2gtp_bytes(bytes(range(256)) * 40)
+
+        for start in range(0, len(data), 1500):
+            reader.feed_data(data[start : start + 1500])
+        frame = await frame_reader.read_frame()
+
+        message = V2GTPMessage.from_frame(
+            Protocol.ISO_15118_2, frame.header, frame.payload
+        )
+        assert message.payload == bytes(range(256)) * 40
+        await frame_reader.stop()
+
+    async def test_coalesced_messages_are_split(self):
+        reader = asyncio.StreamReader()
+        frame_reader = V2GTPStreamReader(reader, max_payload_length=100)
+
+        reader.feed_data(v2gtp_bytes(b"\x80\x01") + v2gtp_bytes(b"\x80\x02\x03"))
+        first = await frame_reader.read_frame()
+        second = await frame_reader.read_frame()
+
+        assert first.payload == b"\x80\x01"
+        assert second.payload == b"\x80\x02\x03"
+        await frame_reader.stop()
+
+    async def test_timeout_keeps_partially_read_message(self):
+        reader = asyncio.StreamReader()
+        frame_reader = V2GTPStreamReader(reader, max_payload_length=100)
+        data = v2gtp_bytes(b"\x80\x01\x02\x03")
+
+        reader.feed_data(data[:10])
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(frame_reader.read_frame(), 0.05)
+        reader.feed_data(data[10:])
+
+        assert (await frame_reader.read_frame()).payload == b"\x80\x01\x02\x03"
+        await frame_reader.stop()
+
+    async def test_oversized_payload_is_rejected(self):
+        reader = asyncio.StreamReader()
+        frame_reader = V2GTPStreamReader(reader, max_payload_length=3)
+
+        reader.feed_data(v2gtp_bytes(b"\x80\x01\x02\x03"))
+
+        with pytest.raises(InvalidV2GTPMessageError):
+            await frame_reader.read_frame()
+
+    async def test_invalid_header_is_rejected(self):
+        reader = asyncio.StreamReader()
+        frame_reader = V2GTPStreamReader(reader, max_payload_length=100)
+
+        reader.feed_data(b"GET / HTTP/1.1\r\n")
+
+        with pytest.raises(InvalidV2GTPMessageError):
+            await frame_reader.read_frame()
+
+    async def test_closed_stream_returns_none(self):
+        reader = asyncio.StreamReader()
+        frame_reader = V2GTPStreamReader(reader, max_payload_length=100)
+
+        reader.feed_data(v2gtp_bytes(b"\x80\x01"))
+        reader.feed_eof()
+
+        assert (await frame_reader.read_frame()).payload == b"\x80\x01"
+        assert await frame_reader.read_frame() is None
+        assert await frame_reader.read_frame() is None
+
+    async def test_stream_closed_within_message(self):
+        reader = asyncio.StreamReader()
+        frame_reader = V2GTPStreamReader(reader, max_payload_length=100)
+
+        reader.feed_data(v2gtp_bytes(b"\x80\x01\x02\x03")[:10])
+        reader.feed_eof()
+
+        with pytest.raises(ConnectionResetError):
+            await frame_reader.read_frame()
+
+    async def test_stream_error_is_raised(self):
+        reader = asyncio.StreamReader()
+        frame_reader = V2GTPStreamReader(reader, max_payload_length=100)
+
+        # E.g. a TLS record failing to decrypt
+        reader.set_exception(OSError("decryption failed"))
+
+        with pytest.raises(OSError):
+            await asyncio.wait_for(frame_reader.read_frame(), 1)
+        with pytest.raises(OSError):
+            await asyncio.wait_for(frame_reader.read_frame(), 1)
+
+
+class TestV2GTPMessageFromBytes:
+    def test_from_bytes_matches_from_frame(self):
+        data = v2gtp_bytes(b"\x80\x01\x02\x03")
+
+        from_bytes = V2GTPMessage.from_bytes(Protocol.ISO_15118_2, data)
+        from_frame = V2GTPMessage.from_frame(Protocol.ISO_15118_2, data[:8], data[8:])
+
+        assert from_bytes.to_bytes() == from_frame.to_bytes() == data
+        assert type(from_bytes.payload) is bytes